@@ -0,0 +1,346 @@
+"""Headless end-to-end benchmarks
+
+Runs the real Game (drawing included) on SDL's dummy video driver through
+scripted scenarios, a fixed number of frames each, and reports frames per
+second, per-phase cost (from profiling.FrameProfiler) and allocation
+counts as JSON (--draw-calls adds rendering calls per frame, counted in a
+separate pass since counting slows drawing down):
+
+    python benchmark.py --output results.json
+    python benchmark.py --scenario level4 --scenario shooter
+
+Results can be saved as a baseline and later runs compared against it;
+the command exits with status 1 when a scenario got slower than the
+tolerance allows:
+
+    python benchmark.py --save-baseline baseline.json
+    python benchmark.py --baseline baseline.json --tolerance 0.15
+
+Baselines only mean something on the machine they were recorded on.
+"""
+import argparse
+import contextlib
+import gc
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# Run the game without a window or a sound card
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")  # stdout is for the report
+
+import pygame
+
+import flappy_bird
+import player_store
+import profiling
+import simulation
+
+FRAMES = 600
+WARMUP_FRAMES = 60
+SEED = 2024
+TOLERANCE = 0.15  # Allowed slowdown before a scenario counts as a regression
+LEADERBOARD_PLAYERS = 100000
+SCREEN_CENTER = simulation.SCREEN_HEIGHT // 2
+
+class Scenario:
+    """A scripted stretch of play: set the game up, then steer it every frame"""
+    def __init__(self, name, description):
+        self.name = name
+        self.description = description
+
+    def setup(self, game):
+        pass
+
+    def drive(self, game, frame):
+        pass
+
+class MenuScenario(Scenario):
+    def __init__(self, name, description, screen):
+        super().__init__(name, description)
+        self.screen = screen
+
+    def setup(self, game):
+        game.show_home_page = self.screen == 'home'
+        game.level_selection = self.screen == 'level_select'
+
+class LevelScenario(Scenario):
+    """Plays a level with a simple autopilot, restarting after each crash"""
+    def __init__(self, name, description, level):
+        super().__init__(name, description)
+        self.level = level
+
+    def setup(self, game):
+        game.show_home_page = False
+        game.select_level(self.level)
+
+    def drive(self, game, frame):
+        if game.sim.game_over:
+            game.restart_game()
+        game.pending_action = self.autopilot(game.sim)
+
+    def autopilot(self, sim):
+        bird = sim.bird
+        target = SCREEN_CENTER
+        for pipe in sim.pipes:
+            if pipe.x + simulation.PIPE_WIDTH > bird.x - bird.radius:
+                target = pipe.height + pipe.pipe_gap / 2 + 45  # Aim low: a level 3 flap rises about 40 px
+                break
+        if not sim.started or (bird.y > target and bird.velocity >= 0):
+            return simulation.ACTION_FLAP
+        return simulation.ACTION_NONE
+
+class ShooterScenario(LevelScenario):
+    """Level 4 in Zombie Bird Shooter mode: shoots steadily and dodges toward the middle"""
+    def __init__(self, name, description):
+        super().__init__(name, description, 4)
+
+    def setup(self, game):
+        super().setup(game)
+        self.enter_shooter_mode(game)
+
+    def enter_shooter_mode(self, game):
+        game.sim.started = True
+        game.sim.score = simulation.MODE_SWITCH_POINTS  # Switches on the next step
+
+    def drive(self, game, frame):
+        if game.sim.game_over:
+            game.restart_game()
+            self.enter_shooter_mode(game)
+        shooter = game.sim.shooter_bird
+        action = simulation.ACTION_FLAP if frame % 6 == 0 else simulation.ACTION_NONE
+        if shooter:
+            if shooter.y > SCREEN_CENTER + 60:
+                action |= simulation.ACTION_UP
+            elif shooter.y < SCREEN_CENTER - 60:
+                action |= simulation.ACTION_DOWN
+        game.pending_action = action
+
+class CrashScenario(LevelScenario):
+    """A crash every half second, each with a burst of extra explosion particles"""
+    BURSTS = 10
+
+    def __init__(self, name, description):
+        super().__init__(name, description, 1)
+
+    def drive(self, game, frame):
+        if frame % 30 == 0:
+            game.restart_game()
+            game.sim.started = True
+            bird = game.sim.bird
+            for _ in range(self.BURSTS):
+                game.add_explosion_particles(bird.x, bird.y)
+            game.screen_shake = 15
+        game.pending_action = simulation.ACTION_NONE
+
+class LeaderboardScenario(Scenario):
+    """The home page over a large player table, querying the leaderboard every frame
+    
+    The home page itself only looks up the player's overall rank, so each
+    frame also runs the queries a leaderboard panel makes: the top players
+    overall and the top scores and player's rank on every level.
+    """
+    def __init__(self, name, description, players=LEADERBOARD_PLAYERS):
+        super().__init__(name, description)
+        self.players = players
+
+    def prepare(self, workdir):
+        """Fill the player database before the game opens it"""
+        store = player_store.SqlitePlayerStore(os.path.join(workdir, player_store.DB_FILE), legacy_json=None)
+        with store.db:
+            for i in range(self.players):
+                store.add_player(f"Player {i}", {level: (i * 7 + level) % 97 for level in player_store.LEVELS},
+                                 {1: 1}, (i * 7919) % 10007, "2025-01-01 00:00")
+        store.close()
+
+    def setup(self, game):
+        game.show_home_page = True
+        game.player_data.set_current_player("Player 4242")
+        start = time.perf_counter()
+        if hasattr(game.player_data, 'get_leaderboard'):
+            game.player_data.get_leaderboard(wait=True)
+        self.load_ms = (time.perf_counter() - start) * 1000
+
+    def drive(self, game, frame):
+        player_data = game.player_data
+        player_data.get_top_players(5)
+        for level in player_store.LEVELS:
+            player_data.get_level_top(level, 5)
+            player_data.get_rank(level)
+
+SCENARIOS = [
+    MenuScenario('home', "home page, no players", 'home'),
+    MenuScenario('level_select', "level selection screen", 'level_select'),
+    LevelScenario('level1', "level 1 on autopilot", 1),
+    LevelScenario('level2', "level 2 on autopilot", 2),
+    LevelScenario('level3', "level 3 on autopilot", 3),
+    LevelScenario('level4', "level 4 on autopilot (Flappy Bird mode)", 4),
+    ShooterScenario('shooter', "level 4 Zombie Bird Shooter wave"),
+    CrashScenario('crash', "repeated crashes with heavy explosion particles"),
+    LeaderboardScenario('leaderboard', "home page and leaderboard queries over a large player table"),
+]
+
+def run_scenario(scenario, frames=FRAMES, warmup=WARMUP_FRAMES, trace_allocations=False, count_draw_calls=False):
+    """Run one scenario in a scratch directory; returns its results"""
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="flappy-bench-") as workdir, contextlib.redirect_stdout(sys.stderr):
+        os.chdir(workdir)
+        try:
+            if hasattr(scenario, 'prepare'):
+                scenario.prepare(workdir)
+            game = flappy_bird.Game(seed=SEED)
+            try:
+                game.sounds.wait()
+                scenario.setup(game)
+                for frame in range(warmup):
+                    scenario.drive(game, frame)
+                    game.update()
+                    game.draw()
+                result = measure(game, scenario, frames, warmup, trace_allocations)
+                if count_draw_calls:
+                    result['draw_calls'] = count_calls(game, scenario, frames, warmup + frames)
+                return result
+            finally:
+                game.close()
+        finally:
+            os.chdir(cwd)
+
+def measure(game, scenario, frames, first_frame, trace_allocations):
+    profiler = profiling.FrameProfiler(capacity=frames)
+    game.profiler = game.frame_overlay.profiler = profiler
+    gc.collect()
+    collections_before = [stats['collections'] for stats in gc.get_stats()]
+    blocks_before = sys.getallocatedblocks()
+    if trace_allocations:
+        tracemalloc.start()
+
+    start = time.perf_counter()
+    for frame in range(first_frame, first_frame + frames):
+        profiler.begin_frame()
+        scenario.drive(game, frame)
+        profiler.lap('events')
+        game.update()
+        profiler.lap('update')
+        game.draw()
+        profiler.end_frame()
+    elapsed = time.perf_counter() - start
+
+    result = {
+        'description': scenario.description,
+        'frames': frames,
+        'seconds': elapsed,
+        'fps': frames / elapsed,
+        'frame_ms': profiler.summary()['frame'],
+        'phases_ms': {name: stats['mean'] for name, stats in profiler.summary().items()
+                      if name != 'frame' and stats['mean'] > 0},
+        'gc_collections': sum(stats['collections'] for stats in gc.get_stats()) - sum(collections_before),
+        'allocated_blocks': sys.getallocatedblocks() - blocks_before,
+    }
+    if trace_allocations:
+        result['traced_peak_kb'] = tracemalloc.get_traced_memory()[1] / 1024
+        tracemalloc.stop()
+    if hasattr(scenario, 'load_ms'):
+        result['leaderboard_load_ms'] = scenario.load_ms
+    return result
+
+def count_calls(game, scenario, frames, first_frame):
+    """Mean rendering calls per frame, by kind and by calling method"""
+    counter = profiling.DrawCallCounter()
+    counter.start()
+    try:
+        for frame in range(first_frame, first_frame + frames):
+            counter.begin_frame()
+            scenario.drive(game, frame)
+            game.update()
+            game.draw()
+            counter.end_frame()
+    finally:
+        counter.stop()
+    summary = counter.summary()
+    return {'per_frame': summary['per_frame'], 'callers': summary['callers']}
+
+def compare(results, baseline, tolerance=TOLERANCE):
+    """Scenarios slower than the baseline by more than tolerance, as messages"""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get('scenarios', {}).get(name)
+        if base is None:
+            continue
+        if result['fps'] < base['fps'] * (1 - tolerance):
+            regressions.append(f"{name}: {result['fps']:.0f} fps, baseline {base['fps']:.0f} fps")
+        if result['frame_ms']['p95'] > base['frame_ms']['p95'] * (1 + tolerance):
+            regressions.append(f"{name}: p95 frame {result['frame_ms']['p95']:.2f} ms, "
+                               f"baseline {base['frame_ms']['p95']:.2f} ms")
+    return regressions
+
+def benchmark_command(names=None, frames=FRAMES, output=None, baseline=None, save_baseline=None,
+                      tolerance=TOLERANCE, trace_allocations=False, leaderboard_players=LEADERBOARD_PLAYERS,
+                      count_draw_calls=False):
+    """Run the scenarios, write the JSON report and check the baseline; returns the exit status"""
+    scenarios = [scenario for scenario in SCENARIOS if not names or scenario.name in names]
+    unknown = set(names or ()) - {scenario.name for scenario in SCENARIOS}
+    if unknown:
+        print(f"Unknown scenarios: {', '.join(sorted(unknown))}", file=sys.stderr)
+        return 2
+
+    results = {}
+    for scenario in scenarios:
+        if isinstance(scenario, LeaderboardScenario):
+            scenario.players = leaderboard_players
+        result = run_scenario(scenario, frames, trace_allocations=trace_allocations, count_draw_calls=count_draw_calls)
+        results[scenario.name] = result
+        print(f"{scenario.name:<14}{result['fps']:>9.0f} fps   frame p50 {result['frame_ms']['p50']:.2f} ms  "
+              f"p95 {result['frame_ms']['p95']:.2f} ms   {result['gc_collections']} gc runs", file=sys.stderr)
+
+    report = {
+        'python': platform.python_version(),
+        'pygame': pygame.version.ver,
+        'machine': platform.platform(),
+        'frames': frames,
+        'scenarios': results,
+    }
+    if baseline:
+        with open(baseline) as f:
+            regressions = compare(results, json.load(f), tolerance)
+        report['baseline'] = baseline
+        report['tolerance'] = tolerance
+        report['regressions'] = regressions
+        for message in regressions:
+            print(f"REGRESSION {message}", file=sys.stderr)
+
+    text = json.dumps(report, indent=2)
+    if output:
+        with open(output, 'w') as f:
+            f.write(text)
+    else:
+        print(text)
+    if save_baseline:
+        with open(save_baseline, 'w') as f:
+            f.write(text)
+    return 1 if report.get('regressions') else 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Flappy Bird headless benchmarks")
+    parser.add_argument("--scenario", action="append", dest="scenarios", metavar="NAME",
+                        help=f"run only this scenario (repeatable): {', '.join(s.name for s in SCENARIOS)}")
+    parser.add_argument("--frames", type=int, default=FRAMES, help=f"frames measured per scenario (default {FRAMES})")
+    parser.add_argument("--output", metavar="FILE", help="write the JSON report here instead of stdout")
+    parser.add_argument("--baseline", metavar="FILE", help="compare against a saved report; exit 1 on regressions")
+    parser.add_argument("--save-baseline", metavar="FILE", help="also save this report as a baseline")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE,
+                        help=f"allowed slowdown against the baseline (default {TOLERANCE * 100:.0f}%%)")
+    parser.add_argument("--tracemalloc", action="store_true",
+                        help="also report peak traced memory (slows the run down)")
+    parser.add_argument("--draw-calls", action="store_true",
+                        help="also count draw calls, blits, text renders and new surfaces per frame")
+    parser.add_argument("--leaderboard-players", type=int, default=LEADERBOARD_PLAYERS,
+                        help=f"players in the leaderboard scenario (default {LEADERBOARD_PLAYERS})")
+    args = parser.parse_args()
+
+    sys.exit(benchmark_command(args.scenarios, args.frames, args.output, args.baseline, args.save_baseline,
+                               args.tolerance, args.tracemalloc, args.leaderboard_players, args.draw_calls))
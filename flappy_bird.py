@@ -1,20 +1,32 @@
+import time
+START_TIME = time.perf_counter()  # Start-up phases are timed from here
+
 import pygame
 import random
 import sys
 import os
 import math
-import json
+import argparse
+import hashlib
+import mmap
+import shutil
+import sqlite3
+import struct
+import threading
 import numpy as np
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime
 
-# Initialize Pygame
-pygame.init()
-pygame.mixer.init(frequency=22050, size=-16, channels=2, buffer=512)
+import player_store
+import profiling
+import simulation
+import synth
+from replay import Replay, EXTENSION as REPLAY_EXTENSION
+from simulation import SCREEN_WIDTH, SCREEN_HEIGHT, FPS, PIPE_WIDTH, LEVEL_CONFIG
 
-# Game constants
-SCREEN_WIDTH = 500  # Increased from 400
-SCREEN_HEIGHT = 700  # Increased from 600
-FPS = 60
+# Pygame's display and fonts are started by Game; the mixer starts on a worker thread (see SoundBank)
 
 # Colors
 WHITE = (255, 255, 255)
@@ -24,42 +36,6 @@ BLUE = (135, 206, 235)  # Sky blue
 YELLOW = (255, 255, 0)
 RED = (255, 0, 0)
 
-# Game physics - Level-based system
-GRAVITY = 0.3  # Consistent across all levels
-PIPE_WIDTH = 60
-
-# Level configurations
-LEVEL_CONFIG = {
-    1: {  # Easy Level (current settings)
-        'jump_strength': -6.5,
-        'pipe_speed': 2,
-        'pipe_gap': 200,
-        'name': 'EASY',
-        'color': (0, 255, 0)  # Green
-    },
-    2: {  # Medium Level
-        'jump_strength': -6.5,
-        'pipe_speed': 2.5,
-        'pipe_gap': 160,
-        'name': 'MEDIUM',
-        'color': (255, 255, 0)  # Yellow
-    },
-    3: {  # Hard Level
-        'jump_strength': -8,
-        'pipe_speed': 2.5,
-        'pipe_gap': 160,
-        'name': 'HARD',
-        'color': (255, 0, 0)  # Red
-    },
-    4: {  # Fantastic Level (Zombie Bird Shooter Mode)
-        'jump_strength': -6.5,
-        'pipe_speed': 2.5,
-        'pipe_gap': 160,
-        'name': 'FANTASTIC',
-        'color': (138, 43, 226)  # Purple
-    }
-}
-
 # Enhanced colors and gradients
 GRADIENT_BLUE = [(135, 206, 235), (173, 216, 230), (176, 224, 230)]
 GRADIENT_GREEN = [(34, 139, 34), (50, 205, 50), (144, 238, 144)]
@@ -87,82 +63,107 @@ CLOUD_COLOR = (255, 255, 255, 100)
 GROUND_COLORS = [(139, 69, 19), (160, 82, 45), (210, 180, 140)]
 
 class PlayerData:
+    """Player records kept in player_data.json (see player_store for the SQLite store)"""
     def __init__(self):
-        self.save_file = "player_data.json"
+        self.save_file = player_store.JSON_FILE
         self.current_player = ""
         self.players = self.load_data()
+        self.saved = {name: player_store.copy_record(record) for name, record in self.players.items()}  # Writer thread's copy
+        self.writer = player_store.WriteBehind(self.save_data)
+        self.leaderboard = player_store.LeaderboardIndex()
+        self.leaderboard.extend(self.players.items())
     
     def load_data(self):
         """Load player data from file"""
         try:
             if os.path.exists(self.save_file):
-                with open(self.save_file, 'r') as f:
-                    data = json.load(f)
-                    # Ensure all players have level 4 data (backwards compatibility)
-                    for player_name, player_data in data.items():
-                        if 4 not in player_data.get('high_scores', {}):
-                            player_data['high_scores'][4] = 0
-                        if 4 not in player_data.get('games_played', {}):
-                            player_data['games_played'][4] = 0
-                    return data
+                # Level keys come back from JSON as strings; make them ints again
+                data = player_store.read_legacy_json(self.save_file)
+                # Ensure all players have level 4 data (backwards compatibility)
+                for player_name, player_data in data.items():
+                    player_data['high_scores'].setdefault(4, 0)
+                    player_data['games_played'].setdefault(4, 0)
+                return data
             return {}
         except:
             return {}
     
-    def save_data(self):
-        """Save player data to file"""
-        try:
-            with open(self.save_file, 'w') as f:
-                json.dump(self.players, f, indent=2)
-        except:
-            pass
+    def save_data(self, records):
+        """Save changed records to file (runs on the writer thread)"""
+        self.saved.update(records)
+        player_store.write_json_atomic(self.save_file, self.saved)
+    
+    def save_player(self, name):
+        """Queue a player's record to be saved in the background"""
+        self.writer.submit(name, player_store.copy_record(self.players[name]))
+        self.leaderboard.update(name, self.players[name])
     
     def set_current_player(self, name):
         """Set the current player and initialize if new"""
         self.current_player = name.strip().title()
         if self.current_player not in self.players:
-            self.players[self.current_player] = {
-                'high_scores': {1: 0, 2: 0, 3: 0, 4: 0},
-                'games_played': {1: 0, 2: 0, 3: 0, 4: 0},
-                'total_score': 0,
-                'last_played': datetime.now().strftime("%Y-%m-%d %H:%M")
-            }
-        self.save_data()
+            self.players[self.current_player] = player_store.new_record()
+            self.save_player(self.current_player)
     
     def update_score(self, level, score):
         """Update player's high score for a level"""
         if self.current_player in self.players:
-            player = self.players[self.current_player]
-            if score > player['high_scores'][level]:
-                player['high_scores'][level] = score
-            player['games_played'][level] += 1
-            player['total_score'] += score
-            player['last_played'] = datetime.now().strftime("%Y-%m-%d %H:%M")
-            self.save_data()
-            return score > player['high_scores'].get(level, 0)
+            new_high = player_store.record_game(self.players[self.current_player], level, score)
+            self.save_player(self.current_player)
+            return new_high
         return False
     
+    def credit_replay(self, key):
+        """Enter a verified replay's game in the ledger; False if it was already credited"""
+        try:
+            with open(player_store.LEDGER_FILE, 'r') as f:
+                if any(line.split(' ', 1)[0] == key for line in f):
+                    return False
+        except FileNotFoundError:
+            pass
+        with open(player_store.LEDGER_FILE, 'a') as f:
+            f.write(f"{key} {self.current_player}\n")
+            f.flush()
+            os.fsync(f.fileno())
+        return True
+    
     def get_player_stats(self):
         """Get current player's statistics"""
-        if self.current_player in self.players:
-            # Ensure player has level 4 data (for backwards compatibility)
-            player = self.players[self.current_player]
-            if 4 not in player['high_scores']:
-                player['high_scores'][4] = 0
-            if 4 not in player['games_played']:
-                player['games_played'][4] = 0
-                self.save_data()
-            return player
-        return None
+        return self.players.get(self.current_player)
     
     def get_top_players(self, limit=5):
         """Get top players by total score"""
-        sorted_players = sorted(
-            self.players.items(),
-            key=lambda x: x[1]['total_score'],
-            reverse=True
-        )
-        return sorted_players[:limit]
+        return [(name, self.players[name]) for name, total_score in self.leaderboard.total.top(limit)]
+    
+    def get_level_top(self, level, limit=5):
+        """Get the best (name, high score) pairs for a level"""
+        return self.leaderboard.board(level).top(limit)
+    
+    def get_rank(self, level=None):
+        """Current player's (rank, players ranked, percentile) by total or a level's high score"""
+        board = self.leaderboard.board(level)
+        if self.current_player not in board:
+            return None
+        return board.rank(self.current_player), len(board), board.percentile(self.current_player)
+    
+    def has_players(self):
+        return bool(self.players)
+    
+    def persistence_stats(self):
+        return self.writer.stats()
+    
+    def close(self):
+        """Write anything still queued"""
+        self.writer.close()
+
+def open_player_data(backend="sqlite"):
+    """Open the player records: "sqlite" (player_data.db) or the legacy "json" file"""
+    if backend == "sqlite":
+        try:
+            return player_store.SqlitePlayerStore()
+        except sqlite3.Error as e:
+            print(f"Player database unavailable ({e}); using {player_store.JSON_FILE}")
+    return PlayerData()
 
 class TextInput:
     def __init__(self, x, y, width, height, font, max_length=15):
@@ -206,245 +207,751 @@ class TextInput:
             pygame.draw.line(screen, (0, 0, 0), 
                            (cursor_x, cursor_y), 
                            (cursor_x, cursor_y + text_surface.get_height()), 2)
+        return self.rect
+
+class StartupProfiler:
+    """Times the named phases of start-up, up to the first frame on screen
+    
+    Phases can run on worker threads too; each is recorded with the thread
+    it ran on and its offset from START_TIME.
+    """
+    BUDGET_MS = 2000  # Time to first frame allowed for the frozen executable
+    
+    def __init__(self, start=START_TIME):
+        self.start = start
+        self.phases = []  # (name, thread, start ms, duration ms)
+        self.first_frame_ms = None
+        self.lock = threading.Lock()
+    
+    def record(self, name, begin, end):
+        with self.lock:
+            self.phases.append((name, threading.current_thread().name,
+                                (begin - self.start) * 1000, (end - begin) * 1000))
+    
+    @contextmanager
+    def phase(self, name):
+        """Time the body of a with block as one phase"""
+        begin = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, begin, time.perf_counter())
+    
+    def mark_first_frame(self):
+        if self.first_frame_ms is None:
+            self.first_frame_ms = (time.perf_counter() - self.start) * 1000
+    
+    def report(self):
+        """Phase table, in the order phases started"""
+        lines = [f"{'phase':<16}{'thread':<14}{'start ms':>10}{'took ms':>10}"]
+        with self.lock:
+            phases = sorted(self.phases, key=lambda phase: phase[2])
+        for name, thread, start, duration in phases:
+            lines.append(f"{name:<16}{thread:<14}{start:>10.1f}{duration:>10.1f}")
+        if self.first_frame_ms is not None:
+            lines.append(f"first frame after {self.first_frame_ms:.1f} ms (budget {self.BUDGET_MS} ms)")
+        return "\n".join(lines)
+
+startup = StartupProfiler()
+startup.record("imports", START_TIME, time.perf_counter())
+
+class BakeCache:
+    """Content-addressed store of baked asset arrays in one memory-mapped file
+    
+    Each entry is keyed by a hash of the parameters that generated it, so
+    changing a gradient, patch or size simply misses and bakes a new
+    entry. Bump VERSION when the drawing code itself changes. Entries
+    found on disk are read straight from the mapping; new ones are
+    appended to the file for the next run.
+    """
+    MAGIC = b'FBBAKE01'
+    VERSION = 1
+    MAX_BYTES = 64 * 1024 * 1024  # Start over rather than grow without bound
+    ENTRY = struct.Struct('<16sIQ')  # key, array count, payload bytes
+    ARRAY = struct.Struct('<4sI')  # dtype, ndim
+    ALIGN = 16
+    
+    def __init__(self, path="bake_cache.bin"):
+        self.path = path
+        self.index = None  # key -> [array, ...], filled on first use
+        self.mapping = None
+        self.end = 0  # End of the last complete entry in the file
+        self.damaged_tail = False
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.RLock()  # Sounds are baked on a worker thread
+    
+    def key(self, params):
+        return hashlib.sha256(repr((self.VERSION, params)).encode()).digest()[:16]
+    
+    def open(self):
+        """Map the cache file and index its entries"""
+        self.index = {}
+        self.seed_from_bundle()
+        try:
+            if os.path.getsize(self.path) > self.MAX_BYTES:
+                os.remove(self.path)
+            with open(self.path, 'rb') as f:
+                self.mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return  # No cache yet (or an empty file)
+        if self.mapping[:len(self.MAGIC)] != self.MAGIC:
+            return
+        self.end = pos = self.align(len(self.MAGIC))
+        try:
+            while pos + self.ENTRY.size <= len(self.mapping):
+                key, count, length = self.ENTRY.unpack_from(self.mapping, pos)
+                payload = pos + self.ENTRY.size
+                if payload + length > len(self.mapping):
+                    break  # Cut short by an interrupted write
+                self.index[key] = self.read_arrays(payload, count)
+                self.end = pos = payload + length
+        except (struct.error, ValueError, TypeError):
+            pass  # Stop at the first damaged entry
+        # Anything after the last good entry is dropped by the next store
+        self.damaged_tail = self.end < len(self.mapping)
+    
+    def seed_from_bundle(self):
+        """Start from the cache pre-baked into a PyInstaller bundle, if any"""
+        bundle = getattr(sys, '_MEIPASS', None)
+        if bundle and not os.path.exists(self.path):
+            bundled = os.path.join(bundle, os.path.basename(self.path))
+            if os.path.exists(bundled):
+                try:
+                    shutil.copyfile(bundled, self.path)
+                except OSError:
+                    pass
+    
+    def read_arrays(self, pos, count):
+        arrays = []
+        for _ in range(count):
+            dtype, ndim = self.ARRAY.unpack_from(self.mapping, pos)
+            pos += self.ARRAY.size
+            shape = struct.unpack_from(f'<{ndim}I', self.mapping, pos)
+            pos = self.align(pos + 4 * ndim)
+            array = np.frombuffer(self.mapping, dtype=np.dtype(dtype.decode().strip()),
+                                  count=int(np.prod(shape)), offset=pos).reshape(shape)
+            arrays.append(array)
+            pos = self.align(pos + array.nbytes)
+        return arrays
+    
+    def align(self, pos):
+        return -(-pos // self.ALIGN) * self.ALIGN
+    
+    def load(self, params):
+        """Get the arrays baked for params, or None"""
+        with self.lock:
+            if self.index is None:
+                self.open()
+            arrays = self.index.get(self.key(params))
+            if arrays is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return arrays
+    
+    def store(self, params, arrays):
+        """Add arrays for params, in memory now and on disk for later runs"""
+        with self.lock:
+            if self.index is None:
+                self.open()
+            arrays = [np.ascontiguousarray(array) for array in arrays]
+            key = self.key(params)
+            self.index[key] = arrays
+            
+            # Payload offsets are relative to the entry, which starts at an aligned position
+            payload = bytearray()
+            for array in arrays:
+                payload += self.ARRAY.pack(array.dtype.str.encode().ljust(4), array.ndim)
+                payload += struct.pack(f'<{array.ndim}I', *array.shape)
+                payload += bytes(self.align(self.ENTRY.size + len(payload)) - self.ENTRY.size - len(payload))
+                payload += array.tobytes()
+                payload += bytes(self.align(self.ENTRY.size + len(payload)) - self.ENTRY.size - len(payload))
+            try:
+                with open(self.path, 'r+b' if self.end else 'wb') as f:
+                    if not self.end:
+                        f.write(self.MAGIC)
+                        self.end = self.align(len(self.MAGIC))
+                        f.write(bytes(self.end - len(self.MAGIC)))
+                    f.seek(self.end)
+                    if self.damaged_tail:
+                        f.truncate()
+                        self.damaged_tail = False
+                    f.write(self.ENTRY.pack(key, len(arrays), len(payload)))
+                    f.write(payload)
+                    self.end = f.tell()
+            except OSError:
+                pass  # Read-only install: the cache still works for this run
+    
+    def bake(self, params, make):
+        """Get the arrays for params, calling make() to generate them on a miss"""
+        arrays = self.load(params)
+        if arrays is None:
+            arrays = make()
+            self.store(params, arrays)
+        return arrays
+    
+    def bake_surfaces(self, params, make, alpha=False):
+        """Get surfaces for params, calling make() to draw them on a miss"""
+        pixels = self.bake(params, lambda: [self.surface_pixels(surface, alpha) for surface in make()])
+        return [self.pixels_surface(array, alpha) for array in pixels]
+    
+    @staticmethod
+    def surface_pixels(surface, alpha=False):
+        """Copy a surface's pixels into an (height, width, channels) array"""
+        mode = 'RGBA' if alpha else 'RGB'
+        width, height = surface.get_size()
+        return np.frombuffer(pygame.image.tobytes(surface, mode), dtype=np.uint8).reshape(height, width, len(mode))
+    
+    @staticmethod
+    def pixels_surface(pixels, alpha=False):
+        """Build a display-format surface from an array made by surface_pixels"""
+        height, width = pixels.shape[:2]
+        surface = pygame.image.frombuffer(pixels, (width, height), 'RGBA' if alpha else 'RGB')
+        return surface.convert_alpha() if alpha else surface.convert()
+
+bake_cache = BakeCache()
 
 class SoundGenerator:
+    """Turns synth patches into pygame sounds"""
+    # Rising chirp
+    JUMP = synth.Patch(0.15, (synth.Sweep(300, 500, 0.2),), synth.Decay(1.0))
+    # Two-tone success chime, C5 + E5
+    SCORE = synth.Patch(0.3, (synth.Sine(523, 0.15), synth.Sine(659, 0.15)), synth.Decay(0.5))
+    # Dramatic descending tone with a long fade
+    GAME_OVER = synth.Patch(0.8, (synth.Sweep(400, 150, 0.25),), synth.Decay(0.3))
+    # Quick laser zap with a little noise for texture
+    SHOOTER_GUN = synth.Patch(0.12, (synth.Sweep(1200, 400, 0.2), synth.Noise(0.05)), synth.Decay(0.2))
+    
+    @staticmethod
+    def make_sound(patch, sample_rate=synth.SAMPLE_RATE, seed=0):
+        """Render a patch (or load it from the bake cache) and wrap it as a pygame Sound"""
+        samples, = bake_cache.bake(('sound', patch, sample_rate, seed),
+                                   lambda: [synth.to_pcm(synth.render(patch, sample_rate, seed))])
+        return pygame.sndarray.make_sound(samples)
+    
     @staticmethod
     def generate_tone(frequency, duration, sample_rate=22050, amplitude=0.5):
         """Generate a simple tone"""
-        frames = int(duration * sample_rate)
-        arr = np.zeros((frames, 2), dtype=np.int16)
-        for i in range(frames):
-            wave = amplitude * math.sin(2 * math.pi * frequency * i / sample_rate)
-            arr[i] = [int(wave * 32767), int(wave * 32767)]
-        return pygame.sndarray.make_sound(arr)
+        return SoundGenerator.make_sound(synth.Patch(duration, (synth.Sine(frequency, amplitude),), None), sample_rate)
     
     @staticmethod
     def generate_jump_sound():
         """Generate a more pleasant jump sound effect"""
-        # Create a chirp-like sound
-        frames = int(0.15 * 22050)
-        arr = np.zeros((frames, 2), dtype=np.int16)
-        for i in range(frames):
-            # Rising frequency for more pleasant sound
-            freq = 300 + (i / frames) * 200
-            wave = 0.2 * math.sin(2 * math.pi * freq * i / 22050)
-            # Add envelope for smoother sound
-            envelope = max(0, 1 - (i / frames))
-            arr[i] = [int(wave * envelope * 32767), int(wave * envelope * 32767)]
-        return pygame.sndarray.make_sound(arr)
+        return SoundGenerator.make_sound(SoundGenerator.JUMP)
     
     @staticmethod
     def generate_score_sound():
         """Generate a pleasant score sound effect"""
-        # Create a success chime
-        frames = int(0.3 * 22050)
-        arr = np.zeros((frames, 2), dtype=np.int16)
-        for i in range(frames):
-            # Two-tone chime
-            freq1 = 523  # C5
-            freq2 = 659  # E5
-            wave1 = 0.15 * math.sin(2 * math.pi * freq1 * i / 22050)
-            wave2 = 0.15 * math.sin(2 * math.pi * freq2 * i / 22050)
-            envelope = max(0, 1 - (i / frames) ** 0.5)
-            combined_wave = (wave1 + wave2) * envelope
-            arr[i] = [int(combined_wave * 32767), int(combined_wave * 32767)]
-        return pygame.sndarray.make_sound(arr)
+        return SoundGenerator.make_sound(SoundGenerator.SCORE)
     
     @staticmethod
     def generate_game_over_sound():
         """Generate a dramatic game over sound effect"""
-        # Create a descending tone
-        frames = int(0.8 * 22050)
-        arr = np.zeros((frames, 2), dtype=np.int16)
-        for i in range(frames):
-            # Descending frequency
-            freq = 400 - (i / frames) * 250
-            wave = 0.25 * math.sin(2 * math.pi * freq * i / 22050)
-            # Fade out envelope
-            envelope = max(0, 1 - (i / frames) ** 0.3)
-            arr[i] = [int(wave * envelope * 32767), int(wave * envelope * 32767)]
-        return pygame.sndarray.make_sound(arr)
+        return SoundGenerator.make_sound(SoundGenerator.GAME_OVER)
     
     @staticmethod
-    def generate_shooter_gun_sound():
+    def generate_shooter_gun_sound(seed=0):
         """Generate a friendly laser/gun sound effect for the shooter"""
-        # Create a quick laser-like sound
-        frames = int(0.12 * 22050)
-        arr = np.zeros((frames, 2), dtype=np.int16)
-        for i in range(frames):
-            # Quick descending frequency for laser effect
-            freq = 1200 - (i / frames) * 800
-            wave = 0.2 * math.sin(2 * math.pi * freq * i / 22050)
-            # Add slight noise for texture
-            noise = (random.random() - 0.5) * 0.05
-            # Sharp attack and quick decay
-            envelope = max(0, 1 - (i / frames) ** 0.2)
-            combined = (wave + noise) * envelope
-            arr[i] = [int(combined * 32767), int(combined * 32767)]
-        return pygame.sndarray.make_sound(arr)
+        return SoundGenerator.make_sound(SoundGenerator.SHOOTER_GUN, seed=seed)
 
-class Cloud:
-    def __init__(self):
-        self.x = SCREEN_WIDTH + random.randint(0, 200)
-        self.y = random.randint(50, 200)
-        self.speed = random.uniform(0.3, 0.8)
-        self.size = random.randint(20, 40)
-        self.alpha = random.randint(80, 150)
+def init_mixer():
+    """Open the audio device at the rate the sound effects are synthesised at"""
+    pygame.mixer.init(frequency=synth.SAMPLE_RATE, size=-16, channels=2, buffer=512)
+
+class SoundBank:
+    """The game's sound effects, generated on a worker thread
+    
+    The audio device is opened on the main thread, since SDL subsystems
+    shouldn't be initialised from two threads at once; baking the sounds
+    isn't needed for the home page, so that runs alongside the first frames
+    instead of before them. Sounds played before they are ready are skipped.
+    """
+    # Loaded in this order; only the Fantastic level's shooter mode uses the gun
+    SOUNDS = (('jump', SoundGenerator.generate_jump_sound),
+              ('score', SoundGenerator.generate_score_sound),
+              ('game_over', SoundGenerator.generate_game_over_sound),
+              ('shooter_gun', SoundGenerator.generate_shooter_gun_sound))
+    
+    def __init__(self, executor):
+        self.sounds = None
+        self.enabled = True
+        self.future = None
+        with startup.phase("audio device"):
+            try:
+                init_mixer()
+            except pygame.error as e:
+                self.disable(e)
+                return
+        self.future = executor.submit(self.load)
+    
+    def disable(self, error):
+        self.enabled = False
+        print(f"Sound initialization failed: {error}")
+        print("Running without sound.")
+    
+    def load(self):
+        sounds = {}
+        with startup.phase("sounds"):
+            for name, generate in self.SOUNDS:
+                sounds[name] = generate()
+        return sounds
+    
+    def wait(self):
+        """Block until the sounds are loaded (or failed to load)"""
+        if self.sounds is None and self.enabled:
+            try:
+                self.sounds = self.future.result()
+                print("✓ Sound system initialized successfully!")
+            except Exception as e:
+                self.disable(e)
+    
+    def play(self, name):
+        """Play a sound if loading has finished; never waits for it"""
+        if self.sounds is None and self.enabled and self.future.done():
+            self.wait()
+        if self.sounds is not None:
+            self.sounds[name].play()
+
+class Interpolated:
+    """Mixin for entities drawn between fixed simulation steps"""
+    interpolated = ('x', 'y')  # Attributes blended between steps
+    previous = None
+    
+    def save_position(self):
+        """Remember the position before a step"""
+        self.previous = tuple(getattr(self, name) for name in self.interpolated)
+    
+    def reset(self, *args):
+        """Forget the old position when a pooled entity is reused"""
+        self.previous = None
+        super().reset(*args)
+    
+    def position(self, alpha=1.0):
+        """Position blended from the previous step (alpha 0) to the current one (alpha 1)"""
+        current = tuple(getattr(self, name) for name in self.interpolated)
+        if self.previous is None or alpha >= 1:
+            return current
+        return tuple(old + (new - old) * alpha for old, new in zip(self.previous, current))
+
+class FixedTimestep:
+    """Accumulator that runs updates at a fixed rate, independent of the render rate"""
+    def __init__(self, step_rate=FPS, max_steps=5):
+        self.step_time = 1.0 / step_rate
+        self.max_steps = max_steps  # Catch-up cap per rendered frame
+        self.accumulator = 0.0
+        self.dropped_steps = 0
+    
+    def advance(self, elapsed):
+        """Add elapsed seconds of real time; returns how many steps to run now"""
+        self.accumulator += elapsed
+        steps = int(self.accumulator / self.step_time)
+        if steps > self.max_steps:
+            # Too far behind (e.g. a stalled window): skip ahead instead of spiralling
+            self.dropped_steps += steps - self.max_steps
+            steps = self.max_steps
+        self.accumulator -= int(self.accumulator / self.step_time) * self.step_time
+        return steps
+    
+    @property
+    def alpha(self):
+        """How far the render time is between the last step and the next one"""
+        return self.accumulator / self.step_time
+
+class Cloud(Interpolated):
+    ALPHA_BUCKET = 10  # Alpha values are grouped so clouds can share sprites
+    sprites = {}  # Shared sprite pool keyed by (size, alpha bucket)
+    
+    def __init__(self, rng=random):
+        self.rng = rng
+        self.reset()
+    
+    def reset(self):
+        """Re-roll position and look so a retired cloud can be reused"""
+        self.x = float(SCREEN_WIDTH + self.rng.randint(0, 200))
+        self.y = self.rng.randint(50, 200)
+        self.speed = self.rng.uniform(0.3, 0.8)
+        self.size = self.rng.randint(20, 40)
+        self.alpha = self.rng.randint(80, 150)
+        self.sprite = self.get_sprite(self.size, self.alpha)
+        self.previous = None
         
     def update(self):
+        self.save_position()
         self.x -= self.speed
-        
-    def draw(self, screen):
-        # Create cloud surface with transparency
-        cloud_surface = pygame.Surface((self.size * 3, self.size))
-        cloud_surface.set_alpha(self.alpha)
-        cloud_surface.fill(WHITE)
-        
-        # Draw cloud circles
-        pygame.draw.circle(cloud_surface, WHITE, (self.size // 2, self.size // 2), self.size // 2)
-        pygame.draw.circle(cloud_surface, WHITE, (self.size, self.size // 3), self.size // 3)
-        pygame.draw.circle(cloud_surface, WHITE, (self.size * 2, self.size // 2), self.size // 2)
-        pygame.draw.circle(cloud_surface, WHITE, (self.size * 2.5, self.size // 3), self.size // 4)
-        
-        screen.blit(cloud_surface, (self.x, self.y))
+    
+    @classmethod
+    def get_sprite(cls, size, alpha):
+        """Get the shared pre-rendered cloud for a size and alpha bucket"""
+        bucket = alpha // cls.ALPHA_BUCKET * cls.ALPHA_BUCKET + cls.ALPHA_BUCKET // 2
+        key = (size, bucket)
+        sprite = cls.sprites.get(key)
+        if sprite is None:
+            # Create cloud surface with transparency
+            sprite = pygame.Surface((size * 3, size))
+            sprite.set_alpha(bucket)
+            sprite.fill(WHITE)
+            
+            # Draw cloud circles
+            pygame.draw.circle(sprite, WHITE, (size // 2, size // 2), size // 2)
+            pygame.draw.circle(sprite, WHITE, (size, size // 3), size // 3)
+            pygame.draw.circle(sprite, WHITE, (size * 2, size // 2), size // 2)
+            pygame.draw.circle(sprite, WHITE, (size * 2.5, size // 3), size // 4)
+            cls.sprites[key] = sprite
+        return sprite
+        
+    def draw(self, screen, alpha=1.0):
+        # Positions scroll in floats; round once at blit time
+        x, y = self.position(alpha)
+        return screen.blit(self.sprite, (int(x + 0.5), y))
         
     def is_off_screen(self):
         return self.x + self.size * 3 < 0
 
-class Particle:
-    def __init__(self, x, y, color, velocity_x=0, velocity_y=0):
-        self.x = x
-        self.y = y
-        self.color = color
-        self.velocity_x = velocity_x + random.uniform(-2, 2)
-        self.velocity_y = velocity_y + random.uniform(-3, -1)
-        self.life = 30
-        self.max_life = 30
-        
+class ParticleSystem:
+    """Particles stored in preallocated NumPy arrays and drawn in one batch"""
+    MAX_LIFE = 30
+    SIZE = 4
+    
+    def __init__(self, capacity=1024, seed=None):
+        self.count = 0
+        self.x = np.zeros(capacity, dtype=np.float32)
+        self.y = np.zeros(capacity, dtype=np.float32)
+        self.velocity_x = np.zeros(capacity, dtype=np.float32)
+        self.velocity_y = np.zeros(capacity, dtype=np.float32)
+        self.life = np.zeros(capacity, dtype=np.int16)
+        self.color = np.zeros(capacity, dtype=np.uint8)  # Index into self.colors
+        self.colors = []
+        self.alpha_ramps = []  # alpha_ramps[color][life] -> translucent square
+        self.rng = np.random.default_rng(seed)
+    
+    def __len__(self):
+        return self.count
+    
+    def grow(self, needed):
+        """Enlarge the arrays (doubling) to hold at least needed particles"""
+        capacity = len(self.x)
+        while capacity < needed:
+            capacity *= 2
+        for name in ('x', 'y', 'velocity_x', 'velocity_y', 'life', 'color'):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:self.count] = old[:self.count]
+            setattr(self, name, new)
+    
+    def color_index(self, color):
+        """Register a color and build its alpha ramp on first use"""
+        color = tuple(color)
+        if color not in self.colors:
+            ramp = [None]
+            for life in range(1, self.MAX_LIFE + 1):
+                square = pygame.Surface((self.SIZE, self.SIZE))
+                square.set_alpha(int(255 * (life / self.MAX_LIFE)))
+                square.fill(color)
+                ramp.append(square)
+            self.colors.append(color)
+            self.alpha_ramps.append(ramp)
+        return self.colors.index(color)
+    
+    def emit(self, x, y, color, amount, velocity_x=0, velocity_y=0):
+        """Spawn amount particles at (x, y) with a random spread"""
+        start, end = self.count, self.count + amount
+        if end > len(self.x):
+            self.grow(end)
+        self.x[start:end] = x
+        self.y[start:end] = y
+        self.velocity_x[start:end] = velocity_x + self.rng.uniform(-2, 2, amount)
+        self.velocity_y[start:end] = velocity_y + self.rng.uniform(-3, -1, amount)
+        self.life[start:end] = self.MAX_LIFE
+        self.color[start:end] = self.color_index(color)
+        self.count = end
+    
     def update(self):
-        self.x += self.velocity_x
-        self.y += self.velocity_y
-        self.velocity_y += 0.1  # Gravity on particles
-        self.life -= 1
-        
+        n = self.count
+        if n == 0:
+            return
+        self.x[:n] += self.velocity_x[:n]
+        self.y[:n] += self.velocity_y[:n]
+        self.velocity_y[:n] += 0.1  # Gravity on particles
+        self.life[:n] -= 1
+        
+        # Compact the survivors to the front of the arrays
+        alive = np.flatnonzero(self.life[:n] > 0)
+        if len(alive) < n:
+            for array in (self.x, self.y, self.velocity_x, self.velocity_y, self.life, self.color):
+                array[:len(alive)] = array[alive]
+            self.count = len(alive)
+    
     def draw(self, screen):
-        if self.life > 0:
-            alpha = int(255 * (self.life / self.max_life))
-            particle_surface = pygame.Surface((4, 4))
-            particle_surface.set_alpha(alpha)
-            particle_surface.fill(self.color)
-            screen.blit(particle_surface, (int(self.x), int(self.y)))
-            
-    def is_alive(self):
-        return self.life > 0
+        """Draw all particles with one Surface.blits call; returns their bounding rect"""
+        n = self.count
+        if n == 0:
+            return None
+        xs = self.x[:n].astype(np.int32)
+        ys = self.y[:n].astype(np.int32)
+        ramps = self.alpha_ramps
+        screen.blits([(ramps[color][life], (x, y)) for color, life, x, y
+                      in zip(self.color[:n].tolist(), self.life[:n].tolist(), xs.tolist(), ys.tolist())],
+                     doreturn=False)
+        left, top = int(xs.min()), int(ys.min())
+        return pygame.Rect(left, top, int(xs.max()) - left + self.SIZE, int(ys.max()) - top + self.SIZE)
+    
+    def clear(self):
+        self.count = 0
 
-class Bird:
-    def __init__(self, jump_strength=-6.5):
-        self.x = 50
-        self.y = SCREEN_HEIGHT // 2
-        self.velocity = 0
-        self.radius = 22  # Slightly larger
-        self.wing_flap = 0
-        self.rotation = 0
-        self.trail = []  # For trail effect
-        self.max_trail_length = 8
-        self.jump_strength = jump_strength
-        
-    def jump(self):
-        self.velocity = self.jump_strength
-        
-    def update(self):
-        self.velocity += GRAVITY
-        self.y += self.velocity
-        
-        # Update wing flap animation
-        self.wing_flap += 0.3
-        
-        # Calculate rotation based on velocity (more realistic)
-        self.rotation = max(-30, min(30, self.velocity * 3))
-        
-        # Update trail effect
-        self.trail.append((int(self.x - 10), int(self.y)))
-        if len(self.trail) > self.max_trail_length:
-            self.trail.pop(0)
-        
-    def draw(self, screen):
-        # Draw trail effect
-        for i, pos in enumerate(self.trail):
-            alpha = int(255 * (i / len(self.trail)) * 0.3)
-            trail_surface = pygame.Surface((6, 6))
-            trail_surface.set_alpha(alpha)
-            trail_surface.fill(BIRD_COLORS['wing'])
-            screen.blit(trail_surface, pos)
-        
-        # Calculate wing positions based on flap animation
-        wing_offset = math.sin(self.wing_flap) * 3
+class BirdSpriteSheet:
+    """Bird frames baked once for each wing phase and rotation angle"""
+    WING_PHASES = 8
+    ROTATION_STEP = 5
+    MAX_ROTATION = 30
+    CANVAS_SIZE = 80  # Square canvas centred on the bird, large enough for wings and beak
+    
+    _shared = None
+    
+    @classmethod
+    def shared(cls):
+        """Get the shared sprite sheet, baking it on first use"""
+        if cls._shared is None:
+            cls._shared = cls()
+        return cls._shared
+    
+    def __init__(self, radius=22):
+        self.radius = radius
+        self.rotations = list(range(-self.MAX_ROTATION, self.MAX_ROTATION + 1, self.ROTATION_STEP))
+        params = ('bird', radius, self.WING_PHASES, tuple(self.rotations), self.CANVAS_SIZE,
+                  tuple(sorted(BIRD_COLORS.items())))
+        surfaces = iter(bake_cache.bake_surfaces(params, self.render_frames, alpha=True))
+        self.frames = []  # frames[phase][rotation index] -> (surface, blit offset)
+        for phase in range(self.WING_PHASES):
+            row = []
+            for rotation in self.rotations:
+                frame = next(surfaces)
+                row.append((frame, (-(frame.get_width() // 2), -(frame.get_height() // 2))))
+            self.frames.append(row)
+        self.trail_squares = {}
+        self.shooter_sprites = {}
+    
+    def render_frames(self):
+        """Draw every frame, phase by phase, in rotation order"""
+        frames = []
+        for phase in range(self.WING_PHASES):
+            wing_offset = math.sin(phase * 2 * math.pi / self.WING_PHASES) * 3
+            upright = self.render_bird(wing_offset)
+            for rotation in self.rotations:
+                # Positive rotation (falling) tips the beak down, i.e. clockwise
+                frames.append(pygame.transform.rotate(upright, -rotation).convert_alpha())
+        return frames
+    
+    def get_frame(self, wing_flap, rotation):
+        """Look up the frame closest to a wing flap angle and rotation"""
+        phase = int(round(wing_flap * self.WING_PHASES / (2 * math.pi))) % self.WING_PHASES
+        index = int(round((rotation + self.MAX_ROTATION) / self.ROTATION_STEP))
+        index = max(0, min(len(self.rotations) - 1, index))
+        return self.frames[phase][index]
+    
+    def get_trail_square(self, alpha):
+        """Get a translucent trail square for an alpha value"""
+        square = self.trail_squares.get(alpha)
+        if square is None:
+            square = pygame.Surface((6, 6))
+            square.set_alpha(alpha)
+            square.fill(BIRD_COLORS['wing'])
+            self.trail_squares[alpha] = square
+        return square
+    
+    def get_shooter(self, size):
+        """Get the shooter bird body, eye and beak for a body size"""
+        sprite = self.shooter_sprites.get(size)
+        if sprite is None:
+            sprite, = bake_cache.bake_surfaces(('shooter', size), lambda: [self.render_shooter(size)], alpha=True)
+            self.shooter_sprites[size] = sprite
+        return sprite
+    
+    def render_bird(self, wing_offset):
+        """Draw the unrotated bird centred on the canvas"""
+        surface = pygame.Surface((self.CANVAS_SIZE, self.CANVAS_SIZE), pygame.SRCALPHA)
+        x = y = self.CANVAS_SIZE // 2
+        radius = self.radius
         
         # Draw bird body (main circle with gradient effect)
         for i in range(3):
             color_intensity = 1.0 - (i * 0.15)
             body_color = tuple(int(c * color_intensity) for c in BIRD_COLORS['body'])
-            pygame.draw.circle(screen, body_color, (int(self.x), int(self.y)), self.radius - i)
+            pygame.draw.circle(surface, body_color, (x, y), radius - i)
         
         # Draw belly (lighter circle)
-        pygame.draw.circle(screen, BIRD_COLORS['belly'], 
-                          (int(self.x - 3), int(self.y + 3)), self.radius - 8)
+        pygame.draw.circle(surface, BIRD_COLORS['belly'], (x - 3, y + 3), radius - 8)
         
         # Draw wings with flapping animation
         wing_points_left = [
-            (int(self.x - 15), int(self.y - 5 + wing_offset)),
-            (int(self.x - 25), int(self.y - 10 + wing_offset)),
-            (int(self.x - 20), int(self.y + 5 + wing_offset)),
-            (int(self.x - 8), int(self.y + 2 + wing_offset))
+            (x - 15, int(y - 5 + wing_offset)),
+            (x - 25, int(y - 10 + wing_offset)),
+            (x - 20, int(y + 5 + wing_offset)),
+            (x - 8, int(y + 2 + wing_offset))
         ]
-        pygame.draw.polygon(screen, BIRD_COLORS['wing'], wing_points_left)
+        pygame.draw.polygon(surface, BIRD_COLORS['wing'], wing_points_left)
         
         # Draw wing details
         wing_detail_points = [
-            (int(self.x - 12), int(self.y - 2 + wing_offset)),
-            (int(self.x - 18), int(self.y - 5 + wing_offset)),
-            (int(self.x - 15), int(self.y + 2 + wing_offset))
+            (x - 12, int(y - 2 + wing_offset)),
+            (x - 18, int(y - 5 + wing_offset)),
+            (x - 15, int(y + 2 + wing_offset))
         ]
-        pygame.draw.polygon(screen, BIRD_COLORS['body'], wing_detail_points)
+        pygame.draw.polygon(surface, BIRD_COLORS['body'], wing_detail_points)
         
         # Draw eye (larger and more detailed)
-        eye_x, eye_y = int(self.x + 8), int(self.y - 6)
-        pygame.draw.circle(screen, BIRD_COLORS['eye_outer'], (eye_x, eye_y), 6)
-        pygame.draw.circle(screen, BIRD_COLORS['eye_inner'], (eye_x + 1, eye_y), 3)
-        pygame.draw.circle(screen, WHITE, (eye_x + 2, eye_y - 1), 1)  # Eye shine
+        eye_x, eye_y = x + 8, y - 6
+        pygame.draw.circle(surface, BIRD_COLORS['eye_outer'], (eye_x, eye_y), 6)
+        pygame.draw.circle(surface, BIRD_COLORS['eye_inner'], (eye_x + 1, eye_y), 3)
+        pygame.draw.circle(surface, WHITE, (eye_x + 2, eye_y - 1), 1)  # Eye shine
         
         # Draw beak (more detailed)
         beak_points = [
-            (int(self.x + self.radius - 2), int(self.y - 2)),
-            (int(self.x + self.radius + 12), int(self.y - 6)),
-            (int(self.x + self.radius + 12), int(self.y + 2)),
-            (int(self.x + self.radius - 2), int(self.y + 4))
+            (x + radius - 2, y - 2),
+            (x + radius + 12, y - 6),
+            (x + radius + 12, y + 2),
+            (x + radius - 2, y + 4)
         ]
-        pygame.draw.polygon(screen, BIRD_COLORS['beak'], beak_points)
+        pygame.draw.polygon(surface, BIRD_COLORS['beak'], beak_points)
         
         # Draw beak outline
-        pygame.draw.polygon(screen, (200, 100, 0), beak_points, 2)
+        pygame.draw.polygon(surface, (200, 100, 0), beak_points, 2)
+        return surface
     
-    def get_rect(self):
-        return pygame.Rect(self.x - self.radius + 5, self.y - self.radius + 5, 
-                          (self.radius - 5) * 2, (self.radius - 5) * 2)  # Slightly smaller hitbox
+    @staticmethod
+    def render_shooter(size):
+        """Draw the shooter bird body with its row gradient, eye and beak"""
+        surface = pygame.Surface((size + 6, size), pygame.SRCALPHA)
+        
+        # Bird body with gradient
+        for i in range(size):
+            ratio = i / size
+            color_r = int(255 * (1 - ratio * 0.2))
+            color_g = int(215 * (1 - ratio * 0.1))
+            color_b = int(0 + ratio * 100)
+            pygame.draw.line(surface, (color_r, color_g, color_b), (0, i), (size, i))
+        
+        # Bird details
+        pygame.draw.circle(surface, (255, 255, 255), (8, 8), 3)  # Eye
+        pygame.draw.circle(surface, (0, 0, 0), (9, 8), 1)  # Pupil
+        pygame.draw.polygon(surface, (255, 165, 0), 
+                          [(size, 10), (size + 5, 12), (size, 14)])  # Beak
+        return surface.convert_alpha()
 
-class Pipe:
-    def __init__(self, x, pipe_gap=200, pipe_speed=2):
-        self.x = x
-        self.pipe_gap = pipe_gap
-        self.pipe_speed = pipe_speed
-        self.height = random.randint(120, SCREEN_HEIGHT - pipe_gap - 120)  # Better range
-        self.top_rect = pygame.Rect(self.x, 0, PIPE_WIDTH, self.height)
-        self.bottom_rect = pygame.Rect(self.x, self.height + pipe_gap, 
-                                      PIPE_WIDTH, SCREEN_HEIGHT - self.height - pipe_gap - 50)  # Account for ground
-        self.passed = False
+class Bird(Interpolated, simulation.Bird):
+    def __init__(self, jump_strength=-6.5):
+        super().__init__(jump_strength)
+        self.trail = []  # For trail effect
+        self.max_trail_length = 8
         
     def update(self):
-        self.x -= self.pipe_speed
-        self.top_rect.x = self.x
-        self.bottom_rect.x = self.x
+        super().update()
+        
+        # Update trail effect
+        self.trail.append((int(self.x - 10), int(self.y)))
+        if len(self.trail) > self.max_trail_length:
+            self.trail.pop(0)
+        
+    def draw(self, screen, alpha=1.0):
+        sprite_sheet = BirdSpriteSheet.shared()
+        x, y = self.position(alpha)
         
+        # Draw the pre-baked frame for the current wing phase and rotation
+        frame, (offset_x, offset_y) = sprite_sheet.get_frame(self.wing_flap, self.rotation)
+        
+        # Draw trail effect
+        frame_rect = frame.get_rect(topleft=(int(x) + offset_x, int(y) + offset_y))
+        dirty_rect = frame_rect.copy()
+        for i, pos in enumerate(self.trail):
+            trail_alpha = int(255 * (i / len(self.trail)) * 0.3)
+            dirty_rect.union_ip(screen.blit(sprite_sheet.get_trail_square(trail_alpha), pos))
+        
+        screen.blit(frame, frame_rect.topleft)
+        return dirty_rect
+
+class PipeSprites:
+    """Pieces that any pipe pair is assembled from, rendered once
+    
+    A pipe body is three flat gradient bands with the highlight and shadow
+    running down them, so every row of a band looks the same: one strip per
+    band, cut to length, plus the two caps covers every gap and height
+    without re-rendering or caching whole pipes.
+    """
+    COLORKEY = (255, 0, 255)
+    MARGIN = 12  # Room for the caps and highlight strokes left of the pipe
+    CAP_HEIGHT = 25
+    REFERENCE_HEIGHT = 300  # Top pipe height of the pair the pieces are cut from
+    REFERENCE_GAP = 160
+    
+    def __init__(self):
+        self.pieces = None
+        self.band_ends = {}  # Body height -> rows in the first and second bands
+    
+    def load(self):
+        """Render a reference pipe pair and cut the band strips and caps from it"""
+        canvas = pygame.Surface((PIPE_WIDTH + self.MARGIN * 2, SCREEN_HEIGHT))
+        canvas.fill(self.COLORKEY)
+        canvas.set_colorkey(self.COLORKEY)
+        pipe = Pipe(0, self.REFERENCE_GAP)
+        pipe.height = height = self.REFERENCE_HEIGHT
+        pipe.render(canvas, self.MARGIN)
+        
+        width = canvas.get_width()
+        bottom = height + self.REFERENCE_GAP
+        band_rows = (0, height // 2, height - self.CAP_HEIGHT - 1)  # One row from each band of the top body
+        self.pieces = {
+            'bands': [self.cut(pygame.transform.scale(canvas.subsurface((0, row, width, 1)), (width, SCREEN_HEIGHT)))
+                      for row in band_rows],
+            'top_cap': self.cut(canvas.subsurface((0, height - self.CAP_HEIGHT, width, self.CAP_HEIGHT + 1))),
+            'bottom_cap': self.cut(canvas.subsurface((0, bottom, width, self.CAP_HEIGHT))),
+            'bottom_end': self.cut(canvas.subsurface((0, SCREEN_HEIGHT - 50, width, 50))),
+        }
+    
+    def cut(self, piece):
+        """Trim a piece to its drawn pixels: (surface, (offset_x, offset_y))"""
+        bounds = piece.get_bounding_rect()
+        sprite = piece.subsurface(bounds).copy().convert()
+        sprite.set_colorkey(self.COLORKEY)
+        return sprite, (bounds.x - self.MARGIN, bounds.y)
+    
+    def bands(self, height):
+        """Row ranges of the three gradient bands of a body height rows tall"""
+        ends = self.band_ends.get(height)
+        if ends is None:
+            # Same split as Pipe.draw_gradient_rect, row by row
+            ends = self.band_ends[height] = (sum(1 for i in range(height) if i / height < 0.3),
+                                             sum(1 for i in range(height) if i / height < 0.7))
+        return ((0, ends[0]), ends, (ends[1], height))
+    
+    def draw_body(self, screen, x, y, height, visible_from, visible_to):
+        """Blit the body rows visible_from..visible_to of a body starting at y"""
+        rects = []
+        for (first, last), (strip, (offset_x, _)) in zip(self.bands(height), self.pieces['bands']):
+            first, last = max(first, visible_from), min(last, visible_to)
+            if last > first:
+                rects.append(screen.blit(strip, (x + offset_x, y + first), (0, 0, strip.get_width(), last - first)))
+        return rects
+    
+    def draw(self, screen, pipe, x):
+        """Draw a pipe pair at x; returns the dirty rects"""
+        if self.pieces is None:
+            self.load()
+        pieces = self.pieces
+        height = pipe.height
+        bottom = height + pipe.pipe_gap
+        rects = self.draw_body(screen, x, 0, height, 0, height - self.CAP_HEIGHT)
+        for name, y in (('top_cap', height - self.CAP_HEIGHT), ('bottom_cap', bottom),
+                        ('bottom_end', SCREEN_HEIGHT - 50)):
+            sprite, (offset_x, offset_y) = pieces[name]
+            rects.append(screen.blit(sprite, (x + offset_x, y + offset_y)))
+        body_height = SCREEN_HEIGHT - bottom - 50
+        rects.extend(self.draw_body(screen, x, bottom, body_height, self.CAP_HEIGHT, body_height))
+        return rects
+
+class Pipe(Interpolated, simulation.Pipe):
+    sprites = PipeSprites()
+    interpolated = ('x',)
+    
     def draw_gradient_rect(self, screen, rect, colors):
         """Draw a rectangle with vertical gradient"""
         if rect.height <= 0:
@@ -462,15 +969,25 @@ class Pipe:
                 color = colors[2]
             pygame.draw.line(screen, color, (rect.x, rect.y + i), (rect.x + rect.width, rect.y + i))
         
-    def draw(self, screen):
+    def draw(self, screen, alpha=1.0):
+        # Assemble the pipe pair from the pre-rendered pieces
+        dirty_rects = self.sprites.draw(screen, self, int(self.position(alpha)[0]))
+        return dirty_rects[0].unionall(dirty_rects[1:])
+    
+    def render(self, screen, x):
+        """Draw the full pipe pair at x (PipeSprites cuts its pieces from this)"""
+        top_rect = pygame.Rect(x, 0, PIPE_WIDTH, self.height)
+        bottom_rect = pygame.Rect(x, self.height + self.pipe_gap, 
+                                  PIPE_WIDTH, SCREEN_HEIGHT - self.height - self.pipe_gap - 50)
+        
         # Draw pipes with gradient effect
-        self.draw_gradient_rect(screen, self.top_rect, GRADIENT_GREEN)
-        self.draw_gradient_rect(screen, self.bottom_rect, GRADIENT_GREEN)
+        self.draw_gradient_rect(screen, top_rect, GRADIENT_GREEN)
+        self.draw_gradient_rect(screen, bottom_rect, GRADIENT_GREEN)
         
         # Draw pipe caps with more detail
         cap_height = 25
-        top_cap_rect = pygame.Rect(self.x - 8, self.height - cap_height, PIPE_WIDTH + 16, cap_height)
-        bottom_cap_rect = pygame.Rect(self.x - 8, self.height + self.pipe_gap, PIPE_WIDTH + 16, cap_height)
+        top_cap_rect = pygame.Rect(x - 8, self.height - cap_height, PIPE_WIDTH + 16, cap_height)
+        bottom_cap_rect = pygame.Rect(x - 8, self.height + self.pipe_gap, PIPE_WIDTH + 16, cap_height)
         
         # Draw cap gradients
         for i in range(cap_height):
@@ -485,86 +1002,41 @@ class Pipe:
         
         # Draw pipe highlights and shadows for 3D effect
         # Left highlight
-        pygame.draw.line(screen, (100, 255, 100), (self.x + 2, 0), (self.x + 2, self.height), 3)
-        pygame.draw.line(screen, (100, 255, 100), (self.x + 2, self.height + self.pipe_gap), 
-                        (self.x + 2, SCREEN_HEIGHT - 50), 3)
+        pygame.draw.line(screen, (100, 255, 100), (x + 2, 0), (x + 2, self.height), 3)
+        pygame.draw.line(screen, (100, 255, 100), (x + 2, self.height + self.pipe_gap), 
+                        (x + 2, SCREEN_HEIGHT - 50), 3)
         
         # Right shadow
-        pygame.draw.line(screen, (20, 80, 20), (self.x + PIPE_WIDTH - 2, 0), 
-                        (self.x + PIPE_WIDTH - 2, self.height), 2)
-        pygame.draw.line(screen, (20, 80, 20), (self.x + PIPE_WIDTH - 2, self.height + self.pipe_gap), 
-                        (self.x + PIPE_WIDTH - 2, SCREEN_HEIGHT - 50), 2)
-    
-    def collides_with(self, bird):
-        bird_rect = bird.get_rect()
-        return bird_rect.colliderect(self.top_rect) or bird_rect.colliderect(self.bottom_rect)
-    
-    def is_off_screen(self):
-        return self.x + PIPE_WIDTH < 0
+        pygame.draw.line(screen, (20, 80, 20), (x + PIPE_WIDTH - 2, 0), 
+                        (x + PIPE_WIDTH - 2, self.height), 2)
+        pygame.draw.line(screen, (20, 80, 20), (x + PIPE_WIDTH - 2, self.height + self.pipe_gap), 
+                        (x + PIPE_WIDTH - 2, SCREEN_HEIGHT - 50), 2)
 
-class ShooterBird:
-    def __init__(self, x, y):
-        self.x = x
-        self.y = y
-        self.size = 25
-        self.velocity_y = 0
-        self.speed = 4
-        self.health = 3
-        self.max_health = 3
-        self.last_shot = 0
-        self.shoot_cooldown = 200  # milliseconds
-        
-    def move_up(self):
-        if self.y > 50:  # Top boundary
-            self.y -= self.speed
-            
-    def move_down(self):
-        if self.y < SCREEN_HEIGHT - 100:  # Bottom boundary (above ground)
-            self.y += self.speed
-    
-    def can_shoot(self):
-        import pygame
-        current_time = pygame.time.get_ticks()
-        return current_time - self.last_shot > self.shoot_cooldown
-    
-    def shoot(self):
-        import pygame
-        if self.can_shoot():
-            self.last_shot = pygame.time.get_ticks()
-            return Bullet(self.x + self.size, self.y + self.size // 2)
+class Bullet(Interpolated, simulation.Bullet):
+    def draw(self, screen, alpha=1.0):
+        if self.active:
+            # Draw bullet with glow effect
+            x, y = self.position(alpha)
+            center = (int(x), int(y))
+            pygame.draw.circle(screen, (255, 255, 0), center, self.size)
+            pygame.draw.circle(screen, (255, 255, 255), center, self.size - 1)
+            return pygame.Rect(center[0] - self.size, center[1] - self.size, self.size * 2, self.size * 2)
         return None
-        
-    def update(self):
-        # Remove bobbing animation to prevent conflicts with movement controls
-        pass
+
+class ShooterBird(Interpolated, simulation.ShooterBird):
+    bullet_class = Bullet
     
-    def draw(self, screen):
+    def draw(self, screen, alpha=1.0):
         # Draw shooter bird with health indicator
-        # Main body (enhanced bird design)
-        bird_rect = pygame.Rect(self.x, self.y, self.size, self.size)
-        
-        # Bird body with gradient
-        for i in range(self.size):
-            ratio = i / self.size
-            color_r = int(255 * (1 - ratio * 0.2))
-            color_g = int(215 * (1 - ratio * 0.1))
-            color_b = int(0 + ratio * 100)
-            pygame.draw.line(screen, (color_r, color_g, color_b), 
-                           (self.x, self.y + i), (self.x + self.size, self.y + i))
-        
-        # Bird details
-        pygame.draw.circle(screen, (255, 255, 255), (self.x + 8, self.y + 8), 3)  # Eye
-        pygame.draw.circle(screen, (0, 0, 0), (self.x + 9, self.y + 8), 1)  # Pupil
-        pygame.draw.polygon(screen, (255, 165, 0), 
-                          [(self.x + self.size, self.y + 10), 
-                           (self.x + self.size + 5, self.y + 12), 
-                           (self.x + self.size, self.y + 14)])  # Beak
+        # Main body (pre-baked gradient body, eye and beak)
+        x, y = self.position(alpha)
+        dirty_rect = screen.blit(BirdSpriteSheet.shared().get_shooter(self.size), (x, y))
         
         # Health indicator
         health_bar_width = 30
         health_bar_height = 4
-        health_x = self.x - 5
-        health_y = self.y - 10
+        health_x = x - 5
+        health_y = y - 10
         
         # Background bar
         pygame.draw.rect(screen, (100, 100, 100), 
@@ -575,220 +1047,430 @@ class ShooterBird:
         health_color = (255, int(255 * health_ratio), 0) if health_ratio > 0.5 else (255, 0, 0)
         pygame.draw.rect(screen, health_color, 
                         (health_x, health_y, health_bar_width * health_ratio, health_bar_height))
-    
-    def get_rect(self):
-        return pygame.Rect(self.x, self.y, self.size, self.size)
-
-class Bullet:
-    def __init__(self, x, y):
-        self.x = x
-        self.y = y
-        self.speed = 8
-        self.size = 4
-        self.active = True
-        
-    def update(self):
-        self.x += self.speed
-        # Remove bullet if it goes off screen
-        if self.x > SCREEN_WIDTH:
-            self.active = False
-    
-    def draw(self, screen):
-        if self.active:
-            # Draw bullet with glow effect
-            pygame.draw.circle(screen, (255, 255, 0), (int(self.x), int(self.y)), self.size)
-            pygame.draw.circle(screen, (255, 255, 255), (int(self.x), int(self.y)), self.size - 1)
-    
-    def get_rect(self):
-        return pygame.Rect(self.x - self.size, self.y - self.size, self.size * 2, self.size * 2)
+        return dirty_rect.union((health_x, health_y, health_bar_width, health_bar_height))
 
-class ZombieBird:
-    def __init__(self, x):
-        self.x = x
-        self.y = random.randint(60, SCREEN_HEIGHT - 150)
-        self.size = 20
-        self.speed = 2
-        self.health = 2
-        self.max_health = 2
-        self.hit_recently = False
-        self.hit_timer = 0
-        
-    def update(self):
-        self.x -= self.speed
+class ZombieBird(Interpolated, simulation.ZombieBird):
+    def draw(self, screen, alpha=1.0):
+        x, y = self.position(alpha)
         
-        # Reset hit effect
-        if self.hit_recently:
-            self.hit_timer -= 1
-            if self.hit_timer <= 0:
-                self.hit_recently = False
-        
-        # Slight vertical movement
-        import time
-        self.y += math.sin(time.time() * 3 + self.x * 0.01) * 0.5
-    
-    def take_damage(self):
-        self.health -= 1
-        self.hit_recently = True
-        self.hit_timer = 10
-        return self.health <= 0
-    
-    def draw(self, screen):
         # Zombie bird color (greenish with red eyes)
         zombie_color = (100, 150, 50) if not self.hit_recently else (255, 100, 100)
         
         # Main body
-        bird_rect = pygame.Rect(self.x, self.y, self.size, self.size)
+        bird_rect = pygame.Rect(x, y, self.size, self.size)
         pygame.draw.ellipse(screen, zombie_color, bird_rect)
         
         # Red glowing eyes
-        pygame.draw.circle(screen, (255, 0, 0), (self.x + 6, self.y + 6), 2)
-        pygame.draw.circle(screen, (255, 0, 0), (self.x + 14, self.y + 6), 2)
+        pygame.draw.circle(screen, (255, 0, 0), (x + 6, y + 6), 2)
+        pygame.draw.circle(screen, (255, 0, 0), (x + 14, y + 6), 2)
         
         # Dark beak
         pygame.draw.polygon(screen, (50, 50, 50), 
-                          [(self.x + self.size, self.y + 8), 
-                           (self.x + self.size + 4, self.y + 10), 
-                           (self.x + self.size, self.y + 12)])
+                          [(x + self.size, y + 8), 
+                           (x + self.size + 4, y + 10), 
+                           (x + self.size, y + 12)])
         
         # Health indicator
         if self.health < self.max_health:
             health_ratio = self.health / self.max_health
             health_color = (255, int(255 * health_ratio), 0)
             pygame.draw.rect(screen, health_color, 
-                           (self.x, self.y - 5, self.size * health_ratio, 2))
-    
-    def get_rect(self):
-        return pygame.Rect(self.x, self.y, self.size, self.size)
-    
-    def is_off_screen(self):
-        return self.x < -self.size
+                           (x, y - 5, self.size * health_ratio, 2))
+        
+        # Body, beak and health bar
+        return pygame.Rect(x, y - 5, self.size + 5, self.size + 5)
 
 # Legacy GeometryDashCube class removed - replaced with direct ShooterBird usage
 
 # Zombie Bird Shooter replacement for GeometryDashObstacle
-class ZombieBirdManager:
-    def __init__(self):
-        self.zombie_birds = []
-        self.spawn_timer = 0
-        self.spawn_interval = 120  # frames between spawns
-        
-    def update(self):
-        # Update existing zombie birds
-        for zombie in self.zombie_birds[:]:
-            zombie.update()
-            if zombie.is_off_screen() or zombie.health <= 0:
-                self.zombie_birds.remove(zombie)
-        
-        # Spawn new zombie birds
-        self.spawn_timer += 1
-        if self.spawn_timer >= self.spawn_interval:
-            self.spawn_timer = 0
-            self.spawn_zombie()
-    
-    def spawn_zombie(self):
-        zombie_x = SCREEN_WIDTH + 20
-        self.zombie_birds.append(ZombieBird(zombie_x))
+class ZombieBirdManager(simulation.ZombieBirdManager):
+    zombie_class = ZombieBird
     
-    def draw(self, screen):
-        for zombie in self.zombie_birds:
-            zombie.draw(screen)
+    def draw(self, screen, alpha=1.0):
+        return [zombie.draw(screen, alpha) for zombie in self.zombie_birds]
+
+class GameSimulation(simulation.Simulation):
+    """Simulation that spawns the drawable entity classes"""
+    bird_class = Bird
+    pipe_class = Pipe
+    shooter_class = ShooterBird
+    zombie_manager_class = ZombieBirdManager
+    
+    def entities(self):
+        """Every drawable entity that moves during a step"""
+        yield self.bird
+        yield from self.pipes
+        if self.shooter_bird:
+            yield self.shooter_bird
+        yield from self.zombie_manager.zombie_birds
+        yield from self.bullets
     
-    def check_bullet_collisions(self, bullets):
-        hits = 0
-        for bullet in bullets[:]:
-            if not bullet.active:
+    def save_positions(self):
+        """Remember entity positions before a step so draws can interpolate"""
+        for entity in self.entities():
+            entity.save_position()
+
+class DirtyRectRenderer:
+    """Opt-in presenter that pushes only the changed parts of the screen"""
+    def __init__(self, enabled=False, full_flip_ratio=0.6):
+        self.enabled = enabled
+        self.full_flip_ratio = full_flip_ratio  # Dirty share of the screen that triggers a full flip
+        self.screen_rect = pygame.Rect(0, 0, SCREEN_WIDTH, SCREEN_HEIGHT)
+        self.rects = []
+        self.previous_rects = []
+        self.state = None
+        self.force_full = True
+        self.full_flips = 0
+        self.partial_updates = 0
+    
+    def begin_frame(self, state):
+        """Start a frame; any change of screen state repaints everything"""
+        if state != self.state:
+            self.state = state
+            self.force_full = True
+    
+    def mark(self, rect):
+        """Record a rect that may differ from the previous frame"""
+        if self.enabled and rect:
+            self.rects.append(rect)
+    
+    def mark_all(self):
+        """Force a full flip this frame"""
+        self.force_full = True
+    
+    def present(self):
+        """Push this frame to the display"""
+        if not self.enabled:
+            pygame.display.flip()
+            return
+        
+        # Last frame's rects are included so moved objects get erased
+        rects = self.merge(self.previous_rects + self.rects)
+        self.previous_rects = self.rects
+        self.rects = []
+        
+        dirty_area = sum(rect.width * rect.height for rect in rects)
+        screen_area = self.screen_rect.width * self.screen_rect.height
+        if self.force_full or dirty_area > screen_area * self.full_flip_ratio:
+            self.force_full = False
+            self.full_flips += 1
+            pygame.display.flip()
+        else:
+            self.partial_updates += 1
+            pygame.display.update(rects)
+    
+    def merge(self, rects):
+        """Clip rects to the screen and merge the overlapping ones"""
+        merged = []
+        for rect in rects:
+            rect = self.screen_rect.clip(rect)
+            if not rect:
                 continue
-            for zombie in self.zombie_birds[:]:
-                if bullet.get_rect().colliderect(zombie.get_rect()):
-                    bullet.active = False
-                    if zombie.take_damage():
-                        hits += 1
-                    break
-        return hits
-    
-    def check_shooter_collision(self, shooter_bird):
-        shooter_rect = shooter_bird.get_rect()
-        for zombie in self.zombie_birds:
-            if shooter_rect.colliderect(zombie.get_rect()):
-                shooter_bird.health -= 1
-                self.zombie_birds.remove(zombie)
-                return True
-        return False
+            index = rect.collidelist(merged)
+            while index != -1:
+                rect.union_ip(merged.pop(index))
+                index = rect.collidelist(merged)
+            merged.append(rect)
+        return merged
+
+class TextCache:
+    """LRU cache of rendered text plus digit glyph atlases for counters"""
+    DIGITS = "0123456789-"
     
-    def clear(self):
-        self.zombie_birds.clear()
-        self.spawn_timer = 0
+    def __init__(self, max_entries=256):
+        self.surfaces = OrderedDict()
+        self.max_entries = max_entries
+        self.glyph_atlases = {}
+        self.tinted = {}  # (font, text) -> rendering recolored in place
+        self.hits = 0
+        self.misses = 0
+    
+    def render(self, font, text, color, scale=1.0):
+        """Get the antialiased rendering of text, optionally scaled"""
+        key = (font, text, tuple(color), scale)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            self.hits += 1
+            return surface
+        
+        self.misses += 1
+        if scale != 1.0:
+            surface = self.render(font, text, color)
+            scaled_size = (int(surface.get_width() * scale), int(surface.get_height() * scale))
+            surface = pygame.transform.scale(surface, scaled_size)
+        else:
+            surface = font.render(text, True, color)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.max_entries:
+            self.surfaces.popitem(last=False)
+        return surface
+    
+    def render_tinted(self, font, text, color):
+        """Text whose color changes every frame, e.g. pulsing titles
+        
+        Rendered once; antialiased text is one flat color with the shape in
+        the alpha channel, so recoloring it is two fills that leave the alpha
+        alone. That neither calls Font.render again nor churns the LRU with a
+        key per color. The surface is only valid until the next call for the
+        same text.
+        """
+        key = (font, text)
+        surface = self.tinted.get(key)
+        if surface is None:
+            surface = self.tinted[key] = font.render(text, True, (255, 255, 255))
+        surface.fill((255, 255, 255), special_flags=pygame.BLEND_RGB_MAX)  # Back to white...
+        surface.fill(tuple(color), special_flags=pygame.BLEND_RGB_MIN)  # ...then down to color
+        return surface
+    
+    def get_glyphs(self, font, color):
+        """Get the digit glyph atlas for a font and color"""
+        key = (font, tuple(color))
+        glyphs = self.glyph_atlases.get(key)
+        if glyphs is None:
+            glyphs = {digit: font.render(digit, True, color) for digit in self.DIGITS}
+            self.glyph_atlases[key] = glyphs
+        return glyphs
+    
+    def draw_number(self, screen, font, prefix, number, color, **anchor):
+        """Draw a cached prefix followed by number composed from digit glyphs
+        
+        The position is given as a pygame.Rect anchor, e.g. topleft=(x, y)
+        or center=(x, y). Returns the rect that was drawn.
+        """
+        glyphs = self.get_glyphs(font, color)
+        digits = [glyphs[digit] for digit in str(number)]
+        prefix_surface = self.render(font, prefix, color) if prefix else None
+        
+        width = sum(glyph.get_width() for glyph in digits)
+        height = max(glyph.get_height() for glyph in digits)
+        if prefix_surface:
+            width += prefix_surface.get_width()
+            height = max(height, prefix_surface.get_height())
+        rect = pygame.Rect(0, 0, width, height)
+        for name, value in anchor.items():
+            setattr(rect, name, value)
+        
+        x = rect.x
+        if prefix_surface:
+            screen.blit(prefix_surface, rect.topleft)
+            x += prefix_surface.get_width()
+        for glyph in digits:
+            screen.blit(glyph, (x, rect.y))
+            x += glyph.get_width()
+        return rect
 
-class Game:
+class LayerCache:
+    """Pre-rendered sky and ground layers, rendered once per theme"""
     def __init__(self):
-        self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-        pygame.display.set_caption("Flappy Bird - 4 Levels Edition")
+        self.sky_layers = {}
+        self.ground_layers = {}
+    
+    def get_sky(self, dark=False):
+        """Get the sky gradient surface for the normal or dark theme"""
+        if dark not in self.sky_layers:
+            gradient = GRADIENT_DARK if dark else GRADIENT_BLUE
+            self.sky_layers[dark], = bake_cache.bake_surfaces(('sky', gradient, SCREEN_WIDTH, SCREEN_HEIGHT),
+                                                              lambda: [self.render_sky(gradient)])
+        return self.sky_layers[dark]
+    
+    def get_ground(self, dark=False):
+        """Get the layered ground surface for the normal or dark theme"""
+        if dark not in self.ground_layers:
+            colors = DARK_GROUND_COLORS if dark else GROUND_COLORS
+            self.ground_layers[dark], = bake_cache.bake_surfaces(('ground', colors, SCREEN_WIDTH),
+                                                                 lambda: [self.render_ground(colors)])
+        return self.ground_layers[dark]
+    
+    def get_texture_color(self, dark=False):
+        """Get the ground texture stroke color for a theme"""
+        return (60, 60, 70) if dark else (100, 50, 0)
+    
+    @staticmethod
+    def render_sky(gradient):
+        """Render a vertical sky gradient from the first to the last color"""
+        height = SCREEN_HEIGHT - 50
+        surface = pygame.Surface((SCREEN_WIDTH, height))
+        for y in range(height):
+            ratio = y / height
+            color = [
+                int(gradient[0][i] * (1 - ratio) + gradient[2][i] * ratio)
+                for i in range(3)
+            ]
+            pygame.draw.line(surface, color, (0, y), (SCREEN_WIDTH, y))
+        return surface.convert()
+    
+    @staticmethod
+    def render_ground(ground_colors):
+        """Render the three ground bands"""
+        surface = pygame.Surface((SCREEN_WIDTH, 50))
+        for i in range(50):
+            ratio = i / 50
+            if ratio < 0.3:
+                color = ground_colors[0]
+            elif ratio < 0.7:
+                color = ground_colors[1]
+            else:
+                color = ground_colors[2]
+            pygame.draw.line(surface, color, (0, i), (SCREEN_WIDTH, i))
+        return surface.convert()
+
+class FrameStatsOverlay:
+    """Panel of per-phase frame times (p50/p95/p99 ms), toggled with F3"""
+    REFRESH = 30  # Frames between recomputing the percentiles
+    
+    def __init__(self, profiler, font, draw_calls=None):
+        self.profiler = profiler
+        self.font = font
+        self.draw_calls = draw_calls  # A profiling.DrawCallCounter, if rendering calls are counted
+        self.visible = False
+        self.panel = None
+        self.age = 0
+    
+    def toggle(self):
+        self.visible = not self.visible
+        self.panel = None
+    
+    def draw(self, screen):
+        """Draw the panel if shown; returns the rect drawn or None"""
+        if not self.visible:
+            return None
+        self.age += 1
+        if self.panel is None or self.age >= self.REFRESH:
+            self.panel = self.render_panel()
+            self.age = 0
+        return screen.blit(self.panel, (SCREEN_WIDTH - self.panel.get_width() - 5, 5))
+    
+    def render_panel(self):
+        percentiles = self.profiler.percentiles()
+        rows = [("phase", "p50", "p95", "p99")]
+        for name in profiling.COLUMNS:
+            values = percentiles.get(name)
+            if values and values[-1] >= 0.005:  # Skip phases that never run on this screen
+                rows.append((name,) + tuple(f"{value:.2f}" for value in values))
+        if self.draw_calls:
+            rows.extend((f"{kind} #", str(n)) for kind, n in self.draw_calls.last_frame().items())
+        line_height = self.font.get_linesize()
+        columns = (0, 95, 145, 195)
+        panel = pygame.Surface((245, line_height * len(rows) + 8), pygame.SRCALPHA)
+        panel.fill((0, 0, 0, 170))
+        for i, row in enumerate(rows):
+            color = (255, 215, 0) if i == 0 or row[0] in ('draw', 'frame') else (230, 230, 230)
+            for x, text in zip(columns, row):
+                panel.blit(self.font.render(text, True, color), (6 + x, 4 + i * line_height))
+        return panel
+
+class Game:
+    def __init__(self, dirty_rects=False, render_fps=FPS, seed=None, record_dir=None,
+                 startup_report=False, startup_budget=None, player_backend="sqlite", frame_stats=None,
+                 draw_calls=None, sample_profile=None, sample_rate=profiling.SamplingProfiler.RATE,
+                 spike_dir=None, spike_factor=profiling.SpikeDetector.FACTOR):
+        # Only what the home page needs is set up here; sounds load in the background
+        # and gameplay sprites when a level is picked
+        self.preloader = ThreadPoolExecutor(max_workers=1, thread_name_prefix="preload")
+        with startup.phase("display"):
+            pygame.display.init()
+            pygame.font.init()
+            self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+            pygame.display.set_caption("Flappy Bird - 4 Levels Edition")
+        self.sounds = SoundBank(self.preloader)
+        self.startup_report = startup_report  # Print the start-up phases after the first frame
+        self.startup_budget = startup_budget  # Exit after the first frame, failing if it took longer (ms)
+        self.exit_status = 0
+        self.frame_stats = frame_stats  # Export frame timings here (.csv or .json) on exit
+        self.draw_call_file = draw_calls  # Count rendering calls if not None; report them into this file if set
+        self.sample_dir = sample_profile  # Sample the game loop from the start if set; F4 toggles sampling
+        self.sample_rate = sample_rate
+        self.sampler = None
         self.clock = pygame.time.Clock()
+        self.timestep = FixedTimestep(FPS)  # Game logic always advances at FPS steps per second
+        self.render_fps = render_fps  # 0 renders as fast as possible
+        self.alpha = 1.0  # Interpolation between the last two steps for the frame being drawn
         
         # Player system
-        self.player_data = PlayerData()
+        with startup.phase("player data"):
+            self.player_data = open_player_data(player_backend)
         self.name_input_mode = False
         self.text_input = None
         self.show_home_page = True  # Start with home page
         
         # Level system
-        self.current_level = 1
-        self.level_config = LEVEL_CONFIG[self.current_level]
         self.level_selection = False  # Start with home page instead
         
         # Game states
         self.game_over_options = False  # New state for game over menu
         
-        # Game objects
-        self.bird = Bird(self.level_config['jump_strength'])
-        self.pipes = []
-        self.clouds = []
-        self.particles = []
-        self.score = 0  # Standard starting score
-        self.game_over = False
-        self.game_started = False
-        self.font = pygame.font.Font(None, 36)
-        self.big_font = pygame.font.Font(None, 72)
-        self.small_font = pygame.font.Font(None, 24)
+        # Random streams, all derived from one session seed so a session can be reproduced.
+        # Screen shake draws once per rendered frame, so it is kept apart from the per-step streams.
+        # (Sound effects use fixed seeds so they can come from the bake cache.)
+        self.seed = seed if seed is not None else random.getrandbits(32)
+        session_rng = random.Random(self.seed)
+        self.game_rng = random.Random(session_rng.getrandbits(64))  # Seeds for each new game
+        self.cloud_rng = random.Random(session_rng.getrandbits(64))
+        self.shake_rng = random.Random(session_rng.getrandbits(64))
+        
+        # Game objects (gameplay state lives in the simulation)
+        with startup.phase("game state"):
+            self.sim = GameSimulation(level=1, seed=self.game_rng.getrandbits(32))
+            self.pending_action = simulation.ACTION_NONE
+            self.replay = Replay(self.sim.level, self.sim.seed)  # Inputs of the current game
+            self.record_dir = record_dir  # Finished games are saved here as replays
+            self.clouds = []
+            self.retired_clouds = []
+            self.particles = ParticleSystem(seed=session_rng.getrandbits(64))
+        with startup.phase("fonts"):
+            self.font = pygame.font.Font(None, 36)
+            self.big_font = pygame.font.Font(None, 72)
+            self.small_font = pygame.font.Font(None, 24)
+        self.text_cache = TextCache()
+        self.profiler = profiling.FrameProfiler()
+        self.draw_calls = profiling.DrawCallCounter() if draw_calls is not None else None
+        self.frame_overlay = FrameStatsOverlay(self.profiler, self.small_font, self.draw_calls)
+        self.spikes = None  # Snapshots frames slower than spike_factor frame intervals into spike_dir
+        if spike_dir and spike_factor > 0:
+            self.spikes = profiling.SpikeDetector(self.profiler, 1000 / (render_fps or FPS), spike_dir,
+                                                  spike_factor, state=self.diagnostic_state)
         
         # Visual effects
         self.background_offset = 0
         self.score_animation = 0
         self.screen_shake = 0
+        with startup.phase("layers"):
+            self.layer_cache = LayerCache()
+            self.layer_cache.get_sky()
+            self.layer_cache.get_ground()
+        self.renderer = DirtyRectRenderer(enabled=dirty_rects)
         
-        # Zombie Bird Shooter mode (for Fantastic level)
-        self.shooter_mode = False
-        self.shooter_bird = None
-        self.zombie_manager = ZombieBirdManager()
-        self.bullets = []
-        self.mode_switch_score = 0  # Track when to switch modes
+        # Zombie Bird Shooter mode switch effect (for Fantastic level)
         self.mode_transition_effect = 0
-        self.shooter_score = 0  # Score in shooter mode
         
-        # Initialize sounds
-        try:
-            self.jump_sound = SoundGenerator.generate_jump_sound()
-            self.score_sound = SoundGenerator.generate_score_sound()
-            self.game_over_sound = SoundGenerator.generate_game_over_sound()
-            self.shooter_gun_sound = SoundGenerator.generate_shooter_gun_sound()
-            self.sounds_enabled = True
-            print("✓ Sound system initialized successfully!")
-        except Exception as e:
-            self.sounds_enabled = False
-            print(f"Sound initialization failed: {e}")
-            print("Running without sound.")
-        
-        # Add initial elements (only if in game)
-        if not (self.level_selection or self.show_home_page):
-            self.pipes.append(Pipe(SCREEN_WIDTH, self.level_config['pipe_gap'], self.level_config['pipe_speed']))
+        # Add initial elements
         for _ in range(3):
-            self.clouds.append(Cloud())
+            self.spawn_cloud()
+    
+    def spawn_cloud(self):
+        """Add a cloud, reusing a retired one when available"""
+        if self.retired_clouds:
+            cloud = self.retired_clouds.pop()
+            cloud.reset()
+        else:
+            cloud = Cloud(self.cloud_rng)
+        self.clouds.append(cloud)
         
     def handle_events(self):
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 return False
             
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                self.frame_overlay.toggle()
+                self.renderer.mark_all()
+                continue
+            
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_F4:
+                self.toggle_sampling()
+                continue
+            
             # Handle name input mode
             if self.name_input_mode and self.text_input:
                 result = self.text_input.handle_event(event)
@@ -827,46 +1509,17 @@ class Game:
                     elif event.key == pygame.K_ESCAPE:
                         self.back_to_home()
                 elif event.key == pygame.K_SPACE:
-                    if not self.game_over and not self.game_started:
-                        self.game_started = True
-                        if self.current_level == 4 and self.shooter_mode and self.shooter_bird:
-                            # Start shooting in shooter mode
-                            bullet = self.shooter_bird.shoot()
-                            if bullet:
-                                self.bullets.append(bullet)
-                                # Play shooter gun sound
-                                if self.sounds_enabled:
-                                    self.shooter_gun_sound.play()
-                        else:
-                            self.bird.jump()
-                            # Play jump sound
-                            if self.sounds_enabled:
-                                self.jump_sound.play()
-                    elif not self.game_over:
-                        if self.current_level == 4 and self.shooter_mode and self.shooter_bird:
-                            # Shoot bullets in shooter mode
-                            bullet = self.shooter_bird.shoot()
-                            if bullet:
-                                self.bullets.append(bullet)
-                                # Play shooter gun sound
-                                if self.sounds_enabled:
-                                    self.shooter_gun_sound.play()
-                        else:
-                            self.bird.jump()
-                            # Play jump sound
-                            if self.sounds_enabled:
-                                self.jump_sound.play()
+                    # Jump, or shoot in shooter mode (the simulation decides)
+                    if not self.sim.game_over:
+                        self.pending_action |= simulation.ACTION_FLAP
                 # Add UP and DOWN arrow key controls for shooter mode
+                # (a press nudges the bird once, then it keeps moving while the key is held)
                 elif event.key == pygame.K_UP:
-                    if (self.current_level == 4 and self.shooter_mode and self.shooter_bird and 
-                        not self.game_over and self.game_started):
-                        self.shooter_bird.move_up()
+                    self.pending_action |= simulation.ACTION_NUDGE_UP
                 elif event.key == pygame.K_DOWN:
-                    if (self.current_level == 4 and self.shooter_mode and self.shooter_bird and 
-                        not self.game_over and self.game_started):
-                        self.shooter_bird.move_down()
+                    self.pending_action |= simulation.ACTION_NUDGE_DOWN
                 elif event.key == pygame.K_ESCAPE:
-                    if self.game_started or self.game_over:
+                    if self.sim.started or self.sim.game_over:
                         self.back_to_home()
                     else:
                         return False
@@ -893,55 +1546,39 @@ class Game:
                         self.select_level(3)
                     elif 360 <= mouse_y <= 410:  # Level 4 area
                         self.select_level(4)
-                elif not self.game_over and not self.game_started:
-                    self.game_started = True
-                    if self.current_level == 4 and self.shooter_mode and self.shooter_bird:
-                        bullet = self.shooter_bird.shoot()
-                        if bullet:
-                            self.bullets.append(bullet)
-                            # Play shooter gun sound
-                            if self.sounds_enabled:
-                                self.shooter_gun_sound.play()
-                    else:
-                        self.bird.jump()
-                        # Play jump sound
-                        if self.sounds_enabled:
-                            self.jump_sound.play()
-                elif not self.game_over:
-                    if self.current_level == 4 and self.shooter_mode and self.shooter_bird:
-                        bullet = self.shooter_bird.shoot()
-                        if bullet:
-                            self.bullets.append(bullet)
-                            # Play shooter gun sound
-                            if self.sounds_enabled:
-                                self.shooter_gun_sound.play()
-                    else:
-                        self.bird.jump()
-                        # Play jump sound
-                        if self.sounds_enabled:
-                            self.jump_sound.play()
+                elif not self.sim.game_over:
+                    self.pending_action |= simulation.ACTION_FLAP
                 else:
                     self.restart_game()
         return True
     
     def select_level(self, level):
         """Select a game level and start the game"""
-        self.current_level = level
-        self.level_config = LEVEL_CONFIG[level]
         self.level_selection = False
-        self.game_started = False
-        self.game_over = False
-        self.score = 0
-        
-        # Create new bird and pipes with level settings
-        self.bird = Bird(self.level_config['jump_strength'])
-        self.pipes = [Pipe(SCREEN_WIDTH, self.level_config['pipe_gap'], self.level_config['pipe_speed'])]
-        self.particles = []
+        
+        # Finish loading what gameplay needs now rather than in the middle of a game
+        self.load_level_assets(level)
+        if self.spikes:
+            self.spikes.skip()  # This frame and the catch-up steps after it
+        
+        # Start a new game with the level's settings
+        self.new_game(level)
+        self.particles.clear()
         self.screen_shake = 0
         self.score_animation = 0
         
         # Update window caption
-        pygame.display.set_caption(f"Flappy Bird - Level {level} ({self.level_config['name']})")
+        pygame.display.set_caption(f"Flappy Bird - Level {level} ({self.sim.level_config['name']})")
+    
+    def load_level_assets(self, level):
+        """Make sure the sounds and sprites a level uses are ready"""
+        self.sounds.wait()
+        BirdSpriteSheet.shared()
+        if level == 4:
+            # Dark theme, and the shooter sprite needed at the first mode switch
+            self.layer_cache.get_sky(dark=True)
+            self.layer_cache.get_ground(dark=True)
+            BirdSpriteSheet.shared().get_shooter(ShooterBird(0, 0).size)
     
     def back_to_level_selection(self):
         """Return to level selection screen"""
@@ -949,8 +1586,6 @@ class Game:
         self.show_home_page = False
         self.game_over_options = False
         self.name_input_mode = False
-        self.game_started = False
-        self.game_over = False
         pygame.display.set_caption("Flappy Bird - Select Level")
     
     def back_to_home(self):
@@ -959,8 +1594,6 @@ class Game:
         self.level_selection = False
         self.game_over_options = False
         self.name_input_mode = False
-        self.game_started = False
-        self.game_over = False
         pygame.display.set_caption("Flappy Bird - Home")
     
     def handle_game_over(self):
@@ -971,68 +1604,62 @@ class Game:
             self.text_input = TextInput(SCREEN_WIDTH//2 - 100, SCREEN_HEIGHT//2, 200, 30, self.font)
         else:
             # Update player data and show options
-            self.player_data.update_score(self.current_level, self.score)
+            self.player_data.update_score(self.sim.level, self.sim.score)
             self.game_over_options = True
     
+    def handle_simulation_events(self, events):
+        """Play sounds and effects for what happened in a simulation step"""
+        for event in events:
+            kind = event[0]
+            if kind == simulation.EVENT_JUMP:
+                self.sounds.play('jump')
+            elif kind == simulation.EVENT_SHOOT:
+                self.sounds.play('shooter_gun')
+            elif kind == simulation.EVENT_PIPE_PASSED:
+                self.score_animation = 20
+                self.add_score_particles(event[1], event[2])
+                self.sounds.play('score')
+            elif kind == simulation.EVENT_ZOMBIES_KILLED:
+                self.score_animation = 30
+                self.sounds.play('score')
+            elif kind == simulation.EVENT_SHOOTER_HIT:
+                self.screen_shake = 10
+            elif kind == simulation.EVENT_MODE_SWITCH:
+                self.mode_transition_effect = 30
+                self.sim.save_positions()  # Entities jump on a mode switch; don't blend across it
+            elif kind == simulation.EVENT_CRASH:
+                self.sim.save_positions()  # Nothing moves after a crash; draw where it ended
+                self.save_replay()
+                self.screen_shake = 15
+                self.add_explosion_particles(event[1], event[2])
+                self.sounds.play('game_over')
+                self.handle_game_over()
+    
     def add_explosion_particles(self, x, y):
         """Add explosion particles when bird crashes"""
-        for _ in range(15):
-            self.particles.append(Particle(x, y, (255, 100, 100)))
+        self.particles.emit(x, y, (255, 100, 100), 15)
     
     def add_score_particles(self, x, y):
         """Add particles when scoring"""
-        for _ in range(8):
-            self.particles.append(Particle(x, y, (255, 255, 0)))
+        self.particles.emit(x, y, (255, 255, 0), 8)
     
     def draw_gradient_background(self):
         """Draw gradient background with parallax effect"""
         # Use dark theme for Fantastic level
-        if self.current_level == 4:
-            for y in range(SCREEN_HEIGHT - 50):
-                ratio = y / (SCREEN_HEIGHT - 50)
-                color = [
-                    int(GRADIENT_DARK[0][i] * (1 - ratio) + GRADIENT_DARK[2][i] * ratio)
-                    for i in range(3)
-                ]
-                pygame.draw.line(self.screen, color, (0, y), (SCREEN_WIDTH, y))
-        else:
-            for y in range(SCREEN_HEIGHT - 50):
-                # Create gradient from light blue to darker blue
-                ratio = y / (SCREEN_HEIGHT - 50)
-                color = [
-                    int(GRADIENT_BLUE[0][i] * (1 - ratio) + GRADIENT_BLUE[2][i] * ratio)
-                    for i in range(3)
-                ]
-                pygame.draw.line(self.screen, color, (0, y), (SCREEN_WIDTH, y))
+        self.screen.blit(self.layer_cache.get_sky(self.sim.level == 4), (0, 0))
     
     def draw_ground(self):
         """Draw detailed ground with texture"""
         ground_y = SCREEN_HEIGHT - 50
-        
-        # Use dark theme colors for Fantastic level
-        if self.current_level == 4:
-            ground_colors = DARK_GROUND_COLORS
-            texture_color = (60, 60, 70)
-        else:
-            ground_colors = GROUND_COLORS
-            texture_color = (100, 50, 0)
-        
-        # Draw ground layers with gradient
-        for i in range(50):
-            ratio = i / 50
-            if ratio < 0.3:
-                color = ground_colors[0]
-            elif ratio < 0.7:
-                color = ground_colors[1]
-            else:
-                color = ground_colors[2]
-            pygame.draw.line(self.screen, color, (0, ground_y + i), (SCREEN_WIDTH, ground_y + i))
-        
-        # Add ground details/texture
-        for x in range(0, SCREEN_WIDTH, 20):
-            offset_x = (x + self.background_offset) % 40
-            pygame.draw.line(self.screen, texture_color, 
-                           (offset_x, ground_y), (offset_x, SCREEN_HEIGHT), 2)
+        dark = self.sim.level == 4
+        self.screen.blit(self.layer_cache.get_ground(dark), (0, ground_y))
+        
+        # Add ground details/texture (the stripes only land on a couple of
+        # distinct columns, so draw each column once)
+        texture_color = self.layer_cache.get_texture_color(dark)
+        for offset_x in sorted({(x + self.background_offset) % 40 for x in range(0, SCREEN_WIDTH, 20)}):
+            self.renderer.mark(pygame.draw.line(self.screen, texture_color, 
+                                                (offset_x, ground_y), (offset_x, SCREEN_HEIGHT), 2))
     
     def draw_level_selection(self):
         """Draw the level selection screen"""
@@ -1041,10 +1668,10 @@ class Game:
         
         # Draw clouds
         for cloud in self.clouds:
-            cloud.draw(self.screen)
+            self.renderer.mark(cloud.draw(self.screen, self.alpha))
         
         # Draw title
-        title_text = self.big_font.render("SELECT LEVEL", True, (255, 255, 255))
+        title_text = self.text_cache.render(self.big_font, "SELECT LEVEL", (255, 255, 255))
         title_rect = title_text.get_rect(center=(SCREEN_WIDTH//2, 80))
         self.screen.blit(title_text, title_rect)
         
@@ -1073,7 +1700,7 @@ class Game:
                 pygame.draw.rect(self.screen, config['color'], button_rect, 3)
             
             # Level info text
-            level_text = self.font.render(f"Level {level}: {config['name']}", True, config['color'])
+            level_text = self.text_cache.render(self.font, f"Level {level}: {config['name']}", config['color'])
             level_rect = level_text.get_rect(center=(SCREEN_WIDTH//2, y + 10))
             self.screen.blit(level_text, level_rect)
             
@@ -1088,18 +1715,18 @@ class Game:
                 details = "Fantastic - Dark theme, Zombie Bird Shooter mode!"
             
             detail_color = (255, 215, 0) if level == 4 else (200, 200, 200)
-            detail_text = self.small_font.render(details, True, detail_color)
+            detail_text = self.text_cache.render(self.small_font, details, detail_color)
             detail_rect = detail_text.get_rect(center=(SCREEN_WIDTH//2, y + 25))
             self.screen.blit(detail_text, detail_rect)
             
             # High score for this level
             stats = self.player_data.get_player_stats()
             if stats and stats['high_scores'][level] > 0:
-                score_text = self.small_font.render(f"Best: {stats['high_scores'][level]}", True, (255, 215, 0))
-                self.screen.blit(score_text, (SCREEN_WIDTH - 100, y + 10))
+                self.text_cache.draw_number(self.screen, self.small_font, "Best: ", stats['high_scores'][level],
+                                            (255, 215, 0), topleft=(SCREEN_WIDTH - 100, y + 10))
         
         # Instructions
-        instruction_text = self.small_font.render("Press 1, 2, 3, or 4 to select level | Click on level | ESC: Home", True, (180, 180, 180))
+        instruction_text = self.text_cache.render(self.small_font, "Press 1, 2, 3, or 4 to select level | Click on level | ESC: Home", (180, 180, 180))
         instruction_rect = instruction_text.get_rect(center=(SCREEN_WIDTH//2, 430))
         self.screen.blit(instruction_text, instruction_rect)
     
@@ -1112,7 +1739,7 @@ class Game:
         
         # Draw clouds (minimal animation)
         for cloud in self.clouds:
-            cloud.draw(self.screen)
+            self.renderer.mark(cloud.draw(self.screen, self.alpha))
         
         # Draw ground
         self.draw_ground()
@@ -1122,16 +1749,17 @@ class Game:
         title_bounce = int(math.sin(time_offset * 1.2) * 1)  # Very subtle bounce
         
         # Main title with clean shadow
-        shadow_text = self.big_font.render("FLAPPY BIRD", True, (80, 80, 80))
+        shadow_text = self.text_cache.render(self.big_font, "FLAPPY BIRD", (80, 80, 80))
         shadow_rect = shadow_text.get_rect(center=(SCREEN_WIDTH//2 + 2, 70 + title_bounce + 2))
         self.screen.blit(shadow_text, shadow_rect)
         
-        title_text = self.big_font.render("FLAPPY BIRD", True, (255, 215, 0))
+        title_text = self.text_cache.render(self.big_font, "FLAPPY BIRD", (255, 215, 0))
         title_rect = title_text.get_rect(center=(SCREEN_WIDTH//2, 70 + title_bounce))
         self.screen.blit(title_text, title_rect)
+        self.renderer.mark(title_rect.union(shadow_rect).inflate(0, 4))  # Covers the bounce range
         
         # Simplified subtitle
-        subtitle_text = self.small_font.render("Multi-Level Adventure with Zombie Shooter", True, (220, 220, 220))
+        subtitle_text = self.text_cache.render(self.small_font, "Multi-Level Adventure with Zombie Shooter", (220, 220, 220))
         subtitle_rect = subtitle_text.get_rect(center=(SCREEN_WIDTH//2, 105))
         self.screen.blit(subtitle_text, subtitle_rect)
         
@@ -1155,7 +1783,7 @@ class Game:
         pygame.draw.rect(self.screen, (100, 100, 150), panel_rect, 2)
         
         # Section title
-        title_text = self.small_font.render("SELECT DIFFICULTY LEVEL", True, (255, 255, 255))
+        title_text = self.text_cache.render(self.small_font, "SELECT DIFFICULTY LEVEL", (255, 255, 255))
         title_rect = title_text.get_rect(center=(SCREEN_WIDTH//2, section_y + 15))
         self.screen.blit(title_text, title_rect)
         
@@ -1190,11 +1818,11 @@ class Game:
             pygame.draw.rect(self.screen, level["color"], box_rect, 2)
             
             # Level number and name
-            num_text = self.small_font.render(str(level["num"]), True, (255, 255, 255))
+            num_text = self.text_cache.render(self.small_font, str(level["num"]), (255, 255, 255))
             num_rect = num_text.get_rect(center=(x + box_width//2, y + 12))
             self.screen.blit(num_text, num_rect)
             
-            name_text = self.small_font.render(level["name"], True, (255, 255, 255))
+            name_text = self.text_cache.render(self.small_font, level["name"], (255, 255, 255))
             name_rect = name_text.get_rect(center=(x + box_width//2, y + 28))
             self.screen.blit(name_text, name_rect)
     
@@ -1221,10 +1849,15 @@ class Game:
         self.screen.blit(panel_surface, (40, section_y))
         pygame.draw.rect(self.screen, (100, 150, 100), panel_rect, 2)
         
-        # Player name with nice styling
-        player_text = self.small_font.render(f"PLAYER: {self.player_data.current_player.upper()}", True, (255, 255, 100))
+        # Player name with nice styling, and overall rank once the leaderboard has loaded
+        player_line = f"PLAYER: {self.player_data.current_player.upper()}"
+        rank = self.player_data.get_rank()
+        if rank:
+            player_line += f"  #{rank[0]} OF {rank[1]}"
+        player_text = self.text_cache.render(self.small_font, player_line, (255, 255, 100))
         player_rect = player_text.get_rect(center=(SCREEN_WIDTH//2, section_y + 18))
         self.screen.blit(player_text, player_rect)
+        self.renderer.mark(player_rect)  # The rank can appear or change between frames
         
         # Best scores in organized layout
         y_offset = section_y + 40
@@ -1247,14 +1880,13 @@ class Game:
             pygame.draw.rect(self.screen, level_color, level_rect, 2)
             
             # Level number
-            level_text = self.small_font.render(f"L{level}", True, (255, 255, 255))
+            level_text = self.text_cache.render(self.small_font, f"L{level}", (255, 255, 255))
             level_text_rect = level_text.get_rect(center=(x + 32, y_offset + 10))
             self.screen.blit(level_text, level_text_rect)
             
             # Score
-            score_text = self.small_font.render(str(score), True, (255, 255, 255))
-            score_text_rect = score_text.get_rect(center=(x + 32, y_offset + 22))
-            self.screen.blit(score_text, score_text_rect)
+            self.text_cache.draw_number(self.screen, self.small_font, "", score, (255, 255, 255),
+                                        center=(x + 32, y_offset + 22))
 
     def draw_tidy_start_section(self, time_offset):
         """Draw a tidy and organized start instruction section"""
@@ -1271,9 +1903,10 @@ class Game:
         
         # Animated "START" indicator with subtle bounce
         bounce = int(math.sin(time_offset * 3) * 3)
-        start_text = self.font.render("▶ START GAME", True, (255, 255, 100))
+        start_text = self.text_cache.render(self.font, "▶ START GAME", (255, 255, 100))
         start_rect = start_text.get_rect(center=(SCREEN_WIDTH//2, section_y + 20 + bounce))
         self.screen.blit(start_text, start_rect)
+        self.renderer.mark(start_rect.inflate(0, 12))  # Covers the bounce range
         
         # Control instructions in clean format
         controls = [
@@ -1286,26 +1919,26 @@ class Game:
             x = SCREEN_WIDTH//2 - 120 + i * 80
             y = section_y + 50
             
-            control_text = self.small_font.render(control, True, (200, 200, 200))
+            control_text = self.text_cache.render(self.small_font, control, (200, 200, 200))
             control_rect = control_text.get_rect(center=(x, y))
             self.screen.blit(control_text, control_rect)
         
         # Subtle pulsing bottom border
         pulse = int(abs(math.sin(time_offset * 2)) * 100 + 155)
         bottom_y = section_y + section_height + 5
-        pygame.draw.line(self.screen, (pulse, pulse//2, pulse), 
-                        (80, bottom_y), (SCREEN_WIDTH-80, bottom_y), 3)
+        self.renderer.mark(pygame.draw.line(self.screen, (pulse, pulse//2, pulse), 
+                                            (80, bottom_y), (SCREEN_WIDTH-80, bottom_y), 3))
 
     def draw_clean_leaderboard(self):
         """Draw a clean leaderboard"""
-        if not self.player_data.players:
-            welcome_text = self.font.render("🌟 Welcome! Your scores will appear here 🌟", True, (200, 200, 200))
+        if not self.player_data.has_players():
+            welcome_text = self.text_cache.render(self.font, "🌟 Welcome! Your scores will appear here 🌟", (200, 200, 200))
             welcome_rect = welcome_text.get_rect(center=(SCREEN_WIDTH//2, 370))
             self.screen.blit(welcome_text, welcome_rect)
             return
         
         # Leaderboard title
-        leaderboard_title = self.font.render("🏆 Top Players", True, (255, 215, 0))
+        leaderboard_title = self.text_cache.render(self.font, "🏆 Top Players", (255, 215, 0))
         leaderboard_rect = leaderboard_title.get_rect(center=(SCREEN_WIDTH//2, 350))
         self.screen.blit(leaderboard_title, leaderboard_rect)
         
@@ -1318,7 +1951,7 @@ class Game:
             medal = medals[i] if i < len(medals) else "🏅"
             
             player_text = f"{medal} {name}: {data['total_score']} pts"
-            player_surface = self.small_font.render(player_text, True, (255, 255, 255))
+            player_surface = self.text_cache.render(self.small_font, player_text, (255, 255, 255))
             player_rect = player_surface.get_rect(center=(SCREEN_WIDTH//2, y))
             self.screen.blit(player_surface, player_rect)
     
@@ -1353,12 +1986,12 @@ class Game:
             pygame.draw.rect(self.screen, feature["color"], bg_rect, 2)
             
             # Icon
-            icon_text = self.font.render(feature["icon"], True, feature["color"])
+            icon_text = self.text_cache.render(self.font, feature["icon"], feature["color"])
             icon_rect = icon_text.get_rect(center=(x, y_pos + bounce))
             self.screen.blit(icon_text, icon_rect)
             
             # Feature text
-            text_surface = self.small_font.render(feature["text"], True, (255, 255, 255))
+            text_surface = self.text_cache.render(self.small_font, feature["text"], (255, 255, 255))
             text_rect = text_surface.get_rect(center=(x, y_pos + bounce + 25))
             self.screen.blit(text_surface, text_rect)
     
@@ -1386,10 +2019,10 @@ class Game:
         pygame.draw.rect(self.screen, border_color, (card_x, card_y, card_width, card_height), 3)
         
         # Player name with crown
-        crown_text = self.font.render("👑", True, (255, 215, 0))
+        crown_text = self.text_cache.render(self.font, "👑", (255, 215, 0))
         self.screen.blit(crown_text, (card_x + 10, card_y + 10))
         
-        name_text = self.small_font.render(f"{self.player_data.current_player}", True, (255, 215, 0))
+        name_text = self.text_cache.render(self.small_font, f"{self.player_data.current_player}", (255, 215, 0))
         self.screen.blit(name_text, (card_x + 35, card_y + 15))
         
         # Level scores with animated icons
@@ -1399,28 +2032,28 @@ class Game:
             
             # Animated icon
             icon_bounce = int(math.sin(time_offset * 3 + i * 0.3) * 2)
-            icon_text = self.small_font.render(level_icons[i], True, LEVEL_CONFIG[level]['color'])
+            icon_text = self.text_cache.render(self.small_font, level_icons[i], LEVEL_CONFIG[level]['color'])
             self.screen.blit(icon_text, (card_x + 10, y + icon_bounce))
             
             # Score
-            score_text = self.small_font.render(f"Level {level}: {stats['high_scores'][level]}", True, (255, 255, 255))
+            score_text = self.text_cache.render(self.small_font, f"Level {level}: {stats['high_scores'][level]}", (255, 255, 255))
             self.screen.blit(score_text, (card_x + 35, y))
         
         # Total score with sparkle effect
         total_y = card_y + card_height - 25
-        sparkle_text = self.small_font.render("✨", True, (255, 255, 255))
+        sparkle_text = self.text_cache.render(self.small_font, "✨", (255, 255, 255))
         self.screen.blit(sparkle_text, (card_x + 10, total_y))
         
-        total_text = self.small_font.render(f"Total: {stats['total_score']}", True, (255, 215, 0))
+        total_text = self.text_cache.render(self.small_font, f"Total: {stats['total_score']}", (255, 215, 0))
         self.screen.blit(total_text, (card_x + 35, total_y))
     
     def draw_beautiful_leaderboard(self, time_offset):
         """Draw beautiful animated leaderboard"""
-        if not self.player_data.players:
+        if not self.player_data.has_players():
             # Welcome message with animation
             welcome_pulse = abs(math.sin(time_offset))
             welcome_color = (255, int(200 + welcome_pulse * 55), int(200 + welcome_pulse * 55))
-            welcome_text = self.font.render("🌟 Welcome to Flappy Bird! 🌟", True, welcome_color)
+            welcome_text = self.text_cache.render_tinted(self.font, "🌟 Welcome to Flappy Bird! 🌟", welcome_color)
             welcome_rect = welcome_text.get_rect(center=(SCREEN_WIDTH//2, 250))
             self.screen.blit(welcome_text, welcome_rect)
             return
@@ -1429,12 +2062,12 @@ class Game:
         top_players = self.player_data.get_top_players(3)
         if top_players:
             # Title with glow
-            leaderboard_text = self.font.render("🏆 Hall of Fame 🏆", True, (255, 215, 0))
+            leaderboard_text = self.text_cache.render(self.font, "🏆 Hall of Fame 🏆", (255, 215, 0))
             leaderboard_rect = leaderboard_text.get_rect(center=(SCREEN_WIDTH//2, 220))
             
             # Glow effect
             for offset in [(1, 1), (-1, -1), (1, -1), (-1, 1)]:
-                glow_text = self.font.render("🏆 Hall of Fame 🏆", True, (200, 150, 0))
+                glow_text = self.text_cache.render(self.font, "🏆 Hall of Fame 🏆", (200, 150, 0))
                 glow_rect = glow_text.get_rect(center=(SCREEN_WIDTH//2 + offset[0], 220 + offset[1]))
                 self.screen.blit(glow_text, glow_rect)
             self.screen.blit(leaderboard_text, leaderboard_rect)
@@ -1453,11 +2086,11 @@ class Game:
                 self.screen.blit(entry_surface, entry_bg)
                 
                 # Medal and player info
-                medal_text = self.small_font.render(medals[i], True, (255, 255, 255))
+                medal_text = self.text_cache.render(self.small_font, medals[i], (255, 255, 255))
                 self.screen.blit(medal_text, (SCREEN_WIDTH//2 - 100, y + entry_bounce))
                 
                 player_info = f"{name} - {data['total_score']} pts"
-                player_text = self.small_font.render(player_info, True, (255, 255, 255))
+                player_text = self.text_cache.render(self.small_font, player_info, (255, 255, 255))
                 self.screen.blit(player_text, (SCREEN_WIDTH//2 - 70, y + entry_bounce))
     
     def draw_fantastic_showcase(self):
@@ -1492,24 +2125,24 @@ class Game:
         title_pulse = abs(math.sin(time_offset * 1.5))
         title_color = (255, int(215 + title_pulse * 40), int(title_pulse * 255))
         
-        fantastic_text = self.font.render("✨ FANTASTIC LEVEL ✨", True, title_color)
+        fantastic_text = self.text_cache.render_tinted(self.font, "✨ FANTASTIC LEVEL ✨", title_color)
         fantastic_rect = fantastic_text.get_rect(center=(SCREEN_WIDTH//2, showcase_y + 25))
         
         # Glow effect
         for offset in [(2, 2), (-2, -2), (2, -2), (-2, 2)]:
-            glow_text = self.font.render("✨ FANTASTIC LEVEL ✨", True, (100, 50, 150))
+            glow_text = self.text_cache.render(self.font, "✨ FANTASTIC LEVEL ✨", (100, 50, 150))
             glow_rect = glow_text.get_rect(center=(SCREEN_WIDTH//2 + offset[0], showcase_y + 25 + offset[1]))
             self.screen.blit(glow_text, glow_rect)
         self.screen.blit(fantastic_text, fantastic_rect)
         
         # Subtitle
-        subtitle_text = self.small_font.render("🌙 Dark Theme • 🎮 Dual Game Modes • ⚡ Auto-Switch Every 10 Points", True, (200, 255, 255))
+        subtitle_text = self.text_cache.render(self.small_font, "🌙 Dark Theme • 🎮 Dual Game Modes • ⚡ Auto-Switch Every 10 Points", (200, 255, 255))
         subtitle_rect = subtitle_text.get_rect(center=(SCREEN_WIDTH//2, showcase_y + 50))
         self.screen.blit(subtitle_text, subtitle_rect)
         
         # Mode indicators
-        flappy_text = self.small_font.render("🐦 Flappy Mode", True, (255, 215, 0))
-        shooter_text = self.small_font.render("🧟 Zombie Shooter", True, (255, 100, 100))
+        flappy_text = self.text_cache.render(self.small_font, "🐦 Flappy Mode", (255, 215, 0))
+        shooter_text = self.text_cache.render(self.small_font, "🧟 Zombie Shooter", (255, 100, 100))
         
         flappy_rect = flappy_text.get_rect(center=(SCREEN_WIDTH//2 - 80, showcase_y + 75))
         shooter_rect = shooter_text.get_rect(center=(SCREEN_WIDTH//2 + 80, showcase_y + 75))
@@ -1527,7 +2160,7 @@ class Game:
         # Call to action
         cta_pulse = abs(math.sin(time_offset * 2))
         cta_color = (255, 255, int(150 + cta_pulse * 105))
-        cta_text = self.small_font.render("Press 4 or click Level 4 to experience the magic!", True, cta_color)
+        cta_text = self.text_cache.render_tinted(self.small_font, "Press 4 or click Level 4 to experience the magic!", cta_color)
         cta_rect = cta_text.get_rect(center=(SCREEN_WIDTH//2, showcase_y + 95))
         self.screen.blit(cta_text, cta_rect)
         
@@ -1551,13 +2184,12 @@ class Game:
         # Draw game background with overlay
         self.draw_gradient_background()
         for cloud in self.clouds:
-            cloud.draw(self.screen)
+            self.renderer.mark(cloud.draw(self.screen, self.alpha))
         self.draw_ground()
-        for pipe in self.pipes:
-            pipe.draw(self.screen)
-        for particle in self.particles:
-            particle.draw(self.screen)
-        self.bird.draw(self.screen)
+        for pipe in self.sim.pipes:
+            pipe.draw(self.screen, self.alpha)
+        self.renderer.mark(self.particles.draw(self.screen))
+        self.sim.bird.draw(self.screen, self.alpha)
         
         # Semi-transparent overlay
         overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
@@ -1566,26 +2198,25 @@ class Game:
         self.screen.blit(overlay, (0, 0))
         
         # Game over text
-        game_over_text = self.big_font.render("GAME OVER", True, (255, 100, 100))
+        game_over_text = self.text_cache.render(self.big_font, "GAME OVER", (255, 100, 100))
         game_over_rect = game_over_text.get_rect(center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//2 - 100))
         self.screen.blit(game_over_text, game_over_rect)
         
         # Score
-        score_text = self.font.render(f"Score: {self.score}", True, WHITE)
-        score_rect = score_text.get_rect(center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//2 - 60))
-        self.screen.blit(score_text, score_rect)
+        self.text_cache.draw_number(self.screen, self.font, "Score: ", self.sim.score, WHITE,
+                                    center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//2 - 60))
         
         # Name input instruction
-        instruction_text = self.font.render("Enter your name:", True, WHITE)
+        instruction_text = self.text_cache.render(self.font, "Enter your name:", WHITE)
         instruction_rect = instruction_text.get_rect(center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//2 - 20))
         self.screen.blit(instruction_text, instruction_rect)
         
         # Draw text input
         if self.text_input:
-            self.text_input.draw(self.screen)
+            self.renderer.mark(self.text_input.draw(self.screen))
         
         # Instructions
-        enter_text = self.small_font.render("Press ENTER to continue", True, (180, 180, 180))
+        enter_text = self.text_cache.render(self.small_font, "Press ENTER to continue", (180, 180, 180))
         enter_rect = enter_text.get_rect(center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//2 + 50))
         self.screen.blit(enter_text, enter_rect)
     
@@ -1594,13 +2225,12 @@ class Game:
         # Draw game background with overlay
         self.draw_gradient_background()
         for cloud in self.clouds:
-            cloud.draw(self.screen)
+            self.renderer.mark(cloud.draw(self.screen, self.alpha))
         self.draw_ground()
-        for pipe in self.pipes:
-            pipe.draw(self.screen)
-        for particle in self.particles:
-            particle.draw(self.screen)
-        self.bird.draw(self.screen)
+        for pipe in self.sim.pipes:
+            pipe.draw(self.screen, self.alpha)
+        self.renderer.mark(self.particles.draw(self.screen))
+        self.sim.bird.draw(self.screen, self.alpha)
         
         # Semi-transparent overlay
         overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
@@ -1610,29 +2240,28 @@ class Game:
         
         # Game over text with glow
         for offset in [(2, 2), (-2, -2), (2, -2), (-2, 2)]:
-            glow_text = self.big_font.render("GAME OVER", True, (100, 0, 0))
+            glow_text = self.text_cache.render(self.big_font, "GAME OVER", (100, 0, 0))
             glow_rect = glow_text.get_rect(center=(SCREEN_WIDTH//2 + offset[0], 80 + offset[1]))
             self.screen.blit(glow_text, glow_rect)
         
-        game_over_text = self.big_font.render("GAME OVER", True, (255, 100, 100))
+        game_over_text = self.text_cache.render(self.big_font, "GAME OVER", (255, 100, 100))
         game_over_rect = game_over_text.get_rect(center=(SCREEN_WIDTH//2, 80))
         self.screen.blit(game_over_text, game_over_rect)
         
         # Player and score info
         if self.player_data.current_player:
-            player_text = self.font.render(f"Player: {self.player_data.current_player}", True, (255, 215, 0))
+            player_text = self.text_cache.render(self.font, f"Player: {self.player_data.current_player}", (255, 215, 0))
             player_rect = player_text.get_rect(center=(SCREEN_WIDTH//2, 120))
             self.screen.blit(player_text, player_rect)
         
-        score_text = self.font.render(f"Score: {self.score}", True, WHITE)
-        score_rect = score_text.get_rect(center=(SCREEN_WIDTH//2, 150))
-        self.screen.blit(score_text, score_rect)
+        self.text_cache.draw_number(self.screen, self.font, "Score: ", self.sim.score, WHITE,
+                                    center=(SCREEN_WIDTH//2, 150))
         
         # Check for new best
         if self.player_data.current_player:
             stats = self.player_data.get_player_stats()
-            if stats and self.score == stats['high_scores'][self.current_level] and self.score > 0:
-                new_best_text = self.font.render("NEW BEST!", True, (255, 215, 0))
+            if stats and self.sim.score == stats['high_scores'][self.sim.level] and self.sim.score > 0:
+                new_best_text = self.text_cache.render(self.font, "NEW BEST!", (255, 215, 0))
                 new_best_rect = new_best_text.get_rect(center=(SCREEN_WIDTH//2, 180))
                 self.screen.blit(new_best_text, new_best_rect)
         
@@ -1652,12 +2281,12 @@ class Game:
             pygame.draw.rect(self.screen, color, button_rect, 2)
             
             # Button text
-            button_text = self.font.render(text, True, color)
+            button_text = self.text_cache.render(self.font, text, color)
             button_text_rect = button_text.get_rect(center=(SCREEN_WIDTH//2, y))
             self.screen.blit(button_text, button_text_rect)
         
         # Instructions
-        instruction_text = self.small_font.render("Press 1, 2, or 3 | Click on option | ESC: Home", True, (180, 180, 180))
+        instruction_text = self.text_cache.render(self.small_font, "Press 1, 2, or 3 | Click on option | ESC: Home", (180, 180, 180))
         instruction_rect = instruction_text.get_rect(center=(SCREEN_WIDTH//2, 450))
         self.screen.blit(instruction_text, instruction_rect)
     
@@ -1675,280 +2304,185 @@ class Game:
         if self.score_animation > 0:
             self.score_animation -= 1
         
-        # Always update clouds
-        for cloud in self.clouds[:]:
+        # Update mode transition flash
+        if self.mode_transition_effect > 0:
+            self.mode_transition_effect -= 1
+        
+        # Always update clouds, retiring off-screen ones for reuse
+        for cloud in self.clouds:
             cloud.update()
-            if cloud.is_off_screen():
-                self.clouds.remove(cloud)
+        if any(cloud.is_off_screen() for cloud in self.clouds):
+            self.retired_clouds.extend(cloud for cloud in self.clouds if cloud.is_off_screen())
+            self.clouds = [cloud for cloud in self.clouds if not cloud.is_off_screen()]
         
         # Add new clouds
-        if random.randint(0, 200) == 0:
-            self.clouds.append(Cloud())
+        if self.cloud_rng.randint(0, 200) == 0:
+            self.spawn_cloud()
         
         # Update text input if in name input mode
         if self.name_input_mode and self.text_input:
             self.text_input.update()
         
+        # Settle positions for interpolation, also while the game is paused behind a menu
+        self.sim.save_positions()
+        
         # Don't update game logic if not in game
         if self.level_selection or self.show_home_page or self.game_over_options:
             return
         
-        if not self.game_over and self.game_started:
-            # Handle mode switching for Fantastic level (Level 4) - Zombie Bird Shooter
-            if self.current_level == 4:
-                # Check if we need to switch modes every 10 points
-                if self.score > 0 and self.score % 10 == 0 and self.score != self.mode_switch_score:
-                    self.mode_switch_score = self.score
-                    self.shooter_mode = not self.shooter_mode
-                    self.mode_transition_effect = 30
-                    
-                    if self.shooter_mode:
-                        # Switch to Zombie Bird Shooter mode
-                        self.shooter_bird = ShooterBird(self.bird.x, self.bird.y)
-                        self.shooter_score = 0
-                        self.pipes.clear()  # Remove all pipes
-                        self.bullets.clear()  # Clear any existing bullets
-                        self.zombie_manager.clear()  # Clear any existing zombies
-                        # Ensure bird stops updating in shooter mode
-                        self.bird.velocity = 0
-                    else:
-                        # Switch back to Flappy Bird mode
-                        if self.shooter_bird:
-                            self.bird.x = self.shooter_bird.x
-                            self.bird.y = self.shooter_bird.y
-                            self.bird.velocity = 0
-                        self.shooter_bird = None
-                        self.bullets.clear()
-                        self.zombie_manager.clear()
-                        # Ensure zombie manager is completely reset
-                        self.zombie_manager = ZombieBirdManager()
-                        # Add a pipe
-                        self.pipes.append(Pipe(SCREEN_WIDTH, self.level_config['pipe_gap'], self.level_config['pipe_speed']))
-            
-            # Update based on current mode
-            if self.current_level == 4 and self.shooter_mode:
-                # Zombie Bird Shooter mode updates
-                if self.shooter_bird:
-                    self.shooter_bird.update()
-                    
-                    # Handle continuous key presses for smooth movement
-                    keys = pygame.key.get_pressed()
-                    if keys[pygame.K_UP]:
-                        self.shooter_bird.move_up()
-                    if keys[pygame.K_DOWN]:
-                        self.shooter_bird.move_down()
-                    # Note: SPACE key shooting is handled in event system to prevent conflicts
-                    
-                    # Update zombie manager
-                    self.zombie_manager.update()
-                    
-                    # Update bullets
-                    for bullet in self.bullets[:]:
-                        bullet.update()
-                        if not bullet.active:
-                            self.bullets.remove(bullet)
-                    
-                    # Check bullet-zombie collisions
-                    hits = self.zombie_manager.check_bullet_collisions(self.bullets)
-                    if hits > 0:
-                        self.shooter_score += hits
-                        self.score += hits  # Also increase main score
-                        self.score_animation = 30
-                        if self.sounds_enabled:
-                            self.score_sound.play()
-                    
-                    # Check shooter-zombie collisions
-                    if self.zombie_manager.check_shooter_collision(self.shooter_bird):
-                        self.screen_shake = 10
-                        if self.shooter_bird.health <= 0:
-                            if not self.game_over:
-                                self.game_over = True
-                                self.screen_shake = 15
-                                self.add_explosion_particles(self.shooter_bird.x, self.shooter_bird.y)
-                                if self.sounds_enabled:
-                                    self.game_over_sound.play()
-                                self.handle_game_over()
-                    
-                    # Check if shooter hits boundaries
-                    if self.shooter_bird.y < 30 or self.shooter_bird.y > SCREEN_HEIGHT - 80:
-                        if not self.game_over:
-                            self.game_over = True
-                            self.screen_shake = 15
-                            self.add_explosion_particles(self.shooter_bird.x, self.shooter_bird.y)
-                            if self.sounds_enabled:
-                                self.game_over_sound.play()
-                            self.handle_game_over()
-            else:
-                # Normal Flappy Bird mode - only run when NOT in shooter mode
-                self.bird.update()
-                
-                # Check if bird hits ground or ceiling (only in flappy bird mode)
-                if self.bird.y > SCREEN_HEIGHT - 50 - self.bird.radius or self.bird.y < self.bird.radius:
-                    if not self.game_over:  # Only play sound once
-                        self.game_over = True
-                        self.screen_shake = 15
-                        self.add_explosion_particles(self.bird.x, self.bird.y)
-                        if self.sounds_enabled:
-                            self.game_over_sound.play()
-                        self.handle_game_over()
-                
-                # Update pipes (only in flappy bird mode)
-                for pipe in self.pipes[:]:
-                    pipe.update()
-                    
-                    # Check collision
-                    if pipe.collides_with(self.bird):
-                        if not self.game_over:  # Only play sound once
-                            self.game_over = True
-                            self.screen_shake = 15
-                            self.add_explosion_particles(self.bird.x, self.bird.y)
-                            if self.sounds_enabled:
-                                self.game_over_sound.play()
-                            self.handle_game_over()
-                    
-                    # Check if bird passed pipe
-                    if not pipe.passed and pipe.x + PIPE_WIDTH < self.bird.x:
-                        pipe.passed = True
-                        self.score += 1
-                        self.score_animation = 20
-                        self.add_score_particles(pipe.x + PIPE_WIDTH // 2, self.bird.y)
-                        if self.sounds_enabled:
-                            self.score_sound.play()
-                    
-                    # Remove off-screen pipes
-                    if pipe.is_off_screen():
-                        self.pipes.remove(pipe)
-                
-                # Add new pipes (with progressive difficulty) - only in flappy bird mode
-                pipe_spacing = max(250, 350 - self.score * 3)  # Increased base spacing and slower progression
-                if len(self.pipes) == 0 or self.pipes[-1].x < SCREEN_WIDTH - pipe_spacing:
-                    self.pipes.append(Pipe(SCREEN_WIDTH, self.level_config['pipe_gap'], self.level_config['pipe_speed']))
+        # Feed this frame's input to the simulation; arrow keys act while held
+        action = self.pending_action
+        self.pending_action = simulation.ACTION_NONE
+        keys = pygame.key.get_pressed()
+        if keys[pygame.K_UP]:
+            action |= simulation.ACTION_UP
+        if keys[pygame.K_DOWN]:
+            action |= simulation.ACTION_DOWN
+        if not self.sim.game_over:
+            self.replay.record(action)
+        self.handle_simulation_events(self.sim.step(action))
         
         # Update particles
-        for particle in self.particles[:]:
-            particle.update()
-            if not particle.is_alive():
-                self.particles.remove(particle)
+        self.particles.update()
     
-    def draw(self):
+    def draw(self, alpha=1.0):
+        self.alpha = alpha
+        
+        # Any state change repaints the whole display in dirty-rect mode
+        self.renderer.begin_frame((self.show_home_page, self.level_selection, self.name_input_mode,
+                                   self.game_over_options, self.sim.level, self.sim.shooter_mode,
+                                   self.sim.started, self.sim.game_over, self.mode_transition_effect > 0))
         if self.show_home_page:
             self.draw_home_page()
-            pygame.display.flip()
+            self.profiler.lap('menu')
+            self.present()
             return
         elif self.level_selection:
             self.draw_level_selection()
-            pygame.display.flip()
+            self.profiler.lap('menu')
+            self.present()
             return
         elif self.name_input_mode:
             self.draw_name_input()
-            pygame.display.flip()
+            self.profiler.lap('menu')
+            self.present()
             return
         elif self.game_over_options:
             self.draw_game_over_options()
-            pygame.display.flip()
+            self.profiler.lap('menu')
+            self.present()
             return
             
         # Calculate screen shake offset
-        shake_x = random.randint(-self.screen_shake, self.screen_shake) if self.screen_shake > 0 else 0
-        shake_y = random.randint(-self.screen_shake, self.screen_shake) if self.screen_shake > 0 else 0
+        shake_x = self.shake_rng.randint(-self.screen_shake, self.screen_shake) if self.screen_shake > 0 else 0
+        shake_y = self.shake_rng.randint(-self.screen_shake, self.screen_shake) if self.screen_shake > 0 else 0
         
         # Draw gradient background
         self.draw_gradient_background()
+        self.profiler.lap('background')
         
         # Draw clouds
         for cloud in self.clouds:
-            cloud.draw(self.screen)
+            self.renderer.mark(cloud.draw(self.screen, self.alpha))
+        self.profiler.lap('clouds')
         
         # Draw ground
         self.draw_ground()
+        self.profiler.lap('ground')
         
         # Draw based on current mode
-        if self.current_level == 4 and self.shooter_mode:
+        if self.sim.level == 4 and self.sim.shooter_mode:
             # Draw zombie birds
-            self.zombie_manager.draw(self.screen)
+            for zombie_rect in self.sim.zombie_manager.draw(self.screen, self.alpha):
+                self.renderer.mark(zombie_rect)
             
             # Draw bullets
-            for bullet in self.bullets:
-                bullet.draw(self.screen)
+            for bullet in self.sim.bullets:
+                self.renderer.mark(bullet.draw(self.screen, self.alpha))
             
             # Draw shooter bird
-            if self.shooter_bird:
-                self.shooter_bird.draw(self.screen)
+            if self.sim.shooter_bird:
+                self.renderer.mark(self.sim.shooter_bird.draw(self.screen, self.alpha))
             
             # Draw mode indicator
-            mode_text = self.small_font.render("🧟 ZOMBIE BIRD SHOOTER MODE 🧟", True, (255, 100, 100))
+            mode_text = self.text_cache.render(self.small_font, "🧟 ZOMBIE BIRD SHOOTER MODE 🧟", (255, 100, 100))
             mode_rect = mode_text.get_rect(center=(SCREEN_WIDTH//2, 30))
             self.screen.blit(mode_text, mode_rect)
             
             # Draw shooter score
-            shooter_score_text = self.small_font.render(f"Zombies Killed: {self.shooter_score}", True, (255, 255, 100))
-            shooter_score_rect = shooter_score_text.get_rect(center=(SCREEN_WIDTH//2, 50))
-            self.screen.blit(shooter_score_text, shooter_score_rect)
+            self.renderer.mark(self.text_cache.draw_number(self.screen, self.small_font, "Zombies Killed: ",
+                                                           self.sim.shooter_score, (255, 255, 100),
+                                                           center=(SCREEN_WIDTH//2, 50)))
             
             # Draw controls hint
-            controls_text = self.small_font.render("↑↓ Move | SPACE/Click Shoot", True, (200, 200, 200))
+            controls_text = self.text_cache.render(self.small_font, "↑↓ Move | SPACE/Click Shoot", (200, 200, 200))
             controls_rect = controls_text.get_rect(center=(SCREEN_WIDTH//2, SCREEN_HEIGHT - 30))
             self.screen.blit(controls_text, controls_rect)
+            self.profiler.lap('shooter')
         else:
             # Draw pipes
-            for pipe in self.pipes:
-                pipe.draw(self.screen)
+            for pipe in self.sim.pipes:
+                self.renderer.mark(pipe.draw(self.screen, self.alpha))
+            self.profiler.lap('pipes')
             
             # Draw bird
-            self.bird.draw(self.screen)
+            self.renderer.mark(self.sim.bird.draw(self.screen, self.alpha))
+            self.profiler.lap('bird')
         
         # Draw particles
-        for particle in self.particles:
-            particle.draw(self.screen)
+        self.renderer.mark(self.particles.draw(self.screen))
+        self.profiler.lap('particles')
         
         # Mode transition effect
         if self.mode_transition_effect > 0:
-            self.mode_transition_effect -= 1
             alpha = int(255 * (self.mode_transition_effect / 30))
             overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
             overlay.set_alpha(alpha)
             overlay.fill((255, 255, 255))
             self.screen.blit(overlay, (0, 0))
+            self.renderer.mark_all()
             
             # Transition text
             if self.mode_transition_effect > 15:
-                if self.shooter_mode:
-                    transition_text = self.font.render("SWITCHING TO ZOMBIE SHOOTER!", True, (0, 0, 0))
+                if self.sim.shooter_mode:
+                    transition_text = self.text_cache.render(self.font, "SWITCHING TO ZOMBIE SHOOTER!", (0, 0, 0))
                 else:
-                    transition_text = self.font.render("SWITCHING TO FLAPPY BIRD!", True, (0, 0, 0))
+                    transition_text = self.text_cache.render(self.font, "SWITCHING TO FLAPPY BIRD!", (0, 0, 0))
                 transition_rect = transition_text.get_rect(center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//2))
                 self.screen.blit(transition_text, transition_rect)
+        self.profiler.lap('effects')
         
         # Draw level indicator
-        level_text = self.small_font.render(f"Level {self.current_level} - {self.level_config['name']}", True, self.level_config['color'])
-        self.screen.blit(level_text, (10 + shake_x, 10 + shake_y))
+        level_text = self.text_cache.render(self.small_font, f"Level {self.sim.level} - {self.sim.level_config['name']}", self.sim.level_config['color'])
+        self.renderer.mark(self.screen.blit(level_text, (10 + shake_x, 10 + shake_y)))
         
         # Draw score with animation
         score_scale = 1.0 + (self.score_animation / 20) * 0.3
         score_color = (255, 255, 255) if self.score_animation == 0 else (255, 255, 100)
         
         # Draw score shadow
-        score_text = self.font.render(f"Score: {self.score}", True, (50, 50, 50))
-        self.screen.blit(score_text, (12 + shake_x, 37 + shake_y))
+        self.renderer.mark(self.text_cache.draw_number(self.screen, self.font, "Score: ", self.sim.score, (50, 50, 50),
+                                                       topleft=(12 + shake_x, 37 + shake_y)))
         
         # Draw main score
-        score_text = self.font.render(f"Score: {self.score}", True, score_color)
         if score_scale != 1.0:
-            # Scale the text for animation
-            scaled_size = (int(score_text.get_width() * score_scale), 
-                          int(score_text.get_height() * score_scale))
-            score_text = pygame.transform.scale(score_text, scaled_size)
-        self.screen.blit(score_text, (10 + shake_x, 35 + shake_y))
+            # Scale the text for animation (cached per animation step)
+            score_text = self.text_cache.render(self.font, f"Score: {self.sim.score}", score_color, score_scale)
+            self.renderer.mark(self.screen.blit(score_text, (10 + shake_x, 35 + shake_y)))
+        else:
+            self.renderer.mark(self.text_cache.draw_number(self.screen, self.font, "Score: ", self.sim.score, score_color,
+                                                           topleft=(10 + shake_x, 35 + shake_y)))
         
         # Draw high score for current level
         if self.player_data.current_player:
             stats = self.player_data.get_player_stats()
-            if stats and stats['high_scores'][self.current_level] > 0:
-                high_score_text = self.small_font.render(f"Best: {stats['high_scores'][self.current_level]}", True, (200, 200, 200))
-                self.screen.blit(high_score_text, (10 + shake_x, 75 + shake_y))
+            if stats and stats['high_scores'][self.sim.level] > 0:
+                self.renderer.mark(self.text_cache.draw_number(self.screen, self.small_font, "Best: ",
+                                                               stats['high_scores'][self.sim.level], (200, 200, 200),
+                                                               topleft=(10 + shake_x, 75 + shake_y)))
         
         # Draw start instructions
-        if not self.game_started and not self.game_over:
+        if not self.sim.started and not self.sim.game_over:
             # Semi-transparent overlay
             overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
             overlay.set_alpha(100)
@@ -1956,63 +2490,251 @@ class Game:
             self.screen.blit(overlay, (0, 0))
             
             # Welcome text
-            welcome_text = self.big_font.render("Flappy Bird", True, (255, 215, 0))
+            welcome_text = self.text_cache.render(self.big_font, "Flappy Bird", (255, 215, 0))
             welcome_rect = welcome_text.get_rect(center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//2 - 60))
             self.screen.blit(welcome_text, welcome_rect)
             
             # Instructions
-            instruction1 = self.font.render("Press SPACE or Click to Start", True, WHITE)
+            instruction1 = self.text_cache.render(self.font, "Press SPACE or Click to Start", WHITE)
             instruction1_rect = instruction1.get_rect(center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//2))
             self.screen.blit(instruction1, instruction1_rect)
             
-            instruction2 = self.small_font.render("Navigate through the pipes!", True, (200, 200, 200))
+            instruction2 = self.text_cache.render(self.small_font, "Navigate through the pipes!", (200, 200, 200))
             instruction2_rect = instruction2.get_rect(center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//2 + 30))
             self.screen.blit(instruction2, instruction2_rect)
             
-            instruction3 = self.small_font.render("Avoid hitting pipes and ground", True, (200, 200, 200))
+            instruction3 = self.text_cache.render(self.small_font, "Avoid hitting pipes and ground", (200, 200, 200))
             instruction3_rect = instruction3.get_rect(center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//2 + 50))
             self.screen.blit(instruction3, instruction3_rect)
+        self.profiler.lap('hud')
         
-
-        
-        pygame.display.flip()
+        self.present()
+    
+    def present(self):
+        """Draw the frame-time overlay, if shown, and put the frame on the display"""
+        self.renderer.mark(self.frame_overlay.draw(self.screen))
+        self.profiler.lap('overlay')
+        self.renderer.present()
+        self.profiler.lap('flip')
+    
+    def new_game(self, level=None):
+        """Reset the simulation with a fresh seed and start recording its inputs"""
+        self.sim.reset(level, seed=self.game_rng.getrandbits(32))
+        self.pending_action = simulation.ACTION_NONE
+        self.replay = Replay(self.sim.level, self.sim.seed)
+    
+    def save_replay(self):
+        """Write the finished game's replay into record_dir"""
+        self.replay.score = self.sim.score
+        if not self.record_dir:
+            return
+        try:
+            os.makedirs(self.record_dir, exist_ok=True)
+            name = (f"{datetime.now():%Y%m%d-%H%M%S}-level{self.replay.level}-score{self.replay.score}"
+                    f"-{self.replay.seed:08x}{REPLAY_EXTENSION}")
+            self.replay.save(os.path.join(self.record_dir, name))
+        except OSError as e:
+            print(f"Could not save replay: {e}")
     
     def restart_game(self):
-        self.bird = Bird(self.level_config['jump_strength'])
-        self.pipes = [Pipe(SCREEN_WIDTH, self.level_config['pipe_gap'], self.level_config['pipe_speed'])]
-        self.particles = []
-        self.score = 0  # Standard starting score
-        self.game_over = False
+        self.new_game()
+        self.particles.clear()
         self.game_over_options = False
         self.name_input_mode = False
         self.show_home_page = False
         self.level_selection = False
-        self.game_started = False
         self.screen_shake = 0
         self.score_animation = 0
-        
-        # Reset zombie shooter mode
-        self.shooter_mode = False
-        self.shooter_bird = None
-        self.bullets = []
-        self.zombie_manager = ZombieBirdManager()
-        self.shooter_score = 0
-        self.mode_switch_score = 0
         self.mode_transition_effect = 0
     
     def run(self):
         running = True
+        self.clock.tick()  # Don't count start-up time as a backlog of steps
+        if self.draw_calls:
+            self.draw_calls.start()
+        if self.sample_dir is not None:
+            self.toggle_sampling()
         while running:
+            self.profiler.begin_frame()
+            if self.draw_calls:
+                self.draw_calls.begin_frame()
             running = self.handle_events()
-            self.update()
-            self.draw()
-            self.clock.tick(FPS)
-        
+            self.profiler.lap('events')
+            
+            # Run as many fixed steps as real time calls for, then draw in between them
+            elapsed = self.wait_for_frame()
+            self.profiler.lap('wait')
+            for _ in range(self.timestep.advance(elapsed)):
+                self.update()
+            self.profiler.lap('update')
+            self.draw(self.timestep.alpha)
+            self.profiler.end_frame()
+            if self.draw_calls:
+                self.draw_calls.end_frame()
+            if self.spikes:
+                self.spikes.check()
+            if startup.first_frame_ms is None:
+                running = self.first_frame_drawn() and running
+        
+        if self.frame_stats:
+            self.export_frame_stats()
+        if self.draw_calls:
+            self.report_draw_calls()
+        if self.sampler:
+            self.toggle_sampling()
+        self.close()
         pygame.quit()
-        sys.exit()
+        sys.exit(self.exit_status)
+    
+    def close(self):
+        """Finish background loading and write out the player data"""
+        self.preloader.shutdown()
+        self.player_data.close()
+        if self.spikes:
+            self.spikes.close()
+    
+    def diagnostic_state(self):
+        """What the game was doing, for frame spike snapshots"""
+        sim = self.sim
+        return {
+            'show_home_page': self.show_home_page,
+            'level_selection': self.level_selection,
+            'game_over_options': self.game_over_options,
+            'name_input_mode': self.name_input_mode,
+            'level': sim.level,
+            'started': sim.started,
+            'game_over': sim.game_over,
+            'shooter_mode': sim.shooter_mode,
+            'score': sim.score,
+            'entities': {
+                'pipes': len(sim.pipes),
+                'particles': len(self.particles),
+                'bullets': len(sim.bullets),
+                'zombies': len(sim.zombie_manager.zombie_birds),
+                'clouds': len(self.clouds),
+            },
+            'screen_shake': self.screen_shake,
+            'render_fps': self.render_fps,
+            'sampling': self.sampler is not None,
+            'persistence': self.player_data.persistence_stats(),
+        }
+    
+    def wait_for_frame(self):
+        """Sleep until the next frame is due; returns the seconds since the last one"""
+        return self.clock.tick(self.render_fps) / 1000
+    
+    def toggle_sampling(self):
+        """Start the sampling profiler, or stop it and write out what it caught"""
+        if self.sampler is None:
+            self.sampler = profiling.SamplingProfiler(self.sample_rate)
+            self.sampler.start()
+            print(f"Sampling profiler started ({self.sample_rate} Hz); F4 stops it")
+            return
+        self.sampler.stop()
+        print(self.sampler.report())
+        try:
+            path = self.sampler.write(self.sample_dir or ".")
+            print(f"Wrote collapsed stacks to {path}")
+        except OSError as e:
+            print(f"Could not write the profile: {e}")
+        self.sampler = None
+    
+    def export_frame_stats(self):
+        try:
+            self.profiler.export(self.frame_stats)
+            print(f"Wrote timings of the last {len(self.profiler)} frames to {self.frame_stats}")
+        except OSError as e:
+            print(f"Could not write frame timings: {e}")
+    
+    def report_draw_calls(self):
+        self.draw_calls.stop()
+        print(self.draw_calls.report())
+        if not self.draw_call_file:
+            return
+        try:
+            self.draw_calls.export(self.draw_call_file)
+            print(f"Wrote rendering call counts to {self.draw_call_file}")
+        except OSError as e:
+            print(f"Could not write rendering call counts: {e}")
+    
+    def first_frame_drawn(self):
+        """Report start-up once the first frame is up; returns False to stop the game"""
+        startup.mark_first_frame()
+        if self.startup_report or self.startup_budget is not None:
+            self.preloader.shutdown()  # Include the background phases in the report
+            print(startup.report())
+        if self.startup_budget is None:
+            return True
+        if startup.first_frame_ms > self.startup_budget:
+            print(f"Start-up budget exceeded: {startup.first_frame_ms:.1f} ms > {self.startup_budget} ms")
+            self.exit_status = 1
+        return False
+
+def prebake_assets(path):
+    """Bake the sounds, sky and ground layers and bird sprites into a bake cache file"""
+    if os.path.exists(path):
+        os.remove(path)
+    bake_cache.path = path
+    pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    init_mixer()
+    layer_cache = LayerCache()
+    for dark in (False, True):
+        layer_cache.get_sky(dark)
+        layer_cache.get_ground(dark)
+    BirdSpriteSheet.shared().get_shooter(ShooterBird(0, 0).size)
+    for generate in (SoundGenerator.generate_jump_sound, SoundGenerator.generate_score_sound,
+                     SoundGenerator.generate_game_over_sound, SoundGenerator.generate_shooter_gun_sound):
+        generate()
+    print(f"Baked {bake_cache.misses} assets into {path} ({os.path.getsize(path) // 1024} KB)")
 
 if __name__ == "__main__":
-    game = Game()
+    parser = argparse.ArgumentParser(description="Flappy Bird - 4 Levels Edition")
+    parser.add_argument("--dirty-rects", action="store_true",
+                        help="only push changed screen regions to the display (faster on software renderers)")
+    parser.add_argument("--render-fps", type=int, default=FPS,
+                        help=f"frame rate cap for drawing, 0 for uncapped; game logic always runs at {FPS} steps/s")
+    parser.add_argument("--seed", type=int, help="session seed, to reproduce a session exactly")
+    parser.add_argument("--record", metavar="DIR", help=f"save every finished game as a replay ({REPLAY_EXTENSION}) in DIR")
+    parser.add_argument("--prebake", metavar="FILE", help="bake all startup assets into FILE and exit (used by flappy_bird.spec)")
+    parser.add_argument("--player-store", choices=("sqlite", "json"), default="sqlite",
+                        help=f"where player records are kept (default sqlite: {player_store.DB_FILE}, "
+                             f"importing {player_store.JSON_FILE} the first time)")
+    parser.add_argument("--frame-stats", metavar="FILE",
+                        help="on exit, write per-phase timings of the last frames to FILE (.csv, or .json with a summary)")
+    parser.add_argument("--startup-report", action="store_true",
+                        help="print how long each start-up phase took once the first frame is drawn")
+    parser.add_argument("--startup-budget", type=float, nargs="?", const=StartupProfiler.BUDGET_MS, metavar="MS",
+                        help=f"exit after the first frame, with status 1 if it took longer than MS "
+                             f"(default {StartupProfiler.BUDGET_MS}); used by flappy_bird.spec")
+    parser.add_argument("--draw-calls", nargs="?", const="", metavar="FILE",
+                        help="count draw calls, blits, text renders and new surfaces per frame by calling method; "
+                             "print them on exit and write them to FILE (.json) if given (slows the game down)")
+    parser.add_argument("--sample-profile", nargs="?", const=".", metavar="DIR",
+                        default=os.environ.get("FLAPPY_SAMPLE_PROFILE"),
+                        help="sample the game loop's stack from the start (F4 starts and stops it at any time) and "
+                             "write collapsed stacks for flame graphs to DIR (default: the current directory, "
+                             "or $FLAPPY_SAMPLE_PROFILE)")
+    parser.add_argument("--sample-rate", type=int, metavar="HZ",
+                        default=int(os.environ.get("FLAPPY_SAMPLE_RATE", profiling.SamplingProfiler.RATE)),
+                        help=f"stack samples per second (default {profiling.SamplingProfiler.RATE}, "
+                             f"or $FLAPPY_SAMPLE_RATE)")
+    parser.add_argument("--spike-dir", metavar="DIR", default=os.environ.get("FLAPPY_SPIKE_DIR"),
+                        help="write a diagnostic snapshot to DIR whenever a frame runs over budget "
+                             "(default: $FLAPPY_SPIKE_DIR; off if neither is set)")
+    parser.add_argument("--spike-factor", type=float, default=profiling.SpikeDetector.FACTOR, metavar="X",
+                        help=f"a frame counts as a spike when its work takes over X frame intervals "
+                             f"(default {profiling.SpikeDetector.FACTOR}; 0 turns spike capture off)")
+    args = parser.parse_args()
+    
+    if args.prebake:
+        prebake_assets(args.prebake)
+        sys.exit()
+    
+    game = Game(dirty_rects=args.dirty_rects, render_fps=args.render_fps, seed=args.seed, record_dir=args.record,
+                startup_report=args.startup_report, startup_budget=args.startup_budget,
+                player_backend=args.player_store, frame_stats=args.frame_stats, draw_calls=args.draw_calls,
+                sample_profile=args.sample_profile, sample_rate=args.sample_rate,
+                spike_dir=args.spike_dir, spike_factor=args.spike_factor)
     game.run()
 
 
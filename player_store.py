@@ -0,0 +1,591 @@
+"""SQLite player store
+
+Keeps the same records as the legacy player_data.json, but one row per
+player and one per (player, level), so finishing a game updates a couple
+of rows instead of rewriting every player's data:
+
+    players(id, name, total_score, last_played)
+    level_stats(player_id, level, high_score, games_played)
+    credited_replays(key, player, credited_at)
+
+Both stores save through WriteBehind, a background thread that batches
+changed records, so the game loop never waits on the disk. The database
+runs in WAL mode, so reads never wait for those writes either. The first
+time a database is created next to a legacy JSON file, its players are
+imported; it can also be done by hand:
+
+    python player_store.py migrate player_data.json player_data.db
+
+SqlitePlayerStore has the same interface as flappy_bird.PlayerData.
+"""
+import argparse
+import atexit
+import bisect
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+from simulation import LEVEL_CONFIG
+
+DB_FILE = "player_data.db"
+JSON_FILE = "player_data.json"
+LEDGER_FILE = "credited_replays.txt"  # The JSON store's ledger of credited replays
+SCHEMA_VERSION = 1
+LEVELS = tuple(sorted(LEVEL_CONFIG))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS players (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    total_score INTEGER NOT NULL DEFAULT 0,
+    last_played TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS level_stats (
+    player_id INTEGER NOT NULL REFERENCES players(id) ON DELETE CASCADE,
+    level INTEGER NOT NULL,
+    high_score INTEGER NOT NULL DEFAULT 0,
+    games_played INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (player_id, level)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS credited_replays (
+    key TEXT PRIMARY KEY,
+    player TEXT NOT NULL,
+    credited_at TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS players_by_total ON players(total_score DESC, id);
+CREATE INDEX IF NOT EXISTS players_by_last_played ON players(last_played DESC);
+CREATE INDEX IF NOT EXISTS level_stats_by_score ON level_stats(level, high_score DESC);
+"""
+
+def timestamp():
+    return datetime.now().strftime("%Y-%m-%d %H:%M")
+
+def read_legacy_json(path):
+    """Read player_data.json into {name: record} with integer level keys
+    
+    Older saves round-tripped level keys through JSON as strings and ended
+    up with duplicate "4" keys; the last value of a duplicate wins, as it
+    did when the file was loaded by json.load.
+    """
+    with open(path, 'r') as f:
+        data = json.load(f)
+    players = {}
+    for name, record in data.items():
+        players[name] = {
+            'high_scores': {int(level): score for level, score in record.get('high_scores', {}).items()},
+            'games_played': {int(level): count for level, count in record.get('games_played', {}).items()},
+            'total_score': record.get('total_score', 0),
+            'last_played': record.get('last_played', ""),
+        }
+    return players
+
+def new_record():
+    return {
+        'high_scores': {level: 0 for level in LEVELS},
+        'games_played': {level: 0 for level in LEVELS},
+        'total_score': 0,
+        'last_played': timestamp(),
+    }
+
+def copy_record(record):
+    return dict(record, high_scores=dict(record['high_scores']), games_played=dict(record['games_played']))
+
+def record_game(record, level, score):
+    """Add a finished game to a player record; returns True for a new high score"""
+    new_high = score > record['high_scores'].get(level, 0)
+    if new_high:
+        record['high_scores'][level] = score
+    record['games_played'][level] = record['games_played'].get(level, 0) + 1
+    record['total_score'] += score
+    record['last_played'] = timestamp()
+    return new_high
+
+def write_json_atomic(path, data):
+    """Replace a JSON file so that readers see either the old or the new contents, never half of one"""
+    temp_path = path + ".tmp"
+    with open(temp_path, 'w') as f:
+        json.dump(data, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+class Leaderboard:
+    """Players ordered by one score, kept sorted as scores change
+    
+    Ties keep the order players were added in, as a stable sort by score
+    would. Top-k is a slice of the sorted entries; rank and percentile are
+    binary searches, so neither re-sorts anything.
+    """
+    def __init__(self):
+        self.entries = []  # (-score, order added, name); best first
+        self.keys = {}  # name -> entry
+        self.added = 0
+    
+    def __len__(self):
+        return len(self.entries)
+    
+    def __contains__(self, name):
+        return name in self.keys
+    
+    def extend(self, scores):
+        """Add many (name, score) pairs at once, in tie-break order"""
+        for name, score in scores:
+            if name in self.keys:
+                self.update(name, score)
+                continue
+            entry = (-score, self.added, name)
+            self.added += 1
+            self.keys[name] = entry
+            self.entries.append(entry)
+        self.entries.sort()  # Nearly free when the pairs arrive best first
+    
+    def update(self, name, score):
+        old = self.keys.get(name)
+        if old is not None:
+            if old[0] == -score:
+                return
+            del self.entries[bisect.bisect_left(self.entries, old)]
+            order = old[1]
+        else:
+            order = self.added
+            self.added += 1
+        entry = (-score, order, name)
+        self.keys[name] = entry
+        bisect.insort(self.entries, entry)
+    
+    def top(self, k):
+        """The k best as (name, score)"""
+        return [(name, -negated) for negated, order, name in self.entries[:k]]
+    
+    def rank(self, name):
+        """1 + the number of players with a higher score, or None if unranked"""
+        entry = self.keys.get(name)
+        if entry is None:
+            return None
+        return bisect.bisect_left(self.entries, (entry[0],)) + 1
+    
+    def percentile(self, name):
+        """Percentile rank: the share of players scoring lower, counting ties as half"""
+        entry = self.keys.get(name)
+        if entry is None:
+            return None
+        higher = bisect.bisect_left(self.entries, (entry[0],))
+        lower = len(self.entries) - bisect.bisect_right(self.entries, (entry[0], float('inf')))
+        tied = len(self.entries) - higher - lower
+        return 100 * (lower + tied / 2) / len(self.entries)
+
+class LeaderboardIndex:
+    """A Leaderboard by total score and one per level by high score"""
+    def __init__(self):
+        self.total = Leaderboard()
+        self.levels = {level: Leaderboard() for level in LEVELS}
+    
+    def board(self, level=None):
+        if level is None:
+            return self.total
+        return self.levels.setdefault(level, Leaderboard())
+    
+    def extend(self, records):
+        """Index (name, record) pairs, best total first for the cheapest sort"""
+        records = list(records)
+        self.total.extend((name, record['total_score']) for name, record in records)
+        for level in set(LEVELS).union(*(record['high_scores'] for name, record in records)):
+            self.board(level).extend((name, record['high_scores'].get(level, 0)) for name, record in records)
+    
+    def update(self, name, record):
+        """Re-index one player after their record changed"""
+        self.total.update(name, record['total_score'])
+        for level, high_score in record['high_scores'].items():
+            self.board(level).update(name, high_score)
+
+class WriteBehind:
+    """Saves player records on a background thread
+    
+    The game hands over a copy of each record it changes. The writer waits
+    DELAY seconds for more changes to pile up, keeping only the latest copy
+    per player, then passes the batch to write() in one go. The game never
+    waits on the disk except in flush() and close().
+    """
+    DELAY = 1.0  # Seconds to collect changes before writing
+    
+    def __init__(self, write, delay=DELAY, finish=None):
+        self.write = write  # write({name: record}), called on the writer thread
+        self.finish = finish  # finish(), called on the writer thread after the last write
+        self.delay = delay
+        self.pending = {}
+        self.in_flight = 0  # Records in the batch being written
+        self.flush_requested = False
+        self.closing = False
+        self.condition = threading.Condition()
+        
+        # Metrics
+        self.submitted = 0
+        self.coalesced = 0  # Submissions replaced by a newer copy before being written
+        self.flushes = 0
+        self.records_written = 0
+        self.errors = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        
+        self.thread = threading.Thread(target=self.run, name="player-writer", daemon=True)
+        self.thread.start()
+        atexit.register(self.close)
+    
+    def submit(self, name, record):
+        """Queue a record (a copy the caller won't change again) to be written"""
+        with self.condition:
+            if name in self.pending:
+                self.coalesced += 1
+            self.pending[name] = record
+            self.submitted += 1
+            self.condition.notify_all()
+    
+    def run(self):
+        while True:
+            with self.condition:
+                self.condition.wait_for(lambda: self.pending or self.closing)
+                if not self.pending:
+                    break  # Closing with nothing left to write
+                # Debounce: give further changes a chance to join this batch
+                self.condition.wait_for(lambda: self.flush_requested or self.closing, timeout=self.delay)
+                batch, self.pending = self.pending, {}
+                self.in_flight = len(batch)
+                self.flush_requested = False
+            
+            start = time.perf_counter()
+            try:
+                self.write(batch)
+                failed = False
+            except Exception as e:
+                failed = True
+                print(f"Could not save player data: {e}")
+            elapsed = (time.perf_counter() - start) * 1000
+            
+            with self.condition:
+                if failed:
+                    self.errors += 1
+                    if not self.closing:
+                        # Try again with the next batch, unless a newer copy is already queued
+                        for name, record in batch.items():
+                            self.pending.setdefault(name, record)
+                else:
+                    self.flushes += 1
+                    self.records_written += len(batch)
+                    self.last_flush_ms = elapsed
+                    self.max_flush_ms = max(self.max_flush_ms, elapsed)
+                self.in_flight = 0
+                self.condition.notify_all()
+        
+        if self.finish:
+            try:
+                self.finish()
+            except Exception as e:
+                print(f"Could not close player data: {e}")
+    
+    def flush(self, timeout=None):
+        """Write everything queued now and wait for it; returns False on timeout"""
+        with self.condition:
+            self.flush_requested = True
+            self.condition.notify_all()
+            return self.condition.wait_for(lambda: not self.pending and not self.in_flight
+                                           or not self.thread.is_alive(), timeout)
+    
+    def close(self, timeout=10):
+        """Write what is queued and stop the thread"""
+        with self.condition:
+            self.closing = True
+            self.condition.notify_all()
+        if self.thread.is_alive() and self.thread is not threading.current_thread():
+            self.thread.join(timeout)
+    
+    def stats(self):
+        with self.condition:
+            return {
+                'queue_depth': len(self.pending) + self.in_flight,
+                'submitted': self.submitted,
+                'coalesced': self.coalesced,
+                'flushes': self.flushes,
+                'records_written': self.records_written,
+                'errors': self.errors,
+                'last_flush_ms': self.last_flush_ms,
+                'max_flush_ms': self.max_flush_ms,
+            }
+
+class SqlitePlayerStore:
+    """Player records in SQLite, with the PlayerData interface"""
+    def __init__(self, path=DB_FILE, legacy_json=JSON_FILE):
+        self.path = path
+        self.current_player = ""
+        self.db = self.connect()  # Reads, on the game's thread
+        with self.db:
+            self.db.executescript(SCHEMA)
+        
+        # Records of players loaded this session are kept in memory and are the
+        # latest word on them; changes reach the database through the writer thread
+        self.records = {}
+        self.writer = WriteBehind(self.write_records, finish=self.close_writer_db)
+        self.writer_db = None  # Opened on the writer thread
+        
+        # The leaderboard index is read in on a background thread; until then
+        # the top players come straight from the database
+        self.leaderboard = None
+        self.loaded_leaderboard = None
+        self.leaderboard_loaded = threading.Event()
+        self.leaderboard_thread = None
+        
+        if legacy_json and self.get_meta('schema_version') is None:
+            # A new database: import the legacy file once, if there is one
+            if os.path.exists(legacy_json):
+                try:
+                    migrate_json(legacy_json, self)
+                except (OSError, ValueError, AttributeError) as e:
+                    print(f"Could not import {legacy_json}: {e}")
+        if self.get_meta('schema_version') is None:
+            with self.db:
+                self.set_meta('schema_version', SCHEMA_VERSION)
+        if self.leaderboard_thread is None:  # Not already started by the import
+            self.load_leaderboard_in_background()
+    
+    def connect(self):
+        db = sqlite3.connect(self.path)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")  # WAL stays consistent; a power cut may lose the last game
+        db.execute("PRAGMA foreign_keys=ON")
+        return db
+    
+    def get_meta(self, key):
+        row = self.db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+    
+    def set_meta(self, key, value):
+        self.db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+    
+    def changed(self):
+        self.leaderboard = None
+        self.load_leaderboard_in_background()
+    
+    def add_player(self, name, high_scores=None, games_played=None, total_score=0, last_played=None):
+        """Insert a player and their per-level rows; call inside a transaction"""
+        cursor = self.db.execute(
+            "INSERT INTO players (name, total_score, last_played) VALUES (?, ?, ?) "
+            "ON CONFLICT(name) DO NOTHING",
+            (name, total_score, last_played or timestamp()))
+        if not cursor.rowcount:
+            return False
+        player_id = cursor.lastrowid
+        high_scores = high_scores or {}
+        games_played = games_played or {}
+        self.db.executemany(
+            "INSERT INTO level_stats (player_id, level, high_score, games_played) VALUES (?, ?, ?, ?)",
+            [(player_id, level, high_scores.get(level, 0), games_played.get(level, 0))
+             for level in sorted(set(LEVELS) | set(high_scores) | set(games_played))])
+        return True
+    
+    def set_current_player(self, name):
+        """Set the current player and initialize if new"""
+        self.current_player = name.strip().title()
+        if self.current_player not in self.records:
+            record = self.load_player(self.current_player)
+            self.records[self.current_player] = record or new_record()
+            if record is None:
+                self.save_player(self.current_player)
+    
+    def update_score(self, level, score):
+        """Record a finished game; returns True for a new high score"""
+        if self.current_player not in self.records:
+            return False
+        new_high = record_game(self.records[self.current_player], level, score)
+        self.save_player(self.current_player)
+        return new_high
+    
+    def credit_replay(self, key):
+        """Enter a verified replay's game in the ledger; False if it was already credited"""
+        with self.db:
+            cursor = self.db.execute(
+                "INSERT INTO credited_replays (key, player, credited_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO NOTHING",
+                (key, self.current_player, timestamp()))
+        return cursor.rowcount == 1
+    
+    def save_player(self, name):
+        """Queue a player's record to be written in the background"""
+        self.writer.submit(name, copy_record(self.records[name]))
+        if self.leaderboard is not None:
+            self.leaderboard.update(name, self.records[name])
+    
+    def write_records(self, records):
+        """Write player records in one transaction (runs on the writer thread)"""
+        if self.writer_db is None:
+            self.writer_db = self.connect()
+        with self.writer_db:
+            for name, record in records.items():
+                self.writer_db.execute(
+                    "INSERT INTO players (name, total_score, last_played) VALUES (?, ?, ?) "
+                    "ON CONFLICT(name) DO UPDATE SET "
+                    "total_score = excluded.total_score, last_played = excluded.last_played",
+                    (name, record['total_score'], record['last_played']))
+                player_id, = self.writer_db.execute("SELECT id FROM players WHERE name = ?", (name,)).fetchone()
+                self.writer_db.executemany(
+                    "INSERT INTO level_stats (player_id, level, high_score, games_played) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT(player_id, level) DO UPDATE SET "
+                    "high_score = excluded.high_score, games_played = excluded.games_played",
+                    [(player_id, level, record['high_scores'].get(level, 0), record['games_played'].get(level, 0))
+                     for level in sorted(set(record['high_scores']) | set(record['games_played']))])
+    
+    def load_player(self, name):
+        row = self.db.execute(
+            "SELECT id, total_score, last_played FROM players WHERE name = ?", (name,)).fetchone()
+        if row is None:
+            return None
+        player_id, total_score, last_played = row
+        player = {'high_scores': {}, 'games_played': {}, 'total_score': total_score, 'last_played': last_played}
+        for level, high_score, games_played in self.db.execute(
+                "SELECT level, high_score, games_played FROM level_stats WHERE player_id = ? ORDER BY level",
+                (player_id,)):
+            player['high_scores'][level] = high_score
+            player['games_played'][level] = games_played
+        return player
+    
+    def get_player_stats(self):
+        """Get current player's statistics"""
+        return self.records.get(self.current_player)
+    
+    def load_leaderboard_in_background(self):
+        self.leaderboard_loaded.clear()
+        self.leaderboard_thread = threading.Thread(target=self.load_leaderboard, name="leaderboard", daemon=True)
+        self.leaderboard_thread.start()
+    
+    def load_leaderboard(self):
+        """Build the leaderboard index from the database (runs on its own thread)"""
+        leaderboard = LeaderboardIndex()
+        try:
+            db = sqlite3.connect(self.path)
+            try:
+                # Plain table scans sorted here are much quicker than ORDER BY through the indexes
+                players = db.execute("SELECT id, name, total_score FROM players").fetchall()
+                players.sort(key=lambda row: (-row[2], row[0]))
+                names = {player_id: name for player_id, name, total_score in players}
+                leaderboard.total.extend((name, total_score) for player_id, name, total_score in players)
+                by_level = {}
+                for player_id, level, high_score in db.execute(
+                        "SELECT player_id, level, high_score FROM level_stats"):
+                    by_level.setdefault(level, []).append((-high_score, player_id))
+                for level, scores in sorted(by_level.items()):
+                    scores.sort()
+                    leaderboard.board(level).extend((names[player_id], -negated) for negated, player_id in scores)
+            finally:
+                db.close()
+            self.loaded_leaderboard = leaderboard
+        except sqlite3.Error as e:
+            print(f"Could not load the leaderboard: {e}")
+        self.leaderboard_loaded.set()
+    
+    def get_leaderboard(self, wait=False):
+        """The leaderboard index, or None while it is still loading (unless wait is set)"""
+        if self.leaderboard is None and (self.leaderboard_loaded.is_set() or wait):
+            self.leaderboard_loaded.wait()
+            if self.loaded_leaderboard is not None:
+                self.leaderboard, self.loaded_leaderboard = self.loaded_leaderboard, None
+                # Records changed this session may not be written yet
+                for name, record in self.records.items():
+                    self.leaderboard.update(name, record)
+        return self.leaderboard
+    
+    def get_top_players(self, limit=5):
+        """Get top players by total score"""
+        leaderboard = self.get_leaderboard()
+        if leaderboard is not None:
+            names = [name for name, total_score in leaderboard.total.top(limit)]
+        else:
+            names = self.query_top_names(limit)
+        top = []
+        for name in names:
+            if name not in self.records:
+                self.records[name] = self.load_player(name)  # Kept, as the home page asks every frame
+            top.append((name, self.records[name]))
+        return top
+    
+    def query_top_names(self, limit):
+        """Top names straight from the database, with this session's changes applied"""
+        order = {}
+        for position, (name,) in enumerate(self.db.execute(
+                "SELECT name FROM players ORDER BY total_score DESC, id LIMIT ?",
+                (limit + len(self.records),))):
+            order[name] = position
+        for name in self.records:
+            order.setdefault(name, float('inf'))
+        ranked = sorted(order, key=lambda name: (-(self.records.get(name) or self.load_player(name))['total_score'],
+                                                 order[name]))
+        return ranked[:limit]
+    
+    def get_level_top(self, level, limit=5):
+        """Get the best (name, high score) pairs for a level"""
+        return self.get_leaderboard(wait=True).board(level).top(limit)
+    
+    def get_rank(self, level=None):
+        """Current player's (rank, players ranked, percentile) by total or a level's high score
+        
+        None if the player isn't ranked, or the leaderboard is still loading.
+        """
+        leaderboard = self.get_leaderboard()
+        if leaderboard is None or self.current_player not in leaderboard.board(level):
+            return None
+        board = leaderboard.board(level)
+        return board.rank(self.current_player), len(board), board.percentile(self.current_player)
+    
+    def has_players(self):
+        leaderboard = self.get_leaderboard()
+        if leaderboard is not None:
+            return len(leaderboard.total) > 0
+        return bool(self.records) or self.db.execute("SELECT EXISTS (SELECT 1 FROM players)").fetchone()[0] == 1
+    
+    def persistence_stats(self):
+        return self.writer.stats()
+    
+    def close_writer_db(self):
+        """Close the writer thread's connection, checkpointing the WAL (runs on the writer thread)"""
+        if self.writer_db is not None:
+            self.writer_db.close()
+            self.writer_db = None
+    
+    def close(self):
+        """Write anything still queued and close the database"""
+        self.writer.close()
+        self.db.close()
+
+def migrate_json(json_path, store):
+    """Import a legacy player_data.json into a store in one transaction
+    
+    Players already in the store are left alone. Returns how many were added.
+    """
+    players = read_legacy_json(json_path)
+    added = 0
+    with store.db:
+        for name, record in players.items():
+            added += store.add_player(name, record['high_scores'], record['games_played'],
+                                      record['total_score'], record['last_played'])
+        store.set_meta('migrated_from', os.path.abspath(json_path))
+        store.set_meta('schema_version', SCHEMA_VERSION)
+    store.changed()
+    return added
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Flappy Bird player store tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+    migrate_parser = commands.add_parser("migrate", help="import a legacy player_data.json into a database")
+    migrate_parser.add_argument("json", nargs="?", default=JSON_FILE, help=f"legacy file (default {JSON_FILE})")
+    migrate_parser.add_argument("db", nargs="?", default=DB_FILE, help=f"database (default {DB_FILE})")
+    args = parser.parse_args()
+    
+    if args.command == "migrate":
+        store = SqlitePlayerStore(args.db, legacy_json=None)
+        count = migrate_json(args.json, store)
+        print(f"Imported {count} players from {args.json} into {args.db}")
+        store.close()
@@ -0,0 +1,453 @@
+"""Frame-time instrumentation
+
+FrameProfiler splits every frame into named phases by lapping a clock:
+each lap() charges the time since the previous lap to a phase, so
+instrumenting a stretch of straight-line code is one call per section:
+
+    profiler.begin_frame()
+    handle_events(); profiler.lap('events')
+    update(); profiler.lap('update')
+    ...
+    profiler.end_frame()
+
+The last CAPACITY frames are kept in a NumPy ring buffer (milliseconds per
+phase), summarised as percentiles and exported as CSV or JSON.
+
+DrawCallCounter counts pygame draw primitives, blits, Font.render calls and
+new Surfaces per frame, attributed to the method that made the call.
+
+SamplingProfiler samples a thread's Python stack from a background thread
+and writes collapsed stacks for flame-graph tools (flamegraph.pl,
+speedscope, inferno) plus a top-N self-time summary.
+
+SpikeDetector watches a FrameProfiler and writes a diagnostic snapshot
+whenever a frame runs over budget.
+"""
+import csv
+import gc
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import numpy as np
+
+PHASES = ('events', 'wait', 'update',
+          'background', 'clouds', 'ground', 'pipes', 'bird', 'shooter', 'particles', 'effects', 'hud', 'menu',
+          'overlay', 'flip')
+DRAW_PHASES = PHASES[PHASES.index('background'):]
+COLUMNS = PHASES + ('draw', 'frame')  # draw: all of DRAW_PHASES; frame: the whole loop iteration
+PERCENTILES = (50, 95, 99)
+
+class FrameProfiler:
+    """Per-phase frame times for the last CAPACITY frames"""
+    CAPACITY = 3600  # A minute at 60 fps
+    
+    def __init__(self, capacity=CAPACITY, clock=time.perf_counter):
+        self.clock = clock
+        self.columns = {name: i for i, name in enumerate(COLUMNS)}
+        self.draw_columns = [self.columns[name] for name in DRAW_PHASES]
+        self.samples = np.zeros((capacity, len(COLUMNS)))  # ms; row `next` is overwritten next
+        self.next = 0
+        self.count = 0
+        self.current = [0.0] * len(COLUMNS)  # Seconds, for the frame in progress
+        self.frame_start = None
+        self.last = clock()
+    
+    def __len__(self):
+        return self.count
+    
+    def begin_frame(self):
+        self.frame_start = self.last = self.clock()
+        self.current = [0.0] * len(COLUMNS)
+    
+    def lap(self, phase):
+        """Charge the time since the last lap to phase"""
+        now = self.clock()
+        self.current[self.columns[phase]] += now - self.last
+        self.last = now
+    
+    def end_frame(self):
+        """Store the frame's phase times in the ring buffer"""
+        if self.frame_start is None:
+            return
+        current = self.current
+        current[self.columns['draw']] = sum(current[i] for i in self.draw_columns)
+        current[self.columns['frame']] = self.clock() - self.frame_start
+        self.samples[self.next] = current
+        self.samples[self.next] *= 1000
+        self.next = (self.next + 1) % len(self.samples)
+        self.count = min(self.count + 1, len(self.samples))
+        self.frame_start = None
+    
+    def frames(self):
+        """The stored frames, oldest first, as a (frames, columns) array of ms"""
+        if self.count < len(self.samples):
+            return self.samples[:self.count]
+        return np.concatenate((self.samples[self.next:], self.samples[:self.next]))
+    
+    def last_frame(self):
+        """The most recent frame's phase times as {phase: ms}, or None"""
+        if not self.count:
+            return None
+        return dict(zip(COLUMNS, self.samples[self.next - 1].tolist()))
+    
+    def percentiles(self, q=PERCENTILES):
+        """{column: [ms at each percentile in q]} over the stored frames"""
+        if not self.count:
+            return {}
+        values = np.percentile(self.frames(), q, axis=0)
+        return {name: values[:, i].tolist() for name, i in self.columns.items()}
+    
+    def summary(self):
+        """{column: {p50, p95, p99, mean, max}} over the stored frames"""
+        if not self.count:
+            return {}
+        frames = self.frames()
+        percentiles = self.percentiles()
+        summary = {}
+        for name, i in self.columns.items():
+            stats = {f"p{q}": value for q, value in zip(PERCENTILES, percentiles[name])}
+            stats['mean'] = float(frames[:, i].mean())
+            stats['max'] = float(frames[:, i].max())
+            summary[name] = stats
+        return summary
+    
+    def export(self, path):
+        """Write the stored frames to path: JSON (summary and frames) for .json, CSV otherwise"""
+        frames = self.frames()
+        if path.lower().endswith('.json'):
+            with open(path, 'w') as f:
+                json.dump({
+                    'unit': 'ms',
+                    'frames': self.count,
+                    'columns': list(COLUMNS),
+                    'summary': self.summary(),
+                    'samples': np.round(frames, 4).tolist(),
+                }, f)
+        else:
+            with open(path, 'w', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(['index'] + [f"{name}_ms" for name in COLUMNS])
+                for number, row in enumerate(frames):
+                    writer.writerow([number] + [f"{value:.4f}" for value in row])
+
+CALL_KINDS = ('draw', 'blit', 'text', 'surface')
+
+class DrawCallCounter:
+    """Per-frame counts of pygame rendering calls, by kind and calling method
+    
+    Opt-in: start() installs a profile hook on the calling thread, which sees
+    every call into pygame's C functions, and swaps pygame.Surface for a
+    subclass that counts new surfaces. Everything runs slower while counting,
+    so don't trust frame times taken at the same time.
+    """
+    MODULE_KINDS = {
+        'pygame.draw': 'draw',
+        'pygame.gfxdraw': 'draw',
+        'pygame.transform': 'surface',  # Every transform returns a new surface
+    }
+    METHOD_KINDS = {
+        'Surface.blit': 'blit',
+        'Surface.blits': 'blit',
+        'Surface.fblits': 'blit',
+        'Font.render': 'text',
+        'Surface.copy': 'surface',
+        'Surface.convert': 'surface',
+        'Surface.convert_alpha': 'surface',
+    }
+    
+    def __init__(self):
+        self.counts = Counter()  # (kind, caller) -> calls in the frame in progress
+        self.last = Counter()  # The same for the last finished frame
+        self.totals = Counter()  # Summed over all finished frames
+        self.frames = 0
+        self.surface_class = None
+    
+    def start(self):
+        import pygame
+        counter = self
+        self.surface_class = pygame.Surface
+        
+        class CountedSurface(pygame.Surface):
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, **kwargs)
+                counter.count('surface', sys._getframe(1))
+        
+        pygame.Surface = CountedSurface
+        sys.setprofile(self.profile)
+    
+    def stop(self):
+        sys.setprofile(None)
+        if self.surface_class is not None:
+            import pygame
+            pygame.Surface = self.surface_class
+            self.surface_class = None
+    
+    def profile(self, frame, event, arg):
+        if event != 'c_call':
+            return
+        module = getattr(arg, '__module__', None)
+        if module:
+            kind = self.MODULE_KINDS.get(module)
+        else:
+            kind = self.METHOD_KINDS.get(getattr(arg, '__qualname__', None))
+        if kind:
+            self.count(kind, frame)
+    
+    def count(self, kind, frame):
+        code = frame.f_code
+        while code.co_name.startswith('<') and frame.f_back:  # Charge comprehensions and lambdas to their method
+            frame = frame.f_back
+            code = frame.f_code
+        self.counts[kind, getattr(code, 'co_qualname', code.co_name)] += 1
+    
+    def begin_frame(self):
+        self.counts = Counter()
+    
+    def end_frame(self):
+        self.last = self.counts
+        self.totals.update(self.counts)
+        self.frames += 1
+        self.counts = Counter()
+    
+    def last_frame(self):
+        """{kind: calls} for the last finished frame"""
+        return {kind: sum(n for (k, caller), n in self.last.items() if k == kind) for kind in CALL_KINDS}
+    
+    def per_frame(self):
+        """{caller: {kind: mean calls per frame}}, busiest callers first"""
+        callers = {}
+        for (kind, caller), n in self.totals.items():
+            callers.setdefault(caller, dict.fromkeys(CALL_KINDS, 0.0))[kind] = n / max(self.frames, 1)
+        return dict(sorted(callers.items(), key=lambda item: -sum(item[1].values())))
+    
+    def summary(self):
+        per_frame = self.per_frame()
+        return {
+            'frames': self.frames,
+            'per_frame': {kind: sum(calls[kind] for calls in per_frame.values()) for kind in CALL_KINDS},
+            'callers': per_frame,
+            'last_frame': self.last_frame(),
+        }
+    
+    def report(self, top=15):
+        """The busiest callers as a text table of mean calls per frame"""
+        lines = [f"Rendering calls per frame over {self.frames} frames:",
+                 f"  {'caller':<40}" + "".join(f"{kind:>9}" for kind in CALL_KINDS)]
+        summary = self.summary()
+        for caller, calls in list(summary['callers'].items())[:top]:
+            lines.append(f"  {caller:<40}" + "".join(f"{calls[kind]:>9.1f}" for kind in CALL_KINDS))
+        lines.append(f"  {'total':<40}" + "".join(f"{summary['per_frame'][kind]:>9.1f}" for kind in CALL_KINDS))
+        return "\n".join(lines)
+    
+    def export(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.summary(), f, indent=2)
+
+class SamplingProfiler:
+    """Samples one thread's Python stack RATE times a second
+    
+    Unlike cProfile nothing is added to the profiled code, so frame times
+    stay honest; the cost is one stack walk per sample on the sampling
+    thread. Time spent inside C calls (display.flip, Clock.tick) is charged
+    to the Python function that made them.
+    """
+    RATE = 500  # Samples per second
+    MAX_DEPTH = 128
+    
+    def __init__(self, rate=RATE, thread=None):
+        self.rate = rate
+        self.thread_id = (thread or threading.main_thread()).ident
+        self.stacks = Counter()  # Root-first tuples of frame labels -> samples
+        self.samples = 0
+        self.labels = {}  # Code object -> label
+        self.stopping = threading.Event()
+        self.sampler = None
+        self.switch_interval = None
+        self.started = None
+        self.duration = 0.0
+    
+    @property
+    def running(self):
+        return self.sampler is not None
+    
+    def start(self):
+        if self.running:
+            return
+        # The sampler needs the GIL to read the stack; hand it over more often
+        # than the default 5 ms or samples bunch up behind long Python stretches
+        self.switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(min(self.switch_interval, 0.5 / self.rate))
+        self.stopping.clear()
+        self.started = time.perf_counter()
+        self.sampler = threading.Thread(target=self.run, name="sampler", daemon=True)
+        self.sampler.start()
+    
+    def stop(self):
+        if not self.running:
+            return
+        self.stopping.set()
+        self.sampler.join()
+        self.sampler = None
+        self.duration += time.perf_counter() - self.started
+        sys.setswitchinterval(self.switch_interval)
+    
+    def run(self):
+        interval = 1 / self.rate
+        next_sample = time.perf_counter()
+        while not self.stopping.wait(max(0.0, next_sample - time.perf_counter())):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[self.stack(frame)] += 1
+                self.samples += 1
+            del frame
+            # Skip samples missed while the GIL was busy rather than bursting to catch up
+            next_sample = max(next_sample + interval, time.perf_counter())
+    
+    def stack(self, frame):
+        labels = []
+        while frame is not None and len(labels) < self.MAX_DEPTH:
+            code = frame.f_code
+            label = self.labels.get(code)
+            if label is None:
+                name = getattr(code, 'co_qualname', code.co_name)
+                label = self.labels[code] = f"{name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+            labels.append(label)
+            frame = frame.f_back
+        return tuple(reversed(labels))
+    
+    def collapsed(self):
+        """Lines of 'root;...;leaf count', the input format of flame-graph tools"""
+        return [f"{';'.join(stack)} {n}" for stack, n in sorted(self.stacks.items())]
+    
+    def top(self, n=15):
+        """The n functions with the most samples at the top of the stack: [(label, self, total)]"""
+        own = Counter()
+        total = Counter()
+        for stack, count in self.stacks.items():
+            own[stack[-1]] += count
+            for label in set(stack):
+                total[label] += count
+        return [(label, count, total[label]) for label, count in own.most_common(n)]
+    
+    def report(self, n=15):
+        lines = [f"{self.samples} samples over {self.duration:.1f} s ({self.rate} Hz); self and total time:"]
+        for label, own, total in self.top(n):
+            lines.append(f"  {100 * own / max(self.samples, 1):5.1f}% {100 * total / max(self.samples, 1):6.1f}%  {label}")
+        return "\n".join(lines)
+    
+    def write(self, directory="."):
+        """Write the collapsed stacks and the summary; returns the collapsed file's path"""
+        os.makedirs(directory, exist_ok=True)
+        base = os.path.join(directory, f"profile-{datetime.now():%Y%m%d-%H%M%S}")
+        with open(base + ".collapsed", 'w') as f:
+            f.write("\n".join(self.collapsed()) + "\n")
+        with open(base + ".txt", 'w') as f:
+            f.write(self.report() + "\n")
+        return base + ".collapsed"
+
+class SpikeDetector:
+    """Writes a JSON snapshot when a frame's work takes more than FACTOR frame intervals
+    
+    A snapshot has the recent frame timings, the phase that grew the most
+    against its median, the garbage collections that ran during the frame
+    (timed through gc.callbacks) and whatever state() returns about the game.
+    Frame time spent sleeping in the 'wait' phase doesn't count toward the
+    budget. The main thread only copies the numbers; snapshots are assembled
+    and written on a background thread, so capturing one doesn't add a hitch
+    of its own.
+    """
+    FACTOR = 1.5
+    HISTORY = 120  # Recent frames included in a snapshot
+    WARMUP = 120  # Frames at start-up that aren't judged
+    COOLDOWN = 60  # Frames after a snapshot before the next one
+    MAX_SNAPSHOTS = 20  # Per session, so a struggling machine doesn't fill the disk
+    
+    def __init__(self, profiler, frame_ms, directory, factor=FACTOR, state=None):
+        self.profiler = profiler
+        self.budget_ms = factor * frame_ms
+        self.directory = directory
+        self.state = state or dict
+        self.snapshots = 0
+        self.ignore = self.WARMUP  # Frames left before judging again
+        self.collections = []  # (generation, ms, collected) for the frame in progress
+        self.gc_start = None
+        self.writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="spike-writer")
+        gc.callbacks.append(self.on_gc)
+    
+    def close(self):
+        """Stop timing collections and wait for queued snapshots to be written"""
+        if self.on_gc in gc.callbacks:
+            gc.callbacks.remove(self.on_gc)
+        self.writer.shutdown()
+    
+    def skip(self, frames=2):
+        """Don't judge the current and next frames, e.g. around a loading screen"""
+        self.ignore = max(self.ignore, frames)
+    
+    def on_gc(self, phase, info):
+        if phase == 'start':
+            self.gc_start = time.perf_counter()
+        elif self.gc_start is not None:
+            self.collections.append((info['generation'], (time.perf_counter() - self.gc_start) * 1000,
+                                     info['collected']))
+            self.gc_start = None
+    
+    def check(self):
+        """Judge the frame the profiler just ended; queues a snapshot if it was over budget"""
+        collections = self.collections
+        self.collections = []
+        if self.ignore:
+            self.ignore -= 1
+            return False
+        frame = self.profiler.last_frame()
+        if frame is None or frame['frame'] - frame['wait'] <= self.budget_ms or self.snapshots >= self.MAX_SNAPSHOTS:
+            return False
+        self.snapshots += 1
+        self.ignore = self.COOLDOWN
+        self.writer.submit(self.write, datetime.now(), frame, collections, self.profiler.frames()[-self.HISTORY:].copy(),
+                           gc.get_count(), self.state())
+        return True
+    
+    def snapshot(self, when, frame, collections, recent, gc_counts, state):
+        medians = dict(zip(COLUMNS, np.median(recent[:-1], axis=0).tolist())) if len(recent) > 1 else {}
+        growth = {name: frame[name] - medians.get(name, 0.0) for name in PHASES if name != 'wait'}
+        return {
+            'time': when.isoformat(timespec='milliseconds'),
+            'frame_ms': frame['frame'],
+            'work_ms': frame['frame'] - frame['wait'],
+            'budget_ms': self.budget_ms,
+            'worst_phase': max(growth, key=growth.get),
+            'phase_ms': frame,
+            'phase_growth_ms': dict(sorted(growth.items(), key=lambda item: -item[1])),
+            'gc': {
+                'pause_ms': sum(ms for generation, ms, collected in collections),
+                'collections': [{'generation': generation, 'ms': ms, 'collected': collected}
+                                for generation, ms, collected in collections],
+                'counts': gc_counts,
+                'thresholds': gc.get_threshold(),
+                'stats': gc.get_stats(),
+            },
+            'state': state,
+            'recent_frames': {'columns': list(COLUMNS), 'ms': np.round(recent, 3).tolist()},
+        }
+    
+    def write(self, when, *parts):
+        """Assemble and write a snapshot (runs on the writer thread); returns its path"""
+        snapshot = self.snapshot(when, *parts)
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            path = os.path.join(self.directory, f"spike-{when:%Y%m%d-%H%M%S-%f}.json")
+            with open(path, 'w') as f:
+                json.dump(snapshot, f, indent=1)
+        except OSError as e:
+            print(f"Could not write spike snapshot: {e}")
+            return None
+        print(f"Frame spike: {snapshot['work_ms']:.1f} ms of work (budget {self.budget_ms:.1f} ms), mostly "
+              f"{snapshot['worst_phase']}; wrote {path}")
+        return path
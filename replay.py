@@ -0,0 +1,256 @@
+"""Compact binary replays of Flappy Bird games
+
+A replay holds everything needed to re-run one game exactly: the level,
+the game's seed and the ACTION_* flags fed to each simulation step. The
+inputs are stored as (run length, action) pairs, so idle stretches and
+held keys cost a few bytes. Replays play back through the headless
+Simulation, much faster than real time:
+
+    python replay.py play replays/*.fbr
+
+Submitted high scores are checked the same way: verify re-simulates each
+replay and accepts it only if it reproduces the claimed level and score,
+spreading large batches over all cores:
+
+    python replay.py verify --player Alice submissions/*.fbr
+
+A game is credited once: the level, seed and a hash of the inputs identify
+it, and the player store keeps a ledger of games already credited, so
+resubmitting a replay (or a copy of it) adds nothing to the leaderboard.
+"""
+import argparse
+import hashlib
+import os
+import struct
+import sys
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from simulation import Simulation, FPS, LEVEL_CONFIG
+
+MAGIC = b'FBR1'
+HEADER = struct.Struct('<4sBQII')  # magic, level, seed, score, steps
+EXTENSION = '.fbr'
+MAX_STEPS = FPS * 60 * 60  # An hour of play; replays claiming more are rejected unread
+VERIFY_TIME_LIMIT = 30  # Seconds a worker may spend re-simulating one replay
+
+# Outcome of checking one replay against its claimed level and score
+Verdict = namedtuple('Verdict', 'path accepted reason level score replayed_score steps key')
+
+class ReplayError(ValueError):
+    """Raised for files that are not valid replays"""
+
+def write_varint(out, value):
+    """Append value as a LEB128 variable-length unsigned integer"""
+    while value >= 0x80:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+
+def read_varint(data, pos):
+    """Read a LEB128 varint at pos; returns (value, next position)"""
+    value = shift = 0
+    while True:
+        if pos >= len(data):
+            raise ReplayError("truncated input log")
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+class Replay:
+    """A recorded game: level, seed, final score and one input per step"""
+    def __init__(self, level, seed, actions=None, score=0):
+        self.level = level
+        self.seed = seed
+        self.actions = bytearray(actions or ())  # ACTION_* flags per simulation step
+        self.score = score  # Score the game ended with when recorded
+    
+    def record(self, action):
+        """Log the input for the next simulation step"""
+        self.actions.append(action)
+    
+    @property
+    def steps(self):
+        return len(self.actions)
+    
+    def key(self):
+        """Identifies the game: the same level, seed and inputs always play out the same"""
+        return f"{self.level}:{self.seed}:{hashlib.sha256(self.actions).hexdigest()}"
+    
+    def to_bytes(self):
+        out = bytearray(HEADER.pack(MAGIC, self.level, self.seed, self.score, self.steps))
+        actions = self.actions
+        i = 0
+        while i < len(actions):
+            # Run-length encode: (how many steps, action held for them)
+            action = actions[i]
+            run = 1
+            while i + run < len(actions) and actions[i + run] == action:
+                run += 1
+            write_varint(out, run)
+            out.append(action)
+            i += run
+        return bytes(out)
+    
+    @classmethod
+    def from_bytes(cls, data):
+        if len(data) < HEADER.size:
+            raise ReplayError("file too short for a replay header")
+        magic, level, seed, score, steps = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ReplayError("not a replay file")
+        if level not in LEVEL_CONFIG:
+            raise ReplayError(f"unknown level {level}")
+        if steps > MAX_STEPS:
+            raise ReplayError(f"{steps} steps is longer than any game ({MAX_STEPS} max)")
+        actions = bytearray()
+        pos = HEADER.size
+        while pos < len(data):
+            run, pos = read_varint(data, pos)
+            if pos >= len(data) or len(actions) + run > steps:
+                raise ReplayError("input log does not match the step count")
+            actions.extend(data[pos:pos + 1] * run)
+            pos += 1
+        if len(actions) != steps:
+            raise ReplayError("input log does not match the step count")
+        return cls(level, seed, actions, score)
+    
+    def save(self, path):
+        with open(path, 'wb') as f:
+            f.write(self.to_bytes())
+    
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            return cls.from_bytes(f.read())
+    
+    def play(self, sim_class=Simulation, time_limit=None):
+        """Re-run the game headlessly; returns the finished simulation
+        
+        Raises ReplayError if it runs longer than time_limit seconds.
+        """
+        sim = sim_class(self.level, self.seed)
+        deadline = time.perf_counter() + time_limit if time_limit is not None else None
+        for i, action in enumerate(self.actions):
+            if sim.game_over:
+                break
+            if deadline is not None and i % 4096 == 0 and time.perf_counter() > deadline:
+                raise ReplayError(f"re-simulation took longer than {time_limit} s")
+            sim.step(action)
+        return sim
+
+def verify(replay, path=None):
+    """Re-simulate a replay and check it reproduces its claimed level and score"""
+    if replay.level not in LEVEL_CONFIG:
+        return Verdict(path, False, "unknown level", replay.level, replay.score, None, replay.steps, None)
+    try:
+        sim = replay.play(time_limit=VERIFY_TIME_LIMIT)
+    except ReplayError as e:
+        return Verdict(path, False, str(e), replay.level, replay.score, None, replay.steps, None)
+    if not sim.game_over:
+        reason = "game did not finish"
+    elif sim.score != replay.score:
+        reason = f"claimed score {replay.score}, replay scores {sim.score}"
+    else:
+        reason = "ok"
+    return Verdict(path, reason == "ok", reason, replay.level, replay.score, sim.score, replay.steps, replay.key())
+
+def verify_file(path):
+    """Load and verify one replay file (runs in the worker processes)"""
+    try:
+        replay = Replay.load(path)
+    except (OSError, ReplayError) as e:
+        return Verdict(path, False, str(e), None, None, None, 0, None)
+    return verify(replay, path)
+
+def verify_files(paths, workers=None):
+    """Verify many replay files on a process pool; yields verdicts in input order"""
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(paths) < 2:
+        yield from map(verify_file, paths)
+        return
+    chunksize = max(1, len(paths) // (workers * 8))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(verify_file, paths, chunksize=chunksize)
+
+def record_scores(player, verdicts):
+    """Credit accepted scores to a player in the player records
+    
+    Games already in the store's ledger of credited replays are skipped.
+    Returns (credited verdicts, skipped verdicts).
+    """
+    from flappy_bird import open_player_data  # Importing it opens no display or sound device
+    player_data = open_player_data()
+    player_data.set_current_player(player)
+    credited = []
+    skipped = []
+    for verdict in verdicts:
+        if player_data.credit_replay(verdict.key):
+            player_data.update_score(verdict.level, verdict.score)
+            credited.append(verdict)
+        else:
+            skipped.append(verdict)
+    player_data.close()
+    return credited, skipped
+
+def verify_command(paths, workers=None, player=None):
+    """Verify replays, print a verdict per file and a summary; returns the exit status"""
+    start = time.perf_counter()
+    accepted = []
+    first_paths = {}  # Replay key -> first file in this batch with that game
+    rejected = 0
+    duplicates = 0
+    for verdict in verify_files(paths, workers):
+        if not verdict.accepted:
+            rejected += 1
+            print(f"REJECTED {verdict.path}: {verdict.reason}")
+        elif verdict.key in first_paths:
+            duplicates += 1
+            print(f"DUPLICATE {verdict.path}: same game as {first_paths[verdict.key]}")
+        else:
+            first_paths[verdict.key] = verdict.path
+            accepted.append(verdict)
+            print(f"ACCEPTED {verdict.path}: level {verdict.level} score {verdict.score}")
+    elapsed = time.perf_counter() - start
+    rate = len(paths) / elapsed * 60 if elapsed > 0 else float('inf')
+    print(f"{len(accepted)} accepted, {duplicates} duplicates, {rejected} rejected "
+          f"in {elapsed:.2f} s ({rate:.0f} replays/min)")
+    if player and accepted:
+        credited, skipped = record_scores(player, accepted)
+        for verdict in skipped:
+            print(f"ALREADY CREDITED {verdict.path}: not counted again")
+        duplicates += len(skipped)
+        print(f"Recorded {len(credited)} verified scores for {player}")
+    return 1 if rejected or duplicates else 0
+
+def play_files(paths):
+    """Replay each file and report how it ends"""
+    for path in paths:
+        replay = Replay.load(path)
+        start = time.perf_counter()
+        sim = replay.play()
+        elapsed = time.perf_counter() - start
+        speedup = replay.steps / FPS / elapsed if elapsed > 0 else float('inf')
+        print(f"{path}: level {replay.level} seed {replay.seed} | recorded score {replay.score}, "
+              f"replayed score {sim.score} ({'game over' if sim.game_over else 'still running'}) | "
+              f"{replay.steps} steps in {elapsed * 1000:.1f} ms ({speedup:.0f}x real time)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Flappy Bird replay tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+    play_parser = commands.add_parser("play", help="re-run replays headlessly and print their outcome")
+    play_parser.add_argument("replays", nargs="+", help=f"replay files ({EXTENSION})")
+    verify_parser = commands.add_parser("verify", help="check replays reproduce their claimed level and score")
+    verify_parser.add_argument("replays", nargs="+", help=f"replay files ({EXTENSION})")
+    verify_parser.add_argument("--workers", type=int, help="worker processes (default: all cores)")
+    verify_parser.add_argument("--player", help="credit the accepted scores to this player")
+    args = parser.parse_args()
+    
+    if args.command == "play":
+        play_files(args.replays)
+    elif args.command == "verify":
+        sys.exit(verify_command(args.replays, args.workers, args.player))
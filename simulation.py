@@ -0,0 +1,789 @@
+"""Headless Flappy Bird simulation
+
+Pure Python game logic (bird physics, pipes and scoring, the level 4
+Zombie Bird Shooter mode switch, zombies and bullets) with no pygame
+dependency. The game in flappy_bird.py renders and feeds input to a
+Simulation; servers can step it directly without a display:
+
+    sim = Simulation(level=2, seed=42)
+    while not sim.game_over:
+        sim.step(ACTION_FLAP if sim.bird.y > 400 else ACTION_NONE)
+    print(sim.score)
+
+VecFlappyEnv steps many independent Flappy Bird games at once in NumPy
+arrays, for training agents and calibrating difficulty.
+"""
+import math
+import random
+from collections import namedtuple
+
+import numpy as np
+
+# Game constants
+SCREEN_WIDTH = 500  # Increased from 400
+SCREEN_HEIGHT = 700  # Increased from 600
+FPS = 60
+
+# Game physics - Level-based system
+GRAVITY = 0.3  # Consistent across all levels
+PIPE_WIDTH = 60
+
+# Level configurations
+LEVEL_CONFIG = {
+    1: {  # Easy Level (current settings)
+        'jump_strength': -6.5,
+        'pipe_speed': 2,
+        'pipe_gap': 200,
+        'name': 'EASY',
+        'color': (0, 255, 0)  # Green
+    },
+    2: {  # Medium Level
+        'jump_strength': -6.5,
+        'pipe_speed': 2.5,
+        'pipe_gap': 160,
+        'name': 'MEDIUM',
+        'color': (255, 255, 0)  # Yellow
+    },
+    3: {  # Hard Level
+        'jump_strength': -8,
+        'pipe_speed': 2.5,
+        'pipe_gap': 160,
+        'name': 'HARD',
+        'color': (255, 0, 0)  # Red
+    },
+    4: {  # Fantastic Level (Zombie Bird Shooter Mode)
+        'jump_strength': -6.5,
+        'pipe_speed': 2.5,
+        'pipe_gap': 160,
+        'name': 'FANTASTIC',
+        'color': (138, 43, 226)  # Purple
+    }
+}
+
+# Actions, combined as bit flags for one step
+ACTION_NONE = 0
+ACTION_FLAP = 1  # Jump in Flappy Bird mode, shoot in Zombie Bird Shooter mode
+ACTION_UP = 2  # Shooter mode: move up (held)
+ACTION_DOWN = 4  # Shooter mode: move down (held)
+ACTION_NUDGE_UP = 8  # Shooter mode: up key pressed this step, one extra move on top of the held one
+ACTION_NUDGE_DOWN = 16  # Shooter mode: down key pressed this step
+
+MODE_SWITCH_POINTS = 10  # Level 4 switches modes every 10 points
+
+# Events reported by Simulation.step
+EVENT_JUMP = 'jump'
+EVENT_SHOOT = 'shoot'
+EVENT_PIPE_PASSED = 'pipe_passed'  # (EVENT_PIPE_PASSED, x, y)
+EVENT_ZOMBIES_KILLED = 'zombies_killed'  # (EVENT_ZOMBIES_KILLED, count)
+EVENT_SHOOTER_HIT = 'shooter_hit'
+EVENT_MODE_SWITCH = 'mode_switch'  # (EVENT_MODE_SWITCH, shooter_mode)
+EVENT_CRASH = 'crash'  # (EVENT_CRASH, x, y)
+
+def round_half_away(value):
+    """Round like pygame.Rect attribute assignment (halves away from zero)"""
+    if value >= 0:
+        return int(math.floor(value + 0.5))
+    return -int(math.floor(-value + 0.5))
+
+class Box(namedtuple('Box', 'x y width height')):
+    """Integer rectangle with pygame.Rect's collision rule"""
+    __slots__ = ()
+    
+    @classmethod
+    def of(cls, x, y, width, height):
+        """Build a box, truncating floats like pygame.Rect(...) does"""
+        return cls(int(x), int(y), int(width), int(height))
+    
+    def colliderect(self, other):
+        if self.width <= 0 or self.height <= 0 or other.width <= 0 or other.height <= 0:
+            return False
+        return (self.x < other.x + other.width and other.x < self.x + self.width and
+                self.y < other.y + other.height and other.y < self.y + self.height)
+
+def swap_remove(items, index):
+    """Remove items[index] in O(1) by moving the last item into its place"""
+    last = items.pop()
+    if index < len(items):
+        items[index] = last
+
+class Pool:
+    """Recycles instances of an entity class instead of allocating new ones
+    
+    Pooled classes set themselves up in reset(*args), which __init__ calls,
+    so acquire() can reinitialise a released instance in place.
+    """
+    def __init__(self, cls):
+        self.cls = cls
+        self.free = []
+        self.created = 0
+        self.reused = 0
+        self.in_use = 0
+    
+    def acquire(self, *args):
+        if self.free:
+            item = self.free.pop()
+            item.reset(*args)
+            self.reused += 1
+        else:
+            item = self.cls(*args)
+            self.created += 1
+        self.in_use += 1
+        return item
+    
+    def release(self, item):
+        self.in_use -= 1
+        self.free.append(item)
+    
+    def release_all(self, items):
+        """Release every item in a list and empty it"""
+        self.in_use -= len(items)
+        self.free.extend(items)
+        items.clear()
+    
+    def stats(self):
+        return {'created': self.created, 'reused': self.reused, 'in_use': self.in_use, 'free': len(self.free)}
+
+class SpatialHash:
+    """Uniform grid broad phase for moving boxes
+    
+    Each entity is filed under every cell its box touches, together with
+    that box. Moving an entity only touches the grid when it crosses into
+    different cells, and queries test just the entities sharing a cell.
+    """
+    def __init__(self, cell_size=64):
+        self.cell_size = cell_size
+        self.cells = {}  # (column, row) -> set of entities
+        self.entries = {}  # entity -> (box, cell span)
+    
+    def __len__(self):
+        return len(self.entries)
+    
+    def span(self, box):
+        """Columns and rows a box touches, as (first column, first row, last column, last row)"""
+        size = self.cell_size
+        return (box.x // size, box.y // size,
+                (box.x + max(box.width, 1) - 1) // size, (box.y + max(box.height, 1) - 1) // size)
+    
+    def cells_of(self, span):
+        left, top, right, bottom = span
+        for column in range(left, right + 1):
+            for row in range(top, bottom + 1):
+                yield column, row
+    
+    def insert(self, entity, box):
+        span = self.span(box)
+        self.entries[entity] = (box, span)
+        for cell in self.cells_of(span):
+            self.cells.setdefault(cell, set()).add(entity)
+    
+    def remove(self, entity):
+        entry = self.entries.pop(entity, None)
+        if entry is None:
+            return
+        for cell in self.cells_of(entry[1]):
+            members = self.cells[cell]
+            members.discard(entity)
+            if not members:
+                del self.cells[cell]
+    
+    def move(self, entity, box):
+        """Update an entity's box, refiling it only if it changed cells"""
+        entry = self.entries.get(entity)
+        if entry is None or self.span(box) != entry[1]:
+            self.remove(entity)
+            self.insert(entity, box)
+        else:
+            self.entries[entity] = (box, entry[1])
+    
+    def query(self, box):
+        """Entities whose box collides with box"""
+        found = set()
+        for cell in self.cells_of(self.span(box)):
+            for entity in self.cells.get(cell, ()):
+                if entity not in found and box.colliderect(self.entries[entity][0]):
+                    found.add(entity)
+        return found
+    
+    def clear(self):
+        self.cells.clear()
+        self.entries.clear()
+
+class Bird:
+    def __init__(self, jump_strength=-6.5):
+        self.x = 50
+        self.y = SCREEN_HEIGHT // 2
+        self.velocity = 0
+        self.radius = 22  # Slightly larger
+        self.wing_flap = 0
+        self.rotation = 0
+        self.jump_strength = jump_strength
+    
+    def jump(self):
+        self.velocity = self.jump_strength
+    
+    def update(self):
+        self.velocity += GRAVITY
+        self.y += self.velocity
+        
+        # Update wing flap animation
+        self.wing_flap += 0.3
+        
+        # Calculate rotation based on velocity (more realistic)
+        self.rotation = max(-30, min(30, self.velocity * 3))
+    
+    def get_rect(self):
+        return Box.of(self.x - self.radius + 5, self.y - self.radius + 5,
+                      (self.radius - 5) * 2, (self.radius - 5) * 2)  # Slightly smaller hitbox
+
+class Pipe:
+    def __init__(self, x, pipe_gap=200, pipe_speed=2, rng=random):
+        self.reset(x, pipe_gap, pipe_speed, rng)
+    
+    def reset(self, x, pipe_gap=200, pipe_speed=2, rng=random):
+        self.x = x
+        self.pipe_gap = pipe_gap
+        self.pipe_speed = pipe_speed
+        self.height = rng.randint(120, SCREEN_HEIGHT - pipe_gap - 120)  # Better range
+        self.rect_x = int(x)
+        self.passed = False
+    
+    def update(self):
+        self.x -= self.pipe_speed
+        self.rect_x = round_half_away(self.x)
+    
+    @property
+    def top_rect(self):
+        return Box(self.rect_x, 0, PIPE_WIDTH, self.height)
+    
+    @property
+    def bottom_rect(self):
+        return Box(self.rect_x, self.height + self.pipe_gap,
+                   PIPE_WIDTH, SCREEN_HEIGHT - self.height - self.pipe_gap - 50)  # Account for ground
+    
+    def collides_with(self, bird):
+        bird_rect = bird.get_rect()
+        return bird_rect.colliderect(self.top_rect) or bird_rect.colliderect(self.bottom_rect)
+    
+    def is_off_screen(self):
+        return self.x + PIPE_WIDTH < 0
+
+class Bullet:
+    def __init__(self, x, y):
+        self.reset(x, y)
+    
+    def reset(self, x, y):
+        self.x = x
+        self.y = y
+        self.speed = 8
+        self.size = 4
+        self.active = True
+        self.rect = self.get_rect()  # Box for this step, refreshed as the bullet moves
+    
+    def update(self):
+        self.x += self.speed
+        self.rect = self.get_rect()
+        # Remove bullet if it goes off screen
+        if self.x > SCREEN_WIDTH:
+            self.active = False
+    
+    def get_rect(self):
+        return Box.of(self.x - self.size, self.y - self.size, self.size * 2, self.size * 2)
+
+class ShooterBird:
+    bullet_class = Bullet
+    
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+        self.size = 25
+        self.velocity_y = 0
+        self.speed = 4
+        self.health = 3
+        self.max_health = 3
+        self.last_shot = None
+        self.shoot_cooldown = 12  # steps (200 ms at 60 FPS)
+    
+    def move_up(self):
+        if self.y > 50:  # Top boundary
+            self.y -= self.speed
+    
+    def move_down(self):
+        if self.y < SCREEN_HEIGHT - 100:  # Bottom boundary (above ground)
+            self.y += self.speed
+    
+    def can_shoot(self, frame):
+        return self.last_shot is None or frame - self.last_shot > self.shoot_cooldown
+    
+    def shoot(self, frame, pool=None):
+        if self.can_shoot(frame):
+            self.last_shot = frame
+            make_bullet = pool.acquire if pool else self.bullet_class
+            return make_bullet(self.x + self.size, self.y + self.size // 2)
+        return None
+    
+    def update(self):
+        # Remove bobbing animation to prevent conflicts with movement controls
+        pass
+    
+    def get_rect(self):
+        return Box.of(self.x, self.y, self.size, self.size)
+
+class ZombieBird:
+    def __init__(self, x, rng=random):
+        self.reset(x, rng)
+    
+    def reset(self, x, rng=random):
+        self.x = x
+        self.y = rng.randint(60, SCREEN_HEIGHT - 150)
+        self.size = 20
+        self.speed = 2
+        self.health = 2
+        self.max_health = 2
+        self.hit_recently = False
+        self.hit_timer = 0
+        self.serial = 0  # Spawn order, which decides who is hit first when several overlap
+        self.rect = self.get_rect()  # Box for this step, refreshed as the zombie moves
+    
+    def update(self, time):
+        self.x -= self.speed
+        
+        # Reset hit effect
+        if self.hit_recently:
+            self.hit_timer -= 1
+            if self.hit_timer <= 0:
+                self.hit_recently = False
+        
+        # Slight vertical movement (driven by simulation time, not the wall clock)
+        self.y += math.sin(time * 3 + self.x * 0.01) * 0.5
+        self.rect = self.get_rect()
+    
+    def take_damage(self):
+        self.health -= 1
+        self.hit_recently = True
+        self.hit_timer = 10
+        return self.health <= 0
+    
+    def get_rect(self):
+        return Box.of(self.x, self.y, self.size, self.size)
+    
+    def is_off_screen(self):
+        return self.x < -self.size
+
+class ZombieBirdManager:
+    zombie_class = ZombieBird
+    
+    def __init__(self, rng=random):
+        self.zombie_birds = []
+        self.pool = Pool(self.zombie_class)
+        self.grid = SpatialHash()  # Broad phase for bullet and shooter collisions
+        self.spawn_timer = 0
+        self.spawn_interval = 120  # frames between spawns
+        self.spawned = 0
+        self.rng = rng
+    
+    def update(self, time):
+        # Update existing zombie birds, recycling the gone ones
+        zombies = self.zombie_birds
+        i = 0
+        while i < len(zombies):
+            zombie = zombies[i]
+            zombie.update(time)
+            if zombie.is_off_screen() or zombie.health <= 0:
+                swap_remove(zombies, i)  # The last zombie moves here and is updated next
+                self.grid.remove(zombie)
+                self.pool.release(zombie)
+            else:
+                self.grid.move(zombie, zombie.rect)
+                i += 1
+        
+        # Spawn new zombie birds
+        self.spawn_timer += 1
+        if self.spawn_timer >= self.spawn_interval:
+            self.spawn_timer = 0
+            self.spawn_zombie()
+    
+    def spawn_zombie(self):
+        zombie_x = SCREEN_WIDTH + 20
+        zombie = self.pool.acquire(zombie_x, self.rng)
+        zombie.serial = self.spawned
+        self.spawned += 1
+        self.zombie_birds.append(zombie)
+        self.grid.insert(zombie, zombie.rect)
+    
+    def first_hit(self, box):
+        """The earliest-spawned zombie colliding with box, or None"""
+        hits = self.grid.query(box)
+        return min(hits, key=lambda zombie: zombie.serial) if hits else None
+    
+    def check_bullet_collisions(self, bullets):
+        hits = 0
+        for bullet in bullets:
+            if not bullet.active:
+                continue
+            zombie = self.first_hit(bullet.rect)
+            if zombie:
+                bullet.active = False
+                if zombie.take_damage():
+                    hits += 1
+                    self.grid.remove(zombie)  # Dead: later bullets this step fly through
+        return hits
+    
+    def check_shooter_collision(self, shooter_bird):
+        zombie = self.first_hit(shooter_bird.get_rect())
+        if zombie:
+            shooter_bird.health -= 1
+            # Out of play at once; update() swap-removes and recycles it like any dead zombie
+            zombie.health = 0
+            self.grid.remove(zombie)
+            return True
+        return False
+    
+    def clear(self):
+        self.pool.release_all(self.zombie_birds)
+        self.grid.clear()
+        self.spawn_timer = 0
+
+class Simulation:
+    """One game of Flappy Bird, advanced one fixed step at a time"""
+    bird_class = Bird
+    pipe_class = Pipe
+    shooter_class = ShooterBird
+    zombie_manager_class = ZombieBirdManager
+    
+    def __init__(self, level=1, seed=None):
+        # Entities are recycled across steps and games rather than reallocated
+        self.pipe_pool = Pool(self.pipe_class)
+        self.bullet_pool = Pool(self.shooter_class.bullet_class)
+        self.pipes = []
+        self.bullets = []
+        self.zombie_manager = self.zombie_manager_class()
+        self.reset(level, seed)
+    
+    def reset(self, level=None, seed=None):
+        """Start a new game on level (default: the current level)
+        
+        Every game draws from its own generator; the same seed and inputs
+        replay the same game. Without a seed a fresh one is picked.
+        """
+        if level is not None:
+            self.level = level
+        self.seed = seed if seed is not None else random.getrandbits(32)
+        self.rng = random.Random(self.seed)
+        self.level_config = LEVEL_CONFIG[self.level]
+        self.bird = self.bird_class(self.level_config['jump_strength'])
+        self.pipe_pool.release_all(self.pipes)
+        self.pipes.append(self.new_pipe())
+        self.score = 0  # Standard starting score
+        self.game_over = False
+        self.started = False
+        self.frame = 0
+        self.events = []
+        
+        # Zombie Bird Shooter mode (for Fantastic level)
+        self.shooter_mode = False
+        self.shooter_bird = None
+        self.zombie_manager.rng = self.rng
+        self.zombie_manager.clear()
+        self.bullet_pool.release_all(self.bullets)
+        self.mode_switch_score = 0  # Track when to switch modes
+        self.shooter_score = 0  # Score in shooter mode
+    
+    @property
+    def time(self):
+        """Seconds of play, used for the zombie bobbing"""
+        return self.frame / FPS
+    
+    def new_pipe(self):
+        return self.pipe_pool.acquire(SCREEN_WIDTH, self.level_config['pipe_gap'], self.level_config['pipe_speed'], self.rng)
+    
+    def pool_stats(self):
+        """Allocation counters for the recycled entities"""
+        return {'pipes': self.pipe_pool.stats(), 'bullets': self.bullet_pool.stats(),
+                'zombies': self.zombie_manager.pool.stats()}
+    
+    def step(self, action=ACTION_NONE):
+        """Advance one step with the given ACTION_* flags; returns the step's events"""
+        self.events = []
+        if self.game_over:
+            return self.events
+        
+        if action & ACTION_FLAP:
+            self.started = True
+            self.flap()
+        if not self.started:
+            return self.events
+        
+        self.frame += 1
+        # Handle mode switching for Fantastic level (Level 4) - Zombie Bird Shooter
+        if self.level == 4:
+            self.update_mode_switch()
+        
+        # Update based on current mode
+        if self.level == 4 and self.shooter_mode:
+            self.update_shooter(action)
+        else:
+            self.update_flappy()
+        return self.events
+    
+    def flap(self):
+        """Jump, or shoot in Zombie Bird Shooter mode"""
+        if self.level == 4 and self.shooter_mode and self.shooter_bird:
+            bullet = self.shooter_bird.shoot(self.frame, self.bullet_pool)
+            if bullet:
+                self.bullets.append(bullet)
+                self.events.append((EVENT_SHOOT,))
+        else:
+            self.bird.jump()
+            self.events.append((EVENT_JUMP,))
+    
+    def crash(self, x, y):
+        if not self.game_over:  # Only report the crash once
+            self.game_over = True
+            self.events.append((EVENT_CRASH, x, y))
+    
+    def update_mode_switch(self):
+        # Check if we need to switch modes every 10 points
+        if self.score > 0 and self.score % MODE_SWITCH_POINTS == 0 and self.score != self.mode_switch_score:
+            self.mode_switch_score = self.score
+            self.shooter_mode = not self.shooter_mode
+            self.events.append((EVENT_MODE_SWITCH, self.shooter_mode))
+            
+            if self.shooter_mode:
+                # Switch to Zombie Bird Shooter mode
+                self.shooter_bird = self.shooter_class(self.bird.x, self.bird.y)
+                self.shooter_score = 0
+                self.pipe_pool.release_all(self.pipes)  # Remove all pipes
+                self.bullet_pool.release_all(self.bullets)  # Clear any existing bullets
+                self.zombie_manager.clear()  # Clear any existing zombies
+                # Ensure bird stops updating in shooter mode
+                self.bird.velocity = 0
+            else:
+                # Switch back to Flappy Bird mode
+                if self.shooter_bird:
+                    self.bird.x = self.shooter_bird.x
+                    self.bird.y = self.shooter_bird.y
+                    self.bird.velocity = 0
+                self.shooter_bird = None
+                self.bullet_pool.release_all(self.bullets)
+                # Ensure zombie manager is completely reset
+                self.zombie_manager.clear()
+                # Add a pipe
+                self.pipes.append(self.new_pipe())
+    
+    def update_shooter(self, action):
+        # Zombie Bird Shooter mode updates
+        shooter_bird = self.shooter_bird
+        if not shooter_bird:
+            return
+        if action & ACTION_NUDGE_UP:
+            shooter_bird.move_up()
+        if action & ACTION_NUDGE_DOWN:
+            shooter_bird.move_down()
+        shooter_bird.update()
+        
+        # Held movement keys
+        if action & ACTION_UP:
+            shooter_bird.move_up()
+        if action & ACTION_DOWN:
+            shooter_bird.move_down()
+        
+        # Update zombie manager
+        self.zombie_manager.update(self.time)
+        
+        # Update bullets, recycling spent ones
+        bullets = self.bullets
+        i = 0
+        while i < len(bullets):
+            bullet = bullets[i]
+            bullet.update()
+            if not bullet.active:
+                swap_remove(bullets, i)
+                self.bullet_pool.release(bullet)
+            else:
+                i += 1
+        
+        # Check bullet-zombie collisions
+        hits = self.zombie_manager.check_bullet_collisions(self.bullets)
+        if hits > 0:
+            self.shooter_score += hits
+            self.score += hits  # Also increase main score
+            self.events.append((EVENT_ZOMBIES_KILLED, hits))
+        
+        # Check shooter-zombie collisions
+        if self.zombie_manager.check_shooter_collision(shooter_bird):
+            self.events.append((EVENT_SHOOTER_HIT,))
+            if shooter_bird.health <= 0:
+                self.crash(shooter_bird.x, shooter_bird.y)
+        
+        # Check if shooter hits boundaries
+        if shooter_bird.y < 30 or shooter_bird.y > SCREEN_HEIGHT - 80:
+            self.crash(shooter_bird.x, shooter_bird.y)
+    
+    def update_flappy(self):
+        # Normal Flappy Bird mode - only run when NOT in shooter mode
+        bird = self.bird
+        bird.update()
+        
+        # Check if bird hits ground or ceiling (only in flappy bird mode)
+        if bird.y > SCREEN_HEIGHT - 50 - bird.radius or bird.y < bird.radius:
+            self.crash(bird.x, bird.y)
+        
+        # Update pipes (only in flappy bird mode)
+        pipes = self.pipes
+        i = 0
+        while i < len(pipes):
+            pipe = pipes[i]
+            pipe.update()
+            
+            # Check collision
+            if pipe.collides_with(bird):
+                self.crash(bird.x, bird.y)
+            
+            # Check if bird passed pipe
+            if not pipe.passed and pipe.x + PIPE_WIDTH < bird.x:
+                pipe.passed = True
+                self.score += 1
+                self.events.append((EVENT_PIPE_PASSED, pipe.x + PIPE_WIDTH // 2, bird.y))
+            
+            # Remove off-screen pipes; the rest stay in spawn order so the newest is last
+            if pipe.is_off_screen():
+                del pipes[i]
+                self.pipe_pool.release(pipe)
+            else:
+                i += 1
+        
+        # Add new pipes (with progressive difficulty) - only in flappy bird mode
+        pipe_spacing = max(250, 350 - self.score * 3)  # Increased base spacing and slower progression
+        if len(self.pipes) == 0 or self.pipes[-1].x < SCREEN_WIDTH - pipe_spacing:
+            self.pipes.append(self.new_pipe())
+
+class VecFlappyEnv:
+    """N independent Flappy Bird games stepped together in NumPy arrays
+    
+    Follows Simulation's Flappy Bird rules step for step (level 4 plays
+    without the shooter mode switch). Games start running immediately and
+    finished ones are reset at the end of the step that ended them.
+    """
+    MAX_PIPES = 4  # Pipes are at least 250px apart, so at most 3 are alive plus the new one
+    BIRD_X = 50
+    BIRD_RADIUS = 22
+    
+    def __init__(self, num_envs, level=1, seed=None):
+        self.num_envs = num_envs
+        self.rng = np.random.default_rng(seed)
+        levels = np.broadcast_to(np.asarray(level, dtype=np.int8), (num_envs,))
+        self.levels = levels.copy()
+        self.jump_strength = np.array([LEVEL_CONFIG[l]['jump_strength'] for l in levels], dtype=np.float64)
+        self.pipe_speed = np.array([LEVEL_CONFIG[l]['pipe_speed'] for l in levels], dtype=np.float64)
+        self.pipe_gap = np.array([LEVEL_CONFIG[l]['pipe_gap'] for l in levels], dtype=np.int32)
+        
+        # Per-game state
+        self.bird_y = np.zeros(num_envs, dtype=np.float64)
+        self.velocity = np.zeros(num_envs, dtype=np.float64)
+        self.score = np.zeros(num_envs, dtype=np.int32)
+        self.steps = np.zeros(num_envs, dtype=np.int64)
+        self.last_scores = np.zeros(num_envs, dtype=np.int32)  # Score of each game's last finished episode
+        self.episodes = 0
+        
+        # Per-pipe state, MAX_PIPES slots per game
+        shape = (num_envs, self.MAX_PIPES)
+        self.pipe_x = np.zeros(shape, dtype=np.float64)
+        self.pipe_rect_x = np.zeros(shape, dtype=np.int32)
+        self.pipe_height = np.zeros(shape, dtype=np.int32)
+        self.pipe_passed = np.zeros(shape, dtype=bool)
+        self.pipe_active = np.zeros(shape, dtype=bool)
+        self.reset()
+    
+    def reset(self, mask=None):
+        """Start new games for the envs selected by mask (default: all); returns observations"""
+        if mask is None:
+            mask = np.ones(self.num_envs, dtype=bool)
+        self.bird_y[mask] = SCREEN_HEIGHT // 2
+        self.velocity[mask] = 0
+        self.score[mask] = 0
+        self.steps[mask] = 0
+        self.pipe_active[mask] = False
+        self.spawn_pipes(mask)
+        return self.observe()
+    
+    def spawn_pipes(self, mask):
+        """Add a pipe at the right edge for the envs selected by mask"""
+        envs = np.flatnonzero(mask)
+        if len(envs) == 0:
+            return
+        slots = np.argmin(self.pipe_active[envs], axis=1)  # First free slot
+        gaps = self.pipe_gap[envs]
+        self.pipe_x[envs, slots] = SCREEN_WIDTH
+        self.pipe_rect_x[envs, slots] = SCREEN_WIDTH
+        self.pipe_height[envs, slots] = self.rng.integers(120, SCREEN_HEIGHT - gaps - 120 + 1)
+        self.pipe_passed[envs, slots] = False
+        self.pipe_active[envs, slots] = True
+    
+    def step(self, actions):
+        """Advance every game one step; actions is a bool (flap) per env
+        
+        Returns (observations, rewards, dones). Rewards are the pipes passed
+        this step; games that are done have already been reset, and their
+        final scores are in last_scores.
+        """
+        flap = np.asarray(actions, dtype=bool)
+        self.velocity[flap] = self.jump_strength[flap]
+        self.velocity += GRAVITY
+        self.bird_y += self.velocity
+        self.steps += 1
+        
+        # Ground and ceiling
+        radius = self.BIRD_RADIUS
+        crashed = (self.bird_y > SCREEN_HEIGHT - 50 - radius) | (self.bird_y < radius)
+        
+        # Move pipes, rounding their rects like pygame.Rect does
+        active = self.pipe_active
+        self.pipe_x -= self.pipe_speed[:, None] * active
+        x = self.pipe_x
+        self.pipe_rect_x = np.where(x >= 0, np.floor(x + 0.5), -np.floor(0.5 - x)).astype(np.int32)
+        
+        # Bird hitbox as in Bird.get_rect (truncated like Box.of)
+        box_x = int(self.BIRD_X - radius + 5)
+        box_y = np.trunc(self.bird_y - radius + 5)[:, None]
+        box_size = (radius - 5) * 2
+        pipe_left = self.pipe_rect_x
+        overlap_x = (box_x < pipe_left + PIPE_WIDTH) & (pipe_left < box_x + box_size)
+        bottom_top = self.pipe_height + self.pipe_gap[:, None]
+        hits_top = (box_y < self.pipe_height) & (0 < box_y + box_size)
+        hits_bottom = (box_y < SCREEN_HEIGHT - 50) & (bottom_top < box_y + box_size)
+        crashed |= np.any(active & overlap_x & (hits_top | hits_bottom), axis=1)
+        
+        # Scoring
+        passed = active & ~self.pipe_passed & (x + PIPE_WIDTH < self.BIRD_X)
+        self.pipe_passed |= passed
+        rewards = passed.sum(axis=1).astype(np.int32)
+        self.score += rewards
+        
+        # Remove off-screen pipes and add new ones with progressive spacing
+        self.pipe_active &= ~(x + PIPE_WIDTH < 0)
+        pipe_spacing = np.maximum(250, 350 - self.score * 3)
+        newest_x = np.where(self.pipe_active, x, -np.inf).max(axis=1)
+        self.spawn_pipes(newest_x < SCREEN_WIDTH - pipe_spacing)
+        
+        # Auto-reset finished games
+        dones = crashed
+        if dones.any():
+            self.last_scores[dones] = self.score[dones]
+            self.episodes += int(dones.sum())
+            self.reset(dones)
+        return self.observe(), rewards, dones
+    
+    def observe(self):
+        """Per-env features: bird y, velocity, distance to the next pipe, its gap top and gap bottom"""
+        ahead = self.pipe_active & (self.pipe_x + PIPE_WIDTH >= self.BIRD_X - self.BIRD_RADIUS)
+        pipe_x = np.where(ahead, self.pipe_x, np.inf)
+        nearest = np.argmin(pipe_x, axis=1)
+        rows = np.arange(self.num_envs)
+        gap_top = self.pipe_height[rows, nearest]
+        observations = np.empty((self.num_envs, 5), dtype=np.float32)
+        observations[:, 0] = self.bird_y
+        observations[:, 1] = self.velocity
+        observations[:, 2] = self.pipe_x[rows, nearest] - self.BIRD_X
+        observations[:, 3] = gap_top
+        observations[:, 4] = gap_top + self.pipe_gap
+        return observations
@@ -0,0 +1,51 @@
+import os
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import player_store
+import replay
+from simulation import Simulation, ACTION_FLAP, ACTION_NONE
+
+def record_idle_game(level=1, seed=7):
+    """A finished game where the bird flaps once and falls"""
+    sim = Simulation(level, seed)
+    game = replay.Replay(level, seed)
+    action = ACTION_FLAP
+    while not sim.game_over:
+        game.record(action)
+        sim.step(action)
+        action = ACTION_NONE
+    game.score = sim.score
+    return game
+
+def games_played(name, level):
+    store = player_store.SqlitePlayerStore(legacy_json=None)
+    try:
+        return store.load_player(name)['games_played'][level]
+    finally:
+        store.close()
+
+def test_same_replay_is_credited_once(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    game = record_idle_game()
+    game.save("first.fbr")
+    game.save("copy.fbr")
+    
+    # Twice in one batch: the copy is reported, not credited
+    assert replay.verify_command(["first.fbr", "copy.fbr"], workers=1, player="Alice") == 1
+    out = capsys.readouterr().out
+    assert "DUPLICATE copy.fbr: same game as first.fbr" in out
+    assert "Recorded 1 verified scores for Alice" in out
+    assert games_played("Alice", 1) == 1
+    
+    # And again in a later run
+    assert replay.verify_command(["copy.fbr"], workers=1, player="Alice") == 1
+    out = capsys.readouterr().out
+    assert "ALREADY CREDITED copy.fbr" in out
+    assert "Recorded 0 verified scores for Alice" in out
+    assert games_played("Alice", 1) == 1
+
+def test_different_games_have_different_keys():
+    game = record_idle_game(seed=7)
+    assert game.key() == replay.Replay.from_bytes(game.to_bytes()).key()
+    assert game.key() != record_idle_game(seed=8).key()
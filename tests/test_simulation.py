@@ -0,0 +1,31 @@
+import random
+
+from simulation import (Bullet, Simulation, ZombieBirdManager, ACTION_FLAP, ACTION_UP, ACTION_NUDGE_UP,
+                        MODE_SWITCH_POINTS)
+
+def test_bullets_do_not_hit_a_zombie_killed_this_step():
+    manager = ZombieBirdManager(random.Random(1))
+    manager.spawn_zombie()
+    zombie, = manager.zombie_birds
+    zombie.health = 1
+    center_x, center_y = zombie.x + zombie.size / 2, zombie.y + zombie.size / 2
+    first, second = Bullet(center_x, center_y), Bullet(center_x, center_y)
+    
+    assert manager.check_bullet_collisions([first, second]) == 1
+    assert not first.active
+    assert second.active  # Not spent on the dead zombie
+    assert manager.first_hit(second.rect) is None
+
+def shooter_after(action):
+    sim = Simulation(4, seed=3)
+    sim.step(ACTION_FLAP)
+    sim.score = MODE_SWITCH_POINTS  # Switches to shooter mode on the next step
+    sim.step()
+    start = sim.shooter_bird.y
+    sim.step(action)
+    return start - sim.shooter_bird.y
+
+def test_up_key_press_nudges_on_top_of_held_movement():
+    held = shooter_after(ACTION_UP)
+    assert held > 0
+    assert shooter_after(ACTION_UP | ACTION_NUDGE_UP) == 2 * held